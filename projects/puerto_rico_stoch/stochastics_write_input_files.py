@@ -148,12 +148,12 @@ for case in range(n_cases):
         f.write(")\n")
         f.write("rates = {\n")
         f.write("\t'CapReduction': dict(\n")
-        for scenario, prob, windspeed in zip(scenarios, probabilities, windspeeds):
+        # probability of failure of each technology (rows) for each scenario (columns)
+        fragilities = tt.fragility_many(windspeeds, [curves[techs[tech]] for tech in techs.keys()])
+        for j, (scenario, prob) in enumerate(zip(scenarios, probabilities)):
             f.write("\t\t" + scenario + "=(\n")
-            for tech in techs.keys():
-                tech_cat = techs[tech]
-                curve = curves[tech_cat]
-                fragility = tt.fragility(windspeed, curve=curve)
+            for i, tech in enumerate(techs.keys()):
+                fragility = fragilities[i, j]
                 capReduction = round(1.0 - fragility, 3)
                 # Check for unallowed values of capReduction
                 if capReduction > 1.0:
@@ -26,7 +26,7 @@ received this license file.  If not, see <http://www.gnu.org/licenses/>.
 # ---------------------------------------------------------------------------
 
 
-__all__ = ('pformat_results', 'stringify_data')
+__all__ = ('pformat_results', 'stringify_data', 'write_results', 'merge_results')
 
 from collections import defaultdict
 from sys import stderr as SE, stdout as SO
@@ -47,10 +47,22 @@ try:
 except ImportError:
     from io import StringIO
 
+import numpy as np
 from pyomo.core import value
 from IPython import embed as IP
 
 
+# Table dictionary below maps variable names to database table names
+output_tables = { "V_FlowIn"   : "Output_VFlow_In",  \
+				  "V_FlowOut"  : "Output_VFlow_Out", \
+				  "V_Curtailment"  : "Output_Curtailment", \
+				  "V_Capacity" : "Output_V_Capacity",       \
+				  "V_CapacityAvailableByPeriodAndTech"   : "Output_CapacityByPeriodAndTech",  \
+				  "V_EmissionActivityByPeriodAndProcess" : "Output_Emissions", \
+				  "Objective"  : "Output_Objective", \
+				  "Costs"      : "Output_Costs" }
+
+
 def stringify_data ( data, ostream=SO, format='plain' ):
 	# data is a list of tuples of ('var_name[index]', value)
 	#  data must be a list, as this function replaces each row,
@@ -70,6 +82,17 @@ def stringify_data ( data, ostream=SO, format='plain' ):
 		ostream.write( fmt.format(*row) )
 
 
+def var_values ( var ):
+	# index tuples and solved values of every element of var, as a list and an
+	# array in the same order. Elements without a value are read as zero.
+	keys = list( var.keys() )
+	vals = np.fromiter(
+	  (0.0 if vd.value is None else vd.value for vd in var.values()),
+	  dtype=float, count=len(keys)
+	)
+	return keys, vals
+
+
 def pformat_results ( pyomo_instance, pyomo_result, options ):
 	from pyomo.core import Objective, Var, Constraint
 
@@ -89,7 +112,7 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 		output.write( 'No solution found.' )
 		return output
 
-	objs = list(m.component_data_objects( Objective ))
+	objs = list(m.component_data_objects( Objective, active=True ))
 	if len( objs ) > 1:
 		msg = '\nWarning: More than one objective.  Using first objective.\n'
 		SE.write( msg )
@@ -116,9 +139,6 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 	con_info = list()
 	epsilon = 1e-9   # threshold for "so small it's zero"
 
-	emission_keys = { (i, t, v, o) : set() for e, i, t, v, o in m.EmissionActivity }
-	for e, i, t, v, o in m.EmissionActivity:
-		emission_keys[(i, t, v, o)].add(e)
 	P_0 = min( m.time_optimize )
 	P_e = m.time_future.last()
 	GDR = value( m.GlobalDiscountRate )
@@ -127,69 +147,91 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 	LLN = m.LifetimeLoanProcess
 	x   = 1 + GDR    # convenience variable, nothing more
 
-	# Extract optimal decision variable values related to commodity flow:
-	for p, s, d, t, v in m.V_StorageLevel:
-		val = value( m.V_StorageLevel[p, s, d, t, v] )
-		if abs(val) < epsilon: continue
+	# Variable and parameter values are read once into arrays aligned with
+	# their index tuples; flows, emissions and costs are computed on the arrays.
+	def nonzero( keys, vals ):
+		# keys and values of the elements with an absolute value of at least epsilon
+		keep = np.flatnonzero( np.abs( vals ) >= epsilon )
+		return [ keys[k] for k in keep ], vals[ keep ]
+
+	def store( group, keys, vals ):
+		# svars holds a group only if it has values
+		if len( keys ) > 0:
+			svars[ group ].update( zip( keys, vals ))
+
+	efficiency = m.Efficiency.extract_values()
+	emission_rates = defaultdict( list )
+	for (e, i, t, v, o), rate in m.EmissionActivity.extract_values().items():
+		emission_rates[i, t, v, o].append( (e, rate) )
+
+	# Emissions of the flows, summed by (p, e, t, v) once all flows are read
+	emission_keys = dict()
+	emission_rows = list()
+	emission_vals = list()
+	def add_emissions( keys, vals ):
+		# keys are (p, s, d, i, t, v, o)
+		rows, rates, targets = list(), list(), list()
+		for k, (p, s, d, i, t, v, o) in enumerate( keys ):
+			for e, rate in emission_rates.get( (i, t, v, o), () ):
+				rows.append( k )
+				rates.append( rate )
+				targets.append( emission_keys.setdefault( (p, e, t, v), len(emission_keys) ))
+		emission_rows.append( np.asarray( targets, dtype=int ))
+		emission_vals.append( vals[ rows ] * np.asarray( rates, dtype=float ))
 
-		svars['V_StorageLevel'][p, s, d, t, v] = val
-		
+	# Extract optimal decision variable values related to commodity flow:
+	keys, vals = nonzero( *var_values( m.V_StorageLevel ))
+	store( 'V_StorageLevel', keys, vals.tolist() )
 
 	# vflow_in is defined only for storage techs
-	for p, s, d, i, t, v, o in m.V_FlowIn:
-		val_in = value( m.V_FlowIn[p, s, d, i, t, v, o] )
-		if abs(val_in) < epsilon: continue
-
-		svars['V_FlowIn'][p, s, d, i, t, v, o] = val_in
-
-
-	for p, s, d, i, t, v, o in m.V_FlowOut:
-		val_out = value( m.V_FlowOut[p, s, d, i, t, v, o] )
-		if abs(val_out) < epsilon: continue
-
-		svars['V_FlowOut'][p, s, d, i, t, v, o] = val_out
-
-		if t not in m.tech_storage:
-			val_in = value( m.V_FlowOut[p, s, d, i, t, v, o] ) / value(m.Efficiency[i, t, v, o]) 
-			svars['V_FlowIn'][p, s, d, i, t, v, o] = val_in
-
-		if (i, t, v, o) not in emission_keys: continue
-
-		emissions = emission_keys[i, t, v, o]
-		for e in emissions:
-			evalue = val_out * m.EmissionActivity[e, i, t, v, o]
-			svars[ 'V_EmissionActivityByPeriodAndProcess' ][p, e, t, v] += evalue
-	
-	for p, i, t, v, o in m.V_FlowOutAnnual:
-		for s in m.time_season:
-			for d in m.time_of_day:
-				val_out = value( m.V_FlowOutAnnual[p, i, t, v, o] ) * value( m.SegFrac[s , d ])
-				if abs(val_out) < epsilon: continue
-				svars['V_FlowOut'][p, s, d, i, t, v, o] = val_out
-				svars['V_FlowIn'][p, s, d, i, t, v, o] = val_out / value(m.Efficiency[i, t, v, o])
-				if (i, t, v, o) not in emission_keys: continue
-				emissions = emission_keys[i, t, v, o]
-				for e in emissions:
-					evalue = val_out * m.EmissionActivity[e, i, t, v, o]
-					svars[ 'V_EmissionActivityByPeriodAndProcess' ][p, e, t, v] += evalue	
-	
-	for p, s, d, i, t, v, o in m.V_Curtailment:		
-		val = value( m.V_Curtailment[p, s, d, i, t, v, o] )
-		if abs(val) < epsilon: continue
-		svars['V_Curtailment'][p, s, d, i, t, v, o] = val
-		svars['V_FlowIn'][p, s, d, i, t, v, o] = (val + value( m.V_FlowOut[p, s, d, i, t, v, o] )) / value(m.Efficiency[i, t, v, o])
+	keys, vals = nonzero( *var_values( m.V_FlowIn ))
+	store( 'V_FlowIn', keys, vals.tolist() )
+
+	flow_out_keys, flow_out = var_values( m.V_FlowOut )
+	keys, vals = nonzero( flow_out_keys, flow_out )
+	store( 'V_FlowOut', keys, vals.tolist() )
+
+	rows = [ k for k, key in enumerate( keys ) if key[4] not in m.tech_storage ]
+	eff = np.array([ efficiency[ keys[k][3:] ] for k in rows ], dtype=float )
+	store( 'V_FlowIn', [ keys[k] for k in rows ], (vals[ rows ] / eff).tolist() )
+	add_emissions( keys, vals )
+
+	# Annual flows are split across the time slices by SegFrac
+	segments = [ (s, d) for s in m.time_season for d in m.time_of_day ]
+	seg_frac = np.array([ value( m.SegFrac[s, d] ) for s, d in segments ], dtype=float )
+	flow_out_annual_keys, flow_out_annual = var_values( m.V_FlowOutAnnual )
+	vals = ( flow_out_annual[:, None] * seg_frac[None, :] ).ravel()
+	keep = np.flatnonzero( np.abs( vals ) >= epsilon )
+	keys = [
+	  (p, s, d, i, t, v, o)
+	  for (p, i, t, v, o), (s, d) in (
+	    (flow_out_annual_keys[k // len(segments)], segments[k % len(segments)]) for k in keep )
+	]
+	vals = vals[ keep ]
+	eff = np.array([ efficiency[ key[3:] ] for key in keys ], dtype=float )
+	store( 'V_FlowOut', keys, vals.tolist() )
+	store( 'V_FlowIn', keys, (vals / eff).tolist() )
+	add_emissions( keys, vals )
+
+	if emission_keys:
+		evalues = np.zeros( len(emission_keys) )
+		np.add.at( evalues, np.concatenate( emission_rows ), np.concatenate( emission_vals ))
+		store( 'V_EmissionActivityByPeriodAndProcess', emission_keys, evalues.tolist() )
+
+	keys, vals = nonzero( *var_values( m.V_Curtailment ))
+	store( 'V_Curtailment', keys, vals.tolist() )
+	out = np.array([ m.V_FlowOut[key].value for key in keys ], dtype=float )
+	eff = np.array([ efficiency[ key[3:] ] for key in keys ], dtype=float )
+	store( 'V_FlowIn', keys, ((vals + out) / eff).tolist() )
 
 	# Extract optimal decision variable values related to capacity:
-	for t, v in m.V_Capacity:
-		val = value( m.V_Capacity[t, v] )
-		if abs(val) < epsilon: continue
-
-		svars['V_Capacity'][t, v] = val
+	capacity_keys, capacity = var_values( m.V_Capacity )
+	keys, vals = nonzero( capacity_keys, capacity )
+	store( 'V_Capacity', keys, vals.tolist() )
+	capacity = dict( zip( capacity_keys, capacity.tolist() ))
 
-	for p, t in m.V_CapacityAvailableByPeriodAndTech:
-		val = value( m.V_CapacityAvailableByPeriodAndTech[p, t] )
-		if abs(val) < epsilon: continue
-		svars['V_CapacityAvailableByPeriodAndTech'][p, t] = val
+	keys, vals = nonzero( *var_values( m.V_CapacityAvailableByPeriodAndTech ))
+	store( 'V_CapacityAvailableByPeriodAndTech', keys, vals.tolist() )
 
 	# Calculate model costs:	
 	# This is a generic workaround.  Not sure how else to automatically discover 
@@ -197,66 +239,55 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 	obj_name, obj_value = objs[0].getname(True), value( objs[0] )	
 	svars[ 'Objective' ]["('"+obj_name+"')"] = obj_value
 
-	for t, v in m.CostInvest.sparse_iterkeys():   # Returns only non-zero values
-	
-		icost = value( m.V_Capacity[t, v] )
-		if abs(icost) < epsilon: continue
-		icost *= value( m.CostInvest[t, v] )*(
-			(
-				1 -  x**( -min( value(m.LifetimeProcess[t, v]), P_e - v ) )
-			)/(
-				1 -  x**( -value( m.LifetimeProcess[t, v] ) ) 
-			)
-		)
+	def param_array( param, keys ):
+		return np.array([ value( param[k] ) for k in keys ], dtype=float )
+
+	def discount( periods, life ):
+		# discount factor of costs incurred from period(s) over life years
+		return life if not GDR else x **(P_0 - periods + 1) * (1 - x **(-life)) / GDR
+
+	keys = list( m.CostInvest.sparse_iterkeys() )   # Returns only non-zero values
+	cap = np.array([ capacity[t, v] for t, v in keys ], dtype=float )
+	keep = np.flatnonzero( np.abs( cap ) >= epsilon )
+	keys = [ keys[k] for k in keep ]
+	vintages = np.array([ v for t, v in keys ], dtype=float )
+	life = param_array( m.LifetimeProcess, keys )
+	undiscounted = cap[ keep ] * ( param_array( m.CostInvest, keys ) * (
+		( 1 - x **( -np.minimum( life, P_e - vintages )) ) / ( 1 - x **( -life ))
+	))
+	discounted = undiscounted * param_array( m.LoanAnnualize, keys ) * discount(
+		vintages, param_array( LLN, keys ))
+	for (t, v), icost, dcost in zip( keys, undiscounted.tolist(), discounted.tolist() ):
 		svars[	'Costs'	][ 'V_UndiscountedInvestmentByProcess', t, v] += icost
-
-		icost *= value( m.LoanAnnualize[t, v] )
-		icost *= (
-		  value( LLN[t, v] ) if not GDR else
-		    (x **(P_0 - v + 1) * (1 - x **(-value( LLN[t, v] ))) / GDR)
-		)
-
-		svars[	'Costs'	][ 'V_DiscountedInvestmentByProcess', t, v] += icost
-
-	for p, t, v in m.CostFixed.sparse_iterkeys():
-		fcost = value( m.V_Capacity[t, v] )
-		if abs(fcost) < epsilon: continue
-
-		fcost *= value( m.CostFixed[p, t, v] )
-		svars[	'Costs'	][ 'V_UndiscountedFixedCostsByProcess', t, v] += fcost * value( MPL[p, t, v] )
-		
-		fcost *= (
-		  value( MPL[p, t, v] ) if not GDR else
-		    (x **(P_0 - p + 1) * (1 - x **(-value( MPL[p, t, v] ))) / GDR)
-		) 
-
-		svars[	'Costs'	][ 'V_DiscountedFixedCostsByProcess', t, v] += fcost
-		
-	for p, t, v in m.CostVariable.sparse_iterkeys():
-		if t not in m.tech_annual:
-			vcost = sum(
-				value (m.V_FlowOut[p, S_s, S_d, S_i, t, v, S_o])
-				for S_i in m.processInputs[p, t, v]
-				for S_o in m.ProcessOutputsByInput[p, t, v, S_i]
-				for S_s in m.time_season
-				for S_d in m.time_of_day
-			)
-		
-		else:
-			vcost = sum(
-				value (m.V_FlowOutAnnual[p, S_i, t, v, S_o])
-				for S_i in m.processInputs[p, t, v]
-				for S_o in m.ProcessOutputsByInput[p, t, v, S_i]
-			)			
-		if abs(vcost) < epsilon: continue
-
-		vcost *= value( m.CostVariable[p, t, v] )
-		svars[	'Costs'	][ 'V_UndiscountedVariableCostsByProcess', t, v] += vcost * value( MPL[p, t, v] )
-		vcost *= (
-		  value( MPL[p, t, v] ) if not GDR else
-		    (x **(P_0 - p + 1) * (1 - x **(-value( MPL[p, t, v] ))) / GDR)
-		  ) 
-		svars[	'Costs'	][ 'V_DiscountedVariableCostsByProcess', t, v] += vcost
+		svars[	'Costs'	][ 'V_DiscountedInvestmentByProcess', t, v] += dcost
+
+	keys = list( m.CostFixed.sparse_iterkeys() )
+	cap = np.array([ capacity[t, v] for p, t, v in keys ], dtype=float )
+	keep = np.flatnonzero( np.abs( cap ) >= epsilon )
+	keys = [ keys[k] for k in keep ]
+	periods = np.array([ p for p, t, v in keys ], dtype=float )
+	life = param_array( MPL, keys )
+	fcost = cap[ keep ] * param_array( m.CostFixed, keys )
+	for (p, t, v), ucost, dcost in zip( keys, (fcost * life).tolist(), (fcost * discount( periods, life )).tolist() ):
+		svars[	'Costs'	][ 'V_UndiscountedFixedCostsByProcess', t, v] += ucost
+		svars[	'Costs'	][ 'V_DiscountedFixedCostsByProcess', t, v] += dcost
+
+	# Activity of each process (p, t, v), summed over its flows
+	keys = list( m.CostVariable.sparse_iterkeys() )
+	position = dict( (key, k) for k, key in enumerate( keys ))
+	activity = np.zeros( len(keys) )
+	for flow_keys, flows, ptv in ( (flow_out_keys, flow_out, (0, 4, 5)), (flow_out_annual_keys, flow_out_annual, (0, 2, 3)) ):
+		rows = np.array([ position.get( (key[ptv[0]], key[ptv[1]], key[ptv[2]]), -1 ) for key in flow_keys ], dtype=int )
+		mask = rows >= 0
+		activity += np.bincount( rows[ mask ], weights=flows[ mask ], minlength=len(keys) )
+	keep = np.flatnonzero( np.abs( activity ) >= epsilon )
+	keys = [ keys[k] for k in keep ]
+	periods = np.array([ p for p, t, v in keys ], dtype=float )
+	life = param_array( MPL, keys )
+	vcost = activity[ keep ] * param_array( m.CostVariable, keys )
+	for (p, t, v), ucost, dcost in zip( keys, (vcost * life).tolist(), (vcost * discount( periods, life )).tolist() ):
+		svars[	'Costs'	][ 'V_UndiscountedVariableCostsByProcess', t, v] += ucost
+		svars[	'Costs'	][ 'V_DiscountedVariableCostsByProcess', t, v] += dcost
 
 	collect_result_data( Cons, con_info, epsilon=1e-9 )
 
@@ -298,15 +329,8 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 	# -----------------------------------------------------------------
 
 	# Table dictionary below maps variable names to database table names
-	tables = { "V_FlowIn"   : "Output_VFlow_In",  \
-			   "V_FlowOut"  : "Output_VFlow_Out", \
-			   "V_Curtailment"  : "Output_Curtailment", \
-			   "V_Capacity" : "Output_V_Capacity",       \
-			   "V_CapacityAvailableByPeriodAndTech"   : "Output_CapacityByPeriodAndTech",  \
-			   "V_EmissionActivityByPeriodAndProcess" : "Output_Emissions", \
-			   "Objective"  : "Output_Objective", \
-			   "Costs"      : "Output_Costs" }
-	
+	tables = output_tables
+
 	db_tables = ['time_periods', 'time_season', 'time_of_day', 'technologies', 'commodities',\
 				'LifetimeTech', 'LifetimeProcess', 'Efficiency', 'EmissionActivity', 'ExistingCapacity']
 
@@ -333,88 +357,72 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 		cur = con.cursor()   # A database cursor enables traversal over DB records
 		con.text_factory = str # This ensures data is explored with UTF-8 encoding
 
-		### Copy tables from Input File to DB file.
-		# IF output file is empty database.
-		cur.execute("SELECT * FROM technologies")
-		is_db_empty = False #False for empty db file
-		for elem in cur:
-			is_db_empty = True #True for non-empty db file
-			break
+		if options.run_output:
+			# Results of this run are written to their own file and merged into
+			# the output database later (merge_results), so that runs sharing an
+			# output database do not write to it at the same time.
+			sectors = tech_sectors( con )
+			con.close()
+			create_run_output( options.run_output, options.output )
+			con = sqlite3.connect( options.run_output )
+			write_results( svars, con, options.scenario, sectors )
+		else:
+			### Copy tables from Input File to DB file.
+			# IF output file is empty database.
+			cur.execute("SELECT * FROM technologies")
+			is_db_empty = False #False for empty db file
+			for elem in cur:
+				is_db_empty = True #True for non-empty db file
+				break
 		
 		
-		if is_db_empty: #This file could be schema with populated results from previous run. Or it could be a normal db file.
-			cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='input_file';")
-			does_input_file_table_exist = False
-			for i in cur: # This means that the 'input_file' table exists in db.
-				does_input_file_table_exist = True
-			if does_input_file_table_exist: #This block distinguishes normal database from schema.
-				#This is schema file. 
-				cur.execute("SELECT file FROM input_file WHERE id is '1';")
-				for i in cur:
-					tagged_file = i[0]
-				tagged_file = re.sub('["]', "", tagged_file)
-
-				if tagged_file == options.dot_dat[0]:
-					#If Input_file name matches, add output and check tech/comm
-					dat_to_db(options.dot_dat[0], con)
-				else:
-					#If not a match, delete output tables and update input_file. Call dat_to_db
-					for i in db_tables:
-						cur.execute("DELETE FROM "+i+";")
-						cur.execute("VACUUM;")		
+			if is_db_empty: #This file could be schema with populated results from previous run. Or it could be a normal db file.
+				cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='input_file';")
+				does_input_file_table_exist = False
+				for i in cur: # This means that the 'input_file' table exists in db.
+					does_input_file_table_exist = True
+				if does_input_file_table_exist: #This block distinguishes normal database from schema.
+					#This is schema file. 
+					cur.execute("SELECT file FROM input_file WHERE id is '1';")
+					for i in cur:
+						tagged_file = i[0]
+					tagged_file = re.sub('["]', "", tagged_file)
+
+					if tagged_file == options.dot_dat[0]:
+						#If Input_file name matches, add output and check tech/comm
+						dat_to_db(options.dot_dat[0], con)
+					else:
+						#If not a match, delete output tables and update input_file. Call dat_to_db
+						for i in db_tables:
+							cur.execute("DELETE FROM "+i+";")
 					
-					for i in tables.keys():
-						cur.execute("DELETE FROM "+tables[i]+";")
-						cur.execute("VACUUM;")
+						for i in tables.keys():
+							cur.execute("DELETE FROM "+tables[i]+";")
 						
-					for i in options.dot_dat:
-						cur.execute("DELETE FROM input_file WHERE id=1;")
-						cur.execute("INSERT INTO input_file VALUES(1, '"+i+"');")
-						break
-					dat_to_db(i, con)
+						for i in options.dot_dat:
+							cur.execute("DELETE FROM input_file WHERE id=1;")
+							cur.execute("INSERT INTO input_file VALUES(1, '"+i+"');")
+							break
+						dat_to_db(i, con)
 			
-		else: #empty schema db file
-			cur.execute("CREATE TABLE IF NOT EXISTS input_file ( id integer PRIMARY KEY, file varchar(30));")
+			else: #empty schema db file
+				cur.execute("CREATE TABLE IF NOT EXISTS input_file ( id integer PRIMARY KEY, file varchar(30));")
 			
-			for i in tables.keys():
-				cur.execute("DELETE FROM "+tables[i]+";")
-				cur.execute("VACUUM;")
+				for i in tables.keys():
+					cur.execute("DELETE FROM "+tables[i]+";")
 			
-			for i in options.dot_dat:
-				cur.execute("DELETE FROM input_file WHERE id=1;")
-				cur.execute("INSERT INTO input_file(id, file) VALUES(?, ?);", (1,  '"'+i+'"'))
-				break
-			dat_to_db(i, con)
-		
-
-		
-		for table in svars.keys() :
-			if table in tables :
-				cur.execute("SELECT DISTINCT scenario FROM '"+tables[table]+"'")
-				for val in cur : 
-					if options.scenario == val[0]: # If scenario exists, delete
-						cur.execute("DELETE FROM "+tables[table]+" \
-									WHERE scenario is '"+options.scenario+"'") 
-				if table == 'Objective' : # Only table without sector info
-					for key in svars[table].keys():
-						key_str = str(key) # only 1 row to write
-						key_str = key_str[1:-1] # Remove parentheses
-						cur.execute("INSERT INTO "+tables[table]+" \
-									VALUES('"+options.scenario+"',"+key_str+", \
-									"+str(svars[table][key])+");")
-
-				else : # First add 'NULL' for sector then update
-					for key in svars[table].keys() : # Need to loop over keys (rows)
-						key_str = str(key)
-						key_str = key_str[1:-1] # Remove parentheses
-						cur.execute("INSERT INTO "+tables[table]+ \
-									" VALUES('"+options.scenario+"','NULL', \
-									"+key_str+","+str(svars[table][key])+");")
-					cur.execute("UPDATE "+tables[table]+" SET sector = \
-								(SELECT technologies.sector FROM technologies \
-								WHERE "+tables[table]+".tech = technologies.tech);")
-		con.commit()
-		con.close()			
+				for i in options.dot_dat:
+					cur.execute("DELETE FROM input_file WHERE id=1;")
+					cur.execute("INSERT INTO input_file(id, file) VALUES(?, ?);", (1,  '"'+i+'"'))
+					break
+				dat_to_db(i, con)
+
+			write_results( svars, con, options.scenario )
+
+		# A run output is a scratch file, the output database is vacuumed when it is merged
+		if options.vacuum and not options.run_output:
+			con.execute( "VACUUM;" )
+		con.close()
 		
 		if options.saveEXCEL or options.saveTEXTFILE or options.keepPyomoLP:
 			for inpu in options.dot_dat:
@@ -437,8 +445,103 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 	
 	return output
 	
+def tech_sectors ( con ):
+	# dictionary of the sector of each technology, first row of a technology is used
+	sectors = dict()
+	for tech, sector in con.execute( "SELECT tech, sector FROM technologies" ):
+		sectors.setdefault( tech, sector )
+	return sectors
+
+def write_results ( svars, con, scenario, sectors=None ):
+	"""
+	Write the values in svars to the output tables of database connection con,
+	replacing the rows of scenario, in a single transaction. The sector of each
+	row is looked up in sectors (tech -> sector), read from the technologies
+	table of con if not given.
+	"""
+	if sectors is None:
+		sectors = tech_sectors( con )
+
+	with con:
+		for table in svars.keys():
+			if table not in output_tables: continue
+			name = output_tables[ table ]
+			con.execute( "DELETE FROM "+name+" WHERE scenario = ?;", (scenario,) )
+
+			if table == 'Objective': # Only table without sector info
+				# key looks like "('TotalCost')"
+				rows = [ (scenario, key[2:-2], val) for key, val in svars[table].items() ]
+				n_columns = 3
+			else:
+				# index columns follow scenario and sector
+				columns = [ row[1] for row in con.execute( "PRAGMA table_info("+name+");" ) ]
+				tech = columns.index( 'tech' ) - 2
+				rows = [
+				  (scenario, sectors.get( key[tech] )) + tuple( key ) + (val,)
+				  for key, val in svars[table].items()
+				]
+				n_columns = len( columns )
+			con.executemany(
+			  "INSERT INTO "+name+" VALUES ("+", ".join( ["?"] * n_columns )+");", rows )
+
+def create_run_output ( run_output, output ):
+	# Create the output tables of database output in run_output, if not there already
+	src = sqlite3.connect( output )
+	schema = src.execute(
+	  "SELECT sql FROM sqlite_master WHERE type='table' AND name IN ("
+	  + ", ".join( ["?"] * len(output_tables) ) + ");", list( output_tables.values() )
+	).fetchall()
+	src.close()
+
+	con = sqlite3.connect( run_output )
+	with con:
+		for sql, in schema:
+			con.execute( re.sub( r"^CREATE TABLE", "CREATE TABLE IF NOT EXISTS", sql ))
+	con.close()
+
+def merge_results ( run_output, output, vacuum=False ):
+	"""
+	Merge the results written to run_output (see the --run_output option) into
+	the output database, replacing the rows of the scenarios they hold, in a
+	single transaction.
+	"""
+	con = sqlite3.connect( output )
+	con.execute( "ATTACH DATABASE ? AS run;", (run_output,) )
+	run_tables = set( row[0] for row in con.execute(
+	  "SELECT name FROM run.sqlite_master WHERE type='table';" ))
+
+	with con:
+		for name in output_tables.values():
+			if name not in run_tables: continue
+			scenarios = con.execute( "SELECT DISTINCT scenario FROM run."+name+";" ).fetchall()
+			con.executemany( "DELETE FROM main."+name+" WHERE scenario = ?;", scenarios )
+			con.execute( "INSERT INTO main."+name+" SELECT * FROM run."+name+";" )
+
+	con.execute( "DETACH DATABASE run;" )
+	if vacuum:
+		con.execute( "VACUUM;" )
+	con.close()
+
 def dat_to_db(input_file, output_schema, run_partial=False):
 
+	if os.path.splitext(input_file)[1] != '.dat':
+		# The data of an input database is parsed from a temporary .dat file
+		from tempfile import mkstemp
+		from argparse import Namespace
+		from temoa_config import db_2_dat
+		fd, dat_file = mkstemp(suffix='.dat')
+		os.close(fd)
+		sys.stdout = open(os.devnull, 'w') # Suppress the DB_to_DAT.py output
+		try:
+			db_2_dat(input_file, dat_file, Namespace(mga_weight=None))
+		finally:
+			sys.stdout.close()
+			sys.stdout = sys.__stdout__
+		try:
+			return dat_to_db(dat_file, output_schema, run_partial)
+		finally:
+			os.remove(dat_file)
+
 	def traverse_dat(dat_filename, search_tablename):
 		
 		result_string = ""
@@ -0,0 +1,234 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# ---------------------------------------------------------------
+# On-disk cache of parsed input data.
+#
+# Runs on the same input files (MGA iterations, reruns with another solver or
+# other options) read and index the same data each time. The first run stores
+# the data of the DataPortal, the elements of the index sets built by the
+# index functions of temoa_initialize and the dictionaries built by
+# CreateSparseDicts in a compressed pickle, named by a hash of the contents of
+# the input files and of the model code. Later runs on unchanged files load
+# this entry and go straight to building the parameters, variables and
+# constraints. The least recently used entries are removed when the cache
+# grows past its maximum size.
+#
+#   cache = TemoaCache( options.cache, options.cache_size )
+#   key = input_key( options.dot_dat, options )
+#   entry = cache.load( key )
+#   if entry is None:
+#       ...load the DataPortal modeldata, instance = model.create_instance( modeldata )
+#       cache.store( key, cache_entry( instance, modeldata.data() ))
+#   else:
+#       instance = cached_instance( model, entry )
+# ---------------------------------------------------------------
+
+import gc
+import hashlib
+import os
+import pickle
+import zlib
+from os.path import abspath, dirname, getmtime, getsize, isdir, join
+
+from pyomo.environ import Set
+
+# Dictionaries and sets created by CreateSparseDicts
+sparse_dicts = (
+    'processInputs',
+    'processOutputs',
+    'processLoans',
+    'activeFlow_psditvo',
+    'activeFlow_pitvo',
+    'activeFlowInStorage_psditvo',
+    'activeCurtailment_psditvo',
+    'activeActivity_ptv',
+    'activeCapacity_tv',
+    'activeCapacityAvailable_pt',
+    'commodityDStreamProcess',
+    'commodityUStreamProcess',
+    'ProcessInputsByOutput',
+    'ProcessOutputsByInput',
+    'processTechs',
+    'processReservePeriods',
+    'processVintages',
+    'baseloadVintages',
+    'curtailmentVintages',
+    'storageVintages',
+    'rampVintages',
+    'inputsplitVintages',
+    'outputsplitVintages',
+    'ProcessByPeriodAndOutput',
+)
+
+# Model code the cached index sets are built by, a change invalidates the cache
+model_files = ('temoa_model.py', 'temoa_initialize.py')
+
+cache_version = 1
+cache_extension = '.pkl.z'
+
+
+def input_key(files, options=None):
+    """
+    Hash of the contents of the input files (.dat or database), of the model
+    code and of the options that change the data read from a database.
+    """
+    key = hashlib.sha256()
+    key.update(str(cache_version).encode())
+    here = dirname(abspath(__file__))
+    for fname in [join(here, f) for f in model_files] + list(files):
+        with open(fname, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                key.update(block)
+    key.update(str(getattr(options, 'mga_weight', None)).encode())
+    return key.hexdigest()
+
+
+def operator_set(s):
+    """True if s is built from other sets (A | B, A * B, ...)."""
+    try:
+        # Pyomo >= 5.7, the subsets of an operator are its operands
+        return any(sub is not s for sub in s.subsets(expand_all_set_operators=True))
+    except (AttributeError, TypeError):
+        # Pyomo 5.5, operators are virtual sets
+        return getattr(s, 'virtual', False)
+
+
+def cache_entry(instance, data):
+    """
+    Entry of the cache for instance, created from data (the dictionary of a
+    DataPortal). Sets that are not in data (those of the index functions, and
+    empty ones) are stored as lists to keep their order.
+    """
+    sets = dict()
+    for s in instance.component_objects(Set, descend_into=False):
+        if s.is_indexed() or operator_set(s) or s.name in data:
+            continue
+        sets[s.name] = {None: list(s)}
+
+    sparse = dict((name, getattr(instance, name)) for name in sparse_dicts)
+
+    return {'data': data, 'sets': sets, 'sparse': sparse}
+
+
+class SparseDicts(dict):
+    """
+    Cached outputs of CreateSparseDicts, set on the abstract model. They are
+    shared with, not copied to, the instance when create_instance clones the
+    model.
+    """
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def cached_instance(model, entry):
+    """
+    Instance of model from a cache entry. The index sets are given as data, so
+    their index functions are not called, and CreateSparseDicts restores its
+    outputs instead of building them.
+    """
+    data = dict(entry['data'])
+    data.update(entry['sets'])
+    model.sparseDictCache = SparseDicts(entry['sparse'])
+    try:
+        instance = model.create_instance({None: data})
+    finally:
+        model.sparseDictCache = None
+    instance.sparseDictCache = None
+    return instance
+
+
+class TemoaCache(object):
+    def __init__(self, path, max_size=1024):
+        """
+        Cache in directory path (created if needed), of at most max_size MB.
+        """
+        self.path = abspath(path)
+        self.max_size = max_size * 2 ** 20
+        if not isdir(self.path):
+            os.makedirs(self.path)
+
+    def filename(self, key):
+        return join(self.path, key + cache_extension)
+
+    def load(self, key):
+        """Entry stored under key, None if there is none."""
+        fname = self.filename(key)
+        try:
+            with open(fname, 'rb') as f:
+                blob = f.read()
+        except (IOError, OSError):
+            return None
+
+        # The garbage collector is not needed while unpickling, only new
+        # objects are created
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            entry = pickle.loads(zlib.decompress(blob))
+        except Exception:
+            # from another version of Python or Pyomo, built again
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+
+        try:
+            os.utime(fname, None)  # most recently used
+        except OSError:  # removed by another run
+            pass
+        return entry
+
+    def store(self, key, entry):
+        """Store entry under key, then remove entries past the maximum size."""
+        fname = self.filename(key)
+        blob = zlib.compress(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL), 1)
+        # written under a temporary name, other runs never read a partial entry
+        tmp = '{}.{}.tmp'.format(fname, os.getpid())
+        with open(tmp, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp, fname)
+        self.evict(keep=fname)
+
+    def entries(self):
+        """Files of the cache entries, least recently used first."""
+        files = [join(self.path, f) for f in os.listdir(self.path) if f.endswith(cache_extension)]
+        return sorted(files, key=getmtime)
+
+    def evict(self, keep=None):
+        """Remove the least recently used entries until the cache fits in the maximum size."""
+        files = [(getsize(f), f) for f in self.entries()]
+        size = sum(s for s, f in files)
+        for fsize, fname in files:
+            if size <= self.max_size:
+                break
+            if fname == keep:
+                continue
+            size -= fsize
+            try:
+                os.remove(fname)
+            except OSError:  # removed by another run
+                pass
+
+    def clear(self):
+        for fname in self.entries():
+            os.remove(fname)
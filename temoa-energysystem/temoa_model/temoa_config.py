@@ -23,6 +23,64 @@ from os import sep
 
 import re
 
+# Extensions of input database files
+db_extensions = ('.db', '.sqlite', '.sqlite3', '.sqlitedb')
+
+#[set or param, table_name, DAT fieldname, flag (if any), index (where to insert '#')
+table_list = [
+	['set',  'time_periods',              'time_exist',          'e',            0],
+	['set',  'time_periods',              'time_future',         'f',            0],
+	['set',  'time_season',               '',                    '',             0],
+	['set',  'time_of_day',               '',                    '',             0],
+	['set',  'Zones',        	          '',                    '',             0],
+	['set',  'tech_curtailment',          '',                    '',             0],
+	['set',  'tech_reserve',              '',                    '',             0],		
+	['set',  'technologies',              'tech_resource',       'r',            0],
+	['set',  'technologies',              'tech_production',    ['p','pb','ps'], 0],
+	['set',  'technologies',              'tech_baseload',       'pb',           0],
+	['set',  'technologies',              'tech_storage',  		 'ps',           0],
+	['set',  'tech_ramping',              '',                    '',             0],
+	['set',  'commodities',               'commodity_physical',  'p',            0],
+	['set',  'commodities',               'commodity_emissions', 'e',            0],
+	['set',  'commodities',               'commodity_demand',    'd',            0],
+	['set',  'tech_groups',               '',                    '',             0],
+	['set',  'tech_annual',              '',                    '',             0],				
+	['set',  'groups',                    '',                    '',             0],		
+	['param','MinGenGroupTarget',         '',                    '',             2], 
+	['param','MinGenGroupWeight',         '',                    '',             2], 
+	['param','SegFrac',                   '',                    '',             2],
+	['param','DemandSpecificDistribution','',                    '',             3],
+	['param','CapacityToActivity',        '',                    '',             1],
+	['param','PlanningReserveMargin',     '',                    '',             1],
+	['param','GlobalDiscountRate',        '',                    '',             0],
+	['param','DiscountRate',              '',                    '',             2],
+	['param','EmissionActivity',          '',                    '',             5],
+	['param','EmissionLimit',             '',                    '',             2],
+	['param','Demand',                    '',                    '',             2],
+	['param','TechOutputSplit',           '',                    '',             3],
+	['param','TechInputSplit',            '',                    '',             3],
+	['param','MinCapacity',               '',                    '',             2],
+	['param','MaxCapacity',               '',                    '',             2],
+	['param','MaxActivity',               '',                    '',             2],
+	['param','MinActivity',               '',                    '',             2],
+	['param','GrowthRateMax',             '',                    '',             1],
+	['param','GrowthRateSeed',            '',                    '',             1],
+	['param','LifetimeTech',              '',                    '',             1],
+	['param','LifetimeProcess',           '',                    '',             2],
+	['param','LifetimeLoanTech',          '',                    '',             1],
+	['param','CapacityFactorTech',        '',                    '',             3],
+	['param','CapacityFactorProcess',     '',                    '',             4],
+	['param','Efficiency',                '',                    '',             4],
+	['param','ExistingCapacity',          '',                    '',             2],
+	['param','CostInvest',                '',                    '',             2],
+	['param','CostFixed',                 '',                    '',             3],
+	['param','CostVariable',              '',                    '',             3],
+	['param','CapacityCredit',            '',                    '',             2],
+	['param','RampUp',                    '',                    '',             1],
+	['param','RampDown',                  '',                    '',             1],
+	['param','StorageInitFrac',           '',                    '',             2],
+	['param','StorageDuration',           '',                    '',             1]]
+
 def db_2_dat(ifile, ofile, options):
 	# Adapted from DB_to_DAT.py
 	import sqlite3
@@ -105,61 +163,6 @@ def db_2_dat(ifile, ofile, options):
 				print(str_row)
 		f.write(';\n\n')
 
-	#[set or param, table_name, DAT fieldname, flag (if any), index (where to insert '#')
-	table_list = [
-		['set',  'time_periods',              'time_exist',          'e',            0],
-		['set',  'time_periods',              'time_future',         'f',            0],
-		['set',  'time_season',               '',                    '',             0],
-		['set',  'time_of_day',               '',                    '',             0],
-		['set',  'Zones',        	          '',                    '',             0],
-		['set',  'tech_curtailment',          '',                    '',             0],
-		['set',  'tech_reserve',              '',                    '',             0],		
-		['set',  'technologies',              'tech_resource',       'r',            0],
-		['set',  'technologies',              'tech_production',    ['p','pb','ps'], 0],
-		['set',  'technologies',              'tech_baseload',       'pb',           0],
-		['set',  'technologies',              'tech_storage',  		 'ps',           0],
-		['set',  'tech_ramping',              '',                    '',             0],
-		['set',  'commodities',               'commodity_physical',  'p',            0],
-		['set',  'commodities',               'commodity_emissions', 'e',            0],
-		['set',  'commodities',               'commodity_demand',    'd',            0],
-		['set',  'tech_groups',               '',                    '',             0],
-		['set',  'tech_annual',              '',                    '',             0],				
-		['set',  'groups',                    '',                    '',             0],		
-		['param','MinGenGroupTarget',         '',                    '',             2], 
-		['param','MinGenGroupWeight',         '',                    '',             2], 
-		['param','SegFrac',                   '',                    '',             2],
-		['param','DemandSpecificDistribution','',                    '',             3],
-		['param','CapacityToActivity',        '',                    '',             1],
-		['param','PlanningReserveMargin',     '',                    '',             1],
-		['param','GlobalDiscountRate',        '',                    '',             0],
-		['param','DiscountRate',              '',                    '',             2],
-		['param','EmissionActivity',          '',                    '',             5],
-		['param','EmissionLimit',             '',                    '',             2],
-		['param','Demand',                    '',                    '',             2],
-		['param','TechOutputSplit',           '',                    '',             3],
-		['param','TechInputSplit',            '',                    '',             3],
-		['param','MinCapacity',               '',                    '',             2],
-		['param','MaxCapacity',               '',                    '',             2],
-		['param','MaxActivity',               '',                    '',             2],
-		['param','MinActivity',               '',                    '',             2],
-		['param','GrowthRateMax',             '',                    '',             1],
-		['param','GrowthRateSeed',            '',                    '',             1],
-		['param','LifetimeTech',              '',                    '',             1],
-		['param','LifetimeProcess',           '',                    '',             2],
-		['param','LifetimeLoanTech',          '',                    '',             1],
-		['param','CapacityFactorTech',        '',                    '',             3],
-		['param','CapacityFactorProcess',     '',                    '',             4],
-		['param','Efficiency',                '',                    '',             4],
-		['param','ExistingCapacity',          '',                    '',             2],
-		['param','CostInvest',                '',                    '',             2],
-		['param','CostFixed',                 '',                    '',             3],
-		['param','CostVariable',              '',                    '',             3],
-		['param','CapacityCredit',            '',                    '',             2],
-		['param','RampUp',                    '',                    '',             1],
-		['param','RampDown',                  '',                    '',             1],
-		['param','StorageInitFrac',           '',                    '',             2],
-		['param','StorageDuration',           '',                    '',             1]]
-
 	with open(ofile, 'w') as f:
 		f.write('data ;\n\n')
 		#connect to the database
@@ -184,6 +187,75 @@ def db_2_dat(ifile, ofile, options):
 		cur.close()
 		con.close()
 
+def dat_value(value):
+	# Value of a database entry as the DAT parser reads it: text that looks
+	# like a number is a number.
+	if isinstance(value, str) and re.match(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$', value):
+		try:
+			return int(value)
+		except ValueError:
+			return float(value)
+	return value
+
+def db_2_data(ifile, options):
+	"""
+	Read the tables of the input database ifile into the dictionary form of
+	the data of a DataPortal ({set or param name: data}), the same data that
+	db_2_dat writes to a .dat file, without the intermediate file.  Each table
+	is read with a single query.  Sets are {None: [elements]}, params are
+	{index: value}, {None: value} for scalar params.
+	"""
+	import sqlite3
+
+	data = dict()
+	mga_weight = getattr(options, 'mga_weight', None)
+	con = sqlite3.connect(ifile)
+	cur = con.cursor()
+
+	table_exist = cur.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+	table_exist = [i[0] for i in table_exist]
+
+	tables = dict() # table name -> (columns, rows), tables divided by flag are read once
+	for kind, name, daname, flag, index in table_list:
+		if name not in table_exist:
+			continue
+		if name not in tables:
+			cur.execute("SELECT * FROM " + name)
+			tables[name] = ([i[0] for i in cur.description], cur.fetchall())
+		columns, rows = tables[name]
+		if flag != '':
+			flags = flag if type(flag) is list else [flag]
+			col = columns.index('flag')
+			selected = [line for line in rows if line[col] in flags]
+		else:
+			daname = name
+			selected = rows
+		if len(selected) == 0:
+			continue
+
+		if kind == 'set':
+			data[daname] = {None: [dat_value(line[0]) for line in selected]}
+		elif index == 0:
+			data[daname] = {None: dat_value(selected[0][0])}
+		elif index == 1:
+			data[daname] = dict((dat_value(line[0]), dat_value(line[1])) for line in selected)
+		else:
+			data[daname] = dict(
+			  (tuple(dat_value(i) for i in line[:index]), dat_value(line[index]))
+			  for line in selected
+			)
+
+	if mga_weight == 'integer':
+		data['tech_mga'] = {None: [dat_value(line[0]) for line in cur.execute("SELECT tech FROM technologies")]}
+	if mga_weight == 'normalized':
+		for tech, sector in cur.execute("SELECT tech, sector FROM technologies").fetchall():
+			data.setdefault('tech_' + sector, {None: list()})[None].append(dat_value(tech))
+
+	cur.close()
+	con.close()
+
+	return data
+
 class TemoaConfig( object ):
 	states = (
 	('mga', 'exclusive'),
@@ -192,6 +264,10 @@ class TemoaConfig( object ):
 	tokens = (
 		'dot_dat',
 		'output',
+		'run_output',
+		'vacuum',
+		'cache_size',
+		'cache',
 		'scenario',
 		'how_to_cite',
 		'version',
@@ -202,6 +278,7 @@ class TemoaConfig( object ):
 		'saveTEXTFILE',
 		'mgaslack',
 		'mgaiter',
+		'mgaparallel',
 		'path_to_db_io',
 		'path_to_logs',
 		'mgaweight'
@@ -223,6 +300,10 @@ class TemoaConfig( object ):
 		self.file_location    = None
 		self.dot_dat          = list() # Use Kevin's name.
 		self.output           = None # May update to a list if multiple output is required.
+		self.run_output       = None # Separate file for the results of this run, merged into output later.
+		self.vacuum           = False # VACUUM the output database after writing results.
+		self.cache            = None # Directory of the cache of parsed input data, see temoa_cache.
+		self.cache_size       = 1024 # Maximum size of the cache in MB.
 		self.scenario         = None
 		self.saveEXCEL        = False
 		self.saveTEXTFILE     = False
@@ -234,6 +315,7 @@ class TemoaConfig( object ):
 		self.mga              = None # mga slack value
 		self.mga_iter         = None
 		self.mga_weight       = None
+		self.mga_parallel     = None # number of processes solving MGA alternatives
 
 		# To keep consistent with Kevin's argumetn parser, will be removed in the future.
 		self.graph_format     = None
@@ -263,6 +345,8 @@ class TemoaConfig( object ):
 			else:
 				msg += '{:>25s}  {}\n'.format(' ', i)
 		msg += '{:>{}s}: {}\n'.format('Output file', width, self.output)
+		msg += '{:>{}s}: {}\n'.format('Run output file', width, self.run_output)
+		msg += '{:>{}s}: {}\n'.format('Input cache', width, self.cache)
 		msg += '{:>{}s}: {}\n'.format('Scenario', width, self.scenario)	
 		msg += '{:>{}s}: {}\n'.format('Spreadsheet output', width, self.saveEXCEL)
 		msg += spacer
@@ -277,6 +361,7 @@ class TemoaConfig( object ):
 		msg += '{:>{}s}: {}\n'.format('MGA slack value', width, self.mga)
 		msg += '{:>{}s}: {}\n'.format('MGA # of iterations', width, self.mga_iter)
 		msg += '{:>{}s}: {}\n'.format('MGA weighting method', width, self.mga_weight)
+		msg += '{:>{}s}: {}\n'.format('MGA parallel processes', width, self.mga_parallel)
 		msg += '**NOTE: If you are performing MGA runs, navigate to the DAT file and make any modifications to the MGA sets before proceeding.'
 		return msg
 
@@ -292,6 +377,22 @@ class TemoaConfig( object ):
 		r'--output[\s\=]+[-\\\/\:\.\~\w]+(\.db|\.sqlite)\b'
 		self.output = abspath(t.value.replace('=', ' ').split()[1])
 	
+	def t_run_output(self, t):
+		r'--run_output[\s\=]+[-\\\/\:\.\~\w]+(\.db|\.sqlite)\b'
+		self.run_output = abspath(t.value.replace('=', ' ').split()[1])
+
+	def t_vacuum(self, t):
+		r'--vacuum\b'
+		self.vacuum = True
+
+	def t_cache_size(self, t):
+		r'--cache_size[\s\=]+\d+\b'
+		self.cache_size = int(t.value.replace('=', ' ').split()[1])
+
+	def t_cache(self, t):
+		r'--cache[\s\=]+[-\\\/\:\.\~\w]+'
+		self.cache = abspath(t.value.replace('=', ' ').split()[1])
+
 	def t_scenario(self, t):
 		r'--scenario[\s\=]+\w+\b'
 		self.scenario = t.value.replace('=', ' ').split()[1]
@@ -345,8 +446,12 @@ class TemoaConfig( object ):
 		r'iteration[\s\=]+[\d]+'
 		self.mga_iter = int(t.value.replace('=', ' ').split()[1])
 	
+	def t_mga_mgaparallel(self, t):
+		r'parallel[\s\=]+[\d]+'
+		self.mga_parallel = int(t.value.replace('=', ' ').split()[1])
+	
 	def t_mga_mgaweight(self, t):
-		r'weight[\s\=]+(integer|normalized|distance)\b'
+		r'weight[\s\=]+(integer|normalized|distance|random)\b'
 		self.mga_weight = t.value.replace('=', ' ').split()[1]
 		
 	def t_mga_end(self, t):
@@ -430,7 +535,7 @@ class TemoaConfig( object ):
 			i_name, i_ext = splitext(i)
 			if (i_ext == '.dat') or (i_ext == '.txt'):
 				db_or_dat = False
-			elif (i_ext == '.db') or (i_ext == '.sqlite') or (i_ext == '.sqlite3') or (i_ext == 'sqlitedb'):
+			elif i_ext in db_extensions:
 				db_or_dat = True
 			
 		if not self.output and db_or_dat:
@@ -446,19 +551,5 @@ class TemoaConfig( object ):
 			for i in range(self.mga_iter):
 				self.__mga_todo.put(self.scenario + '_mga_' + str(i))
 
-		f = open(os.devnull, 'w'); 
-		sys.stdout = f # Suppress the original DB_to_DAT.py output
-		
-		counter = 0
-		
-		for ifile in self.dot_dat:
-			i_name, i_ext = splitext(ifile)
-			if i_ext != '.dat':
-				ofile = i_name + '.dat'
-				db_2_dat(ifile, ofile, self)
-				self.dot_dat[self.dot_dat.index(ifile)] = ofile
-				counter += 1
-		f.close()
-		sys.stdout = sys.__stdout__
-		if counter > 0:
-			sys.stderr.write("\n{} .db DD file(s) converted\n".format(counter))
\ No newline at end of file
+		# Input databases are not converted to .dat files, create_temoa_instance
+		# reads them straight into the DataPortal (db_2_data)
\ No newline at end of file
@@ -18,6 +18,7 @@ received this license file.  If not, see <http://www.gnu.org/licenses/>.
 from operator import itemgetter as iget
 from itertools import product as cross_product
 from sys import argv, stderr as SE, stdout as SO
+from time import time
 
 import IPython
 
@@ -70,6 +71,9 @@ class TemoaModel( AbstractModel ):
 		self.inputsplitVintages = dict()
 		self.outputsplitVintages = dict()
 		self.ProcessByPeriodAndOutput = dict()
+		self.sparseDictTimes = dict() # Seconds spent in each stage of CreateSparseDicts
+		self.flowIndexCache = dict() # Flow index tables of constraints, see temoa_rules
+		self.sparseDictCache = None # Outputs of CreateSparseDicts from a cache, see temoa_cache
 
 # ---------------------------------------------------------------
 # Validation and initialization routines.
@@ -508,18 +512,56 @@ def CreateSparseDicts ( M ):
 	in the model. The function works by looping over the sparse indices in the
 	Efficiency table. For each iteration of the loop, the appropriate key / value
 	pairs are defined as appropriate for each dictionary.
+
+	The technology subsets and sparse keys tested inside the loop are first
+	copied into plain Python frozensets, so that each test is a hash lookup
+	rather than a scan over a Pyomo Set or a generator of sparse keys. The
+	active flow, capacity and activity sets are then built from the
+	(p, i, t, v, o) flows collected during the same pass. The seconds spent in
+	each stage are stored in M.sparseDictTimes.
+
+	When M.sparseDictCache holds the outputs of a previous run on the same data
+	(see temoa_cache), they are restored instead.
 	"""
+	l_start = time()
+
+	if M.sparseDictCache is not None:
+		# Built by a previous run on the same data
+		for name, val in M.sparseDictCache.items():
+			setattr( M, name, val )
+		M.sparseDictTimes = { 'cache' : time() - l_start }
+		return
+
 	l_first_period = min( M.time_future )
-	l_exist_indices = M.ExistingCapacity.sparse_keys()
+	l_exist_indices = frozenset( M.ExistingCapacity.sparse_keys() )
 	l_used_techs = set()
 
+	# Snapshot of the sets and sparse keys used in the loop below
+	l_time_optimize   = tuple( M.time_optimize )
+	l_vintage_exist   = frozenset( M.vintage_exist )
+	l_tech_annual     = frozenset( M.tech_annual )
+	l_tech_curtailment = frozenset( M.tech_curtailment )
+	l_tech_baseload   = frozenset( M.tech_baseload )
+	l_tech_storage    = frozenset( M.tech_storage )
+	l_tech_ramping    = frozenset( M.tech_ramping )
+	l_tech_resource   = frozenset( M.tech_resource )
+	l_tech_reserve    = frozenset( M.tech_reserve )
+	l_inputsplit      = frozenset( M.TechInputSplit.sparse_iterkeys() )
+	l_outputsplit     = frozenset( M.TechOutputSplit.sparse_iterkeys() )
+	l_slices = tuple( cross_product( M.time_season, M.time_of_day ))
+
+	l_snapshot = time()
+
+	# Active flows (p, i, t, v, o), used to build the active sets below
+	l_flows = set()
+
 	# The basis for the dictionaries are the sparse keys defined in the
 	# Efficiency table.
 	for i, t, v, o in M.Efficiency.sparse_iterkeys():
 		l_process = (t, v)
 		l_lifetime = value(M.LifetimeProcess[ l_process ])
 		# Do some error checking for the user.
-		if v in M.vintage_exist:
+		if v in l_vintage_exist:
 			if l_process not in l_exist_indices:
 				msg = ('Warning: %s has a specified Efficiency, but does not '
 				  'have any existing install base (ExistingCapacity).\n')
@@ -550,88 +592,65 @@ def CreateSparseDicts ( M ):
 
 		l_used_techs.add( t )
 
+		# Properties of the technology that do not depend on the period
+		l_optimize_vintage = v in l_time_optimize
+		if l_optimize_vintage:
+			l_loan_life = value(M.LifetimeLoanProcess[ l_process ])
+		l_curtailment = t in l_tech_curtailment
+		l_baseload = t in l_tech_baseload
+		l_storage = t in l_tech_storage
+		l_ramping = t in l_tech_ramping
+		l_resource = t in l_tech_resource
+		l_reserve = t in l_tech_reserve
+
 		# Add in the period (p) index, since it's not included in the efficiency
 		# table.
-		for p in M.time_optimize:
+		for p in l_time_optimize:
 			# Can't build a vintage before it's been invented
 			if p < v: continue
 
 			pindex = (p, t, v)
 
-			if v in M.time_optimize:
-				l_loan_life = value(M.LifetimeLoanProcess[ l_process ])
-				if v + l_loan_life >= p:
-					M.processLoans[ pindex ] = True
+			if l_optimize_vintage and v + l_loan_life >= p:
+				M.processLoans[ pindex ] = True
 
 			# if tech is no longer active, don't include it
 			if v + l_lifetime <= p: continue
 
 			# Here we utilize the indices in a given iteration of the loop to
-			# create the dictionary keys, and initialize the associated values
-			# to an empty set.
-			if pindex not in M.processInputs:
-				M.processInputs[  pindex ] = set()
-				M.processOutputs[ pindex ] = set()
-			if (p, i) not in M.commodityDStreamProcess:
-				M.commodityDStreamProcess[p, i] = set()
-			if (p, o) not in M.commodityUStreamProcess:
-				M.commodityUStreamProcess[p, o] = set()
-			if (p, t, v, i) not in M.ProcessOutputsByInput:
-				M.ProcessOutputsByInput[p, t, v, i] = set()
-			if (p, t, v, o) not in M.ProcessInputsByOutput:
-				M.ProcessInputsByOutput[p, t, v, o] = set()
-			if t not in M.processTechs:
-					M.processTechs[t] = set()
+			# create the dictionary keys (if not yet defined) and fill in the
+			# appropriate values for each dictionary.
+			M.processInputs.setdefault( pindex, set() ).add( i )
+			M.processOutputs.setdefault( pindex, set() ).add( o )
+			M.commodityDStreamProcess.setdefault( (p, i), set() ).add( (t, v) )
+			M.commodityUStreamProcess.setdefault( (p, o), set() ).add( (t, v) )
+			M.ProcessOutputsByInput.setdefault( (p, t, v, i), set() ).add( o )
+			M.ProcessInputsByOutput.setdefault( (p, t, v, o), set() ).add( i )
+			M.processTechs.setdefault( t, set() ).add( (p, v) )
 			# While the dictionary just above indentifies the vintage (v)
 			# associated with each (p,t) we need to do the same below for various
 			# technology subsets.
-			if (p, t) not in M.processVintages:
-				M.processVintages[p, t] = set()
-			if t in M.tech_curtailment and (p, t) not in M.curtailmentVintages:
-				M.curtailmentVintages[p, t] = set()
-			if t in M.tech_baseload and (p, t) not in M.baseloadVintages:
-				M.baseloadVintages[p, t] = set()
-			if t in M.tech_storage and (p,t) not in M.storageVintages:
-				M.storageVintages[p,t] = set()
-			if t in M.tech_ramping and (p,t) not in M.rampVintages:
-				M.rampVintages[p,t] = set()
-			if (p, i, t) in M.TechInputSplit.sparse_iterkeys() and (p, i, t) not in M.inputsplitVintages:
-				M.inputsplitVintages[p,i,t] = set()
-			if (p, t, o) in M.TechOutputSplit.sparse_iterkeys() and (p, t, o) not in M.outputsplitVintages:
-				M.outputsplitVintages[p,t,o] = set()
-			if t in M.tech_resource and (p,o) not in M.ProcessByPeriodAndOutput:
-				M.ProcessByPeriodAndOutput[p,o] = set()
-			if t in M.tech_reserve and p not in M.processReservePeriods:
-					M.processReservePeriods[p] = set()
-
-			# Now that all of the keys have been defined, and values initialized
-			# to empty sets, we fill in the appropriate values for each
-			# dictionary.
-			M.processInputs[ pindex ].add( i )
-			M.processOutputs[pindex ].add( o )
-			M.commodityDStreamProcess[p, i].add( (t, v) )
-			M.commodityUStreamProcess[p, o].add( (t, v) )
-			M.ProcessOutputsByInput[p, t, v, i].add( o )
-			M.ProcessInputsByOutput[p, t, v, o].add( i )
-			M.processTechs[t].add( (p, v) )
-			M.processVintages[p, t].add( v )
-			if t in M.tech_curtailment:
-				M.curtailmentVintages[p, t].add( v )
-			if t in M.tech_baseload:
-				M.baseloadVintages[p, t].add( v )
-			if t in M.tech_storage:
-				M.storageVintages[p, t].add( v )
-			if t in M.tech_ramping:
-				M.rampVintages[p , t].add( v )
-			if (p, i, t) in M.TechInputSplit.sparse_iterkeys():
-				M.inputsplitVintages[p,i,t].add( v )
-			if (p, t, o) in M.TechOutputSplit.sparse_iterkeys():
-				M.outputsplitVintages[p,t,o].add( v )
-			if t in M.tech_resource:
-				M.ProcessByPeriodAndOutput[p,o].add(( i,t,v ))
-			if t in M.tech_reserve:
-				M.processReservePeriods[p].add( (t,v) )
-
+			M.processVintages.setdefault( (p, t), set() ).add( v )
+			if l_curtailment:
+				M.curtailmentVintages.setdefault( (p, t), set() ).add( v )
+			if l_baseload:
+				M.baseloadVintages.setdefault( (p, t), set() ).add( v )
+			if l_storage:
+				M.storageVintages.setdefault( (p, t), set() ).add( v )
+			if l_ramping:
+				M.rampVintages.setdefault( (p, t), set() ).add( v )
+			if (p, i, t) in l_inputsplit:
+				M.inputsplitVintages.setdefault( (p, i, t), set() ).add( v )
+			if (p, t, o) in l_outputsplit:
+				M.outputsplitVintages.setdefault( (p, t, o), set() ).add( v )
+			if l_resource:
+				M.ProcessByPeriodAndOutput.setdefault( (p, o), set() ).add( (i, t, v) )
+			if l_reserve:
+				M.processReservePeriods.setdefault( p, set() ).add( (t, v) )
+
+			l_flows.add( (p, i, t, v, o) )
+
+	l_process_dicts = time()
 
 	l_unused_techs = M.tech_all - l_used_techs
 	if l_unused_techs:
@@ -643,67 +662,43 @@ def CreateSparseDicts ( M ):
 	M.activeFlow_psditvo = set(
 	  (p, s, d, i, t, v, o)
 
-	  for p,t in M.processVintages.keys() if t not in M.tech_annual
-	  for v in M.processVintages[ p, t ]
-	  for i in M.processInputs[ p, t, v ]
-	  for o in M.ProcessOutputsByInput[ p, t, v, i ]
-	  for s in M.time_season
-	  for d in M.time_of_day
+	  for p, i, t, v, o in l_flows if t not in l_tech_annual
+	  for s, d in l_slices
 	)
 
 	M.activeFlow_pitvo = set(
 	  (p, i, t, v, o)
 
-	  for p,t in M.processVintages.keys() if t in M.tech_annual
-	  for v in M.processVintages[ p, t ]
-	  for i in M.processInputs[ p, t, v ]
-	  for o in M.ProcessOutputsByInput[ p, t, v, i ]
+	  for p, i, t, v, o in l_flows if t in l_tech_annual
 	)
 
 	M.activeFlowInStorage_psditvo = set(
 	  (p, s, d, i, t, v, o)
 
-	  for p,t in M.processVintages.keys() if t in M.tech_storage
-	  for v in M.processVintages[ p, t ]
-	  for i in M.processInputs[ p, t, v ]
-	  for o in M.ProcessOutputsByInput[ p, t, v, i ]
-	  for s in M.time_season
-	  for d in M.time_of_day
+	  for p, i, t, v, o in l_flows if t in l_tech_storage
+	  for s, d in l_slices
 	)
 
-
-
 	M.activeCurtailment_psditvo = set(
-	   (p, s, d, i, t, v, o)
+	  (p, s, d, i, t, v, o)
 
-	  for p,t in M.curtailmentVintages.keys()
-	  for v in M.curtailmentVintages[ p, t ]
-	  for i in M.processInputs[ p, t, v ]
-	  for o in M.ProcessOutputsByInput[ p, t, v, i ]
-	  for s in M.time_season
-	  for d in M.time_of_day
+	  for p, i, t, v, o in l_flows if t in l_tech_curtailment
+	  for s, d in l_slices
 	)
 
-	M.activeActivity_ptv = set(
-	  (p, t, v)
+	M.activeActivity_ptv = set( (p, t, v) for p, i, t, v, o in l_flows )
 
-	  for p,t in M.processVintages.keys()
-	  for v in M.processVintages[ p, t ]
-	)
+	M.activeCapacity_tv = set( (t, v) for p, t, v in M.activeActivity_ptv )
 
-	M.activeCapacity_tv = set(
-	  (t, v)
-
-	  for p,t in M.processVintages.keys()
-	  for v in M.processVintages[ p, t ]
-	)
+	M.activeCapacityAvailable_pt = set( (p, t) for p, t, v in M.activeActivity_ptv )
 
-	M.activeCapacityAvailable_pt = set(
-	  (p, t)
+	l_active_sets = time()
 
-	  for p,t in M.processVintages.keys()
-	  if M.processVintages[ p, t ]
-	)
+	M.sparseDictTimes = {
+	  'snapshot'             : l_snapshot - l_start,
+	  'process dictionaries' : l_process_dicts - l_snapshot,
+	  'active sets'          : l_active_sets - l_process_dicts,
+	}
 
 # ---------------------------------------------------------------
 # Create sparse parameter indices.
@@ -0,0 +1,423 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# ---------------------------------------------------------------
+# Direct construction of the Temoa constraint matrix.
+#
+# Temoa is a linear program. The time sliced constraint families (Capacity
+# and CommodityBalance) make up most of the rows, and Pyomo builds an
+# expression tree for each of them only to walk it again when the LP file is
+# written. matrix_model removes these families from the abstract model;
+# build_matrix then adds their rows directly from the sparse index sets and
+# the cached flow indices of temoa_rules, and reads the remaining constraints
+# and the objective from a single pass over their linear representation.
+#
+# The coefficients are computed with the same operations, in the same order,
+# as Pyomo does for the expressions of temoa_rules, so the matrix is identical
+# to the one written through Pyomo (see TemoaMatrix.coefficients).
+#
+#   model = matrix_model( temoa_create_model() )
+#   instance = model.create_instance( data )
+#   A = build_matrix( instance )
+#   A.write_lp( 'temoa.lp' )          # or A.write_mps( 'temoa.mps' )
+#   load_solution( instance, A, x )   # x - column values from the solver
+# ---------------------------------------------------------------
+
+from itertools import chain
+
+import numpy as np
+from pyomo.environ import Constraint, Objective, Var, value, maximize
+from pyomo.repn import generate_standard_repn
+
+from temoa_rules import CapacityFlows, CommodityBalanceFlows
+
+# Constraint families whose rows are built directly
+direct_constraints = ('CapacityConstraint', 'CommodityBalanceConstraint')
+
+
+class TemoaMatrix(object):
+    """
+    Linear program in coordinate (COO) form:
+
+        minimize (or maximize)   c x + c0
+        subject to               row_lower <= A x <= row_upper
+                                 col_lower <=  x  <= col_upper
+
+    Rows and columns are named by (component name, index). Infinite bounds
+    are stored as -inf and inf.
+    """
+
+    def __init__(self):
+        self.col_names = []
+        self.col_lower = []
+        self.col_upper = []
+        self.cols = dict()  # Var name -> { index: column }
+        self.row_names = []
+        self.row_lower = []
+        self.row_upper = []
+        self.A_row = []
+        self.A_col = []
+        self.A_val = []
+        self.objective = None
+        self.c = dict()  # column -> objective coefficient
+        self.c0 = 0.0
+        self.sense = 1  # 1 minimize, -1 maximize
+
+    def add_col(self, name, index, lower, upper):
+        j = len(self.col_names)
+        self.col_names.append((name, index))
+        self.col_lower.append(-np.inf if lower is None else lower)
+        self.col_upper.append(np.inf if upper is None else upper)
+        self.cols.setdefault(name, dict())[index] = j
+        return j
+
+    def add_row(self, name, index, lower, upper, cols, vals):
+        r = len(self.row_names)
+        self.row_names.append((name, index))
+        self.row_lower.append(-np.inf if lower is None else lower)
+        self.row_upper.append(np.inf if upper is None else upper)
+        self.A_row.extend([r] * len(cols))
+        self.A_col.extend(cols)
+        self.A_val.extend(vals)
+        return r
+
+    @property
+    def shape(self):
+        return len(self.row_names), len(self.col_names)
+
+    def coo(self):
+        """Row, column and value arrays of the nonzeros of A."""
+        return (np.asarray(self.A_row, dtype=np.int64), np.asarray(self.A_col, dtype=np.int64),
+                np.asarray(self.A_val, dtype=np.float64))
+
+    def csr(self):
+        """
+        CSR arrays (indptr, indices, data) of A. Repeated (row, column) entries
+        are summed in the order they were added.
+        """
+        return _compress(self.coo(), self.shape[0])
+
+    def csc(self):
+        """CSC arrays (indptr, indices, data) of A."""
+        rows, cols, vals = self.coo()
+        return _compress((cols, rows, vals), self.shape[1])
+
+    def objective_vector(self):
+        c = np.zeros(self.shape[1])
+        for j, coef in self.c.items():
+            c[j] = coef
+        return c
+
+    def coefficients(self):
+        """
+        Dictionary { (row name, column name): coefficient } of A, used to
+        compare two matrices independently of row and column order.
+        """
+        indptr, indices, data = self.csr()
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(indptr))
+        return dict(
+          ((self.row_names[r], self.col_names[j]), v)
+          for r, j, v in zip(rows.tolist(), indices.tolist(), data.tolist())
+        )
+
+    # ---------------------------------------------------------------
+    # Writers. Rows are named r<row> and columns x<column>, in the order of
+    # row_names and col_names.
+    # ---------------------------------------------------------------
+
+    def write_lp(self, filename):
+        """Write the matrix in CPLEX LP format."""
+        indptr, indices, data = self.csr()
+        terms = _terms(indices, data)
+        n_rows, n_cols = self.shape
+
+        with open(filename, 'w') as f:
+            f.write('\\* Temoa constraint matrix *\\\n\n')
+            f.write('minimize\n' if self.sense == 1 else 'maximize\n')
+            f.write('obj:\n')
+            objective = sorted(self.c.items())
+            f.writelines('%+.17g x%d\n' % (coef, j) for j, coef in objective)
+            if self.c0 != 0 or len(objective) == 0:
+                f.write('%+.17g ONE_VAR_CONSTANT\n' % self.c0)
+
+            f.write('\ns.t.\n\n')
+            lower = np.asarray(self.row_lower)
+            upper = np.asarray(self.row_upper)
+            for r in range(n_rows):
+                body = '\n'.join(terms[indptr[r]:indptr[r + 1]])
+                lo, up = lower[r], upper[r]
+                if lo == up:
+                    f.write('r%d:\n%s\n= %.17g\n\n' % (r, body, lo))
+                else:
+                    # ranged rows are written as two rows, as Pyomo does
+                    if lo > -np.inf:
+                        f.write('r%d_l:\n%s\n>= %.17g\n\n' % (r, body, lo))
+                    if up < np.inf:
+                        f.write('r%d_u:\n%s\n<= %.17g\n\n' % (r, body, up))
+
+            f.write('bounds\n')
+            if self.c0 != 0 or len(objective) == 0:
+                f.write(' 1 <= ONE_VAR_CONSTANT <= 1\n')
+            for j in range(n_cols):
+                f.write(_bound('x%d' % j, self.col_lower[j], self.col_upper[j]))
+            f.write('end\n')
+
+    def write_mps(self, filename):
+        """Write the matrix in free MPS format."""
+        indptr, indices, data = self.csc()
+        n_rows, n_cols = self.shape
+        lower = np.asarray(self.row_lower)
+        upper = np.asarray(self.row_upper)
+
+        with open(filename, 'w') as f:
+            f.write('NAME Temoa\n')
+            if self.sense == -1:
+                f.write('OBJSENSE\n    MAX\n')
+
+            f.write('ROWS\n N obj\n')
+            for r in range(n_rows):
+                if lower[r] == upper[r]:
+                    f.write(' E r%d\n' % r)
+                elif lower[r] > -np.inf:
+                    f.write(' G r%d\n' % r)
+                else:
+                    f.write(' L r%d\n' % r)
+
+            f.write('COLUMNS\n')
+            for j in range(n_cols):
+                if j in self.c:
+                    f.write(' x%d obj %.17g\n' % (j, self.c[j]))
+                f.writelines(
+                  ' x%d r%d %.17g\n' % (j, r, v)
+                  for r, v in zip(indices[indptr[j]:indptr[j + 1]].tolist(), data[indptr[j]:indptr[j + 1]].tolist())
+                )
+
+            f.write('RHS\n')
+            if self.c0 != 0:
+                # MPS stores the negative of the objective constant
+                f.write(' rhs obj %.17g\n' % -self.c0)
+            for r in range(n_rows):
+                rhs = lower[r] if lower[r] > -np.inf else upper[r]
+                if rhs != 0 and np.isfinite(rhs):
+                    f.write(' rhs r%d %.17g\n' % (r, rhs))
+
+            ranged = np.flatnonzero(np.isfinite(lower) & np.isfinite(upper) & (lower != upper))
+            if len(ranged) > 0:
+                f.write('RANGES\n')
+                for r in ranged:
+                    f.write(' rng r%d %.17g\n' % (r, upper[r] - lower[r]))
+
+            f.write('BOUNDS\n')
+            for j in range(n_cols):
+                lo, up = self.col_lower[j], self.col_upper[j]
+                if lo == up:
+                    f.write(' FX bnd x%d %.17g\n' % (j, lo))
+                    continue
+                if lo == -np.inf and up == np.inf:
+                    f.write(' FR bnd x%d\n' % j)
+                    continue
+                if lo == -np.inf:
+                    f.write(' MI bnd x%d\n' % j)
+                elif lo != 0:
+                    f.write(' LO bnd x%d %.17g\n' % (j, lo))
+                if up < np.inf:
+                    f.write(' UP bnd x%d %.17g\n' % (j, up))
+            f.write('ENDATA\n')
+
+
+def _compress(coo, n):
+    # Sort the entries by major index, keeping the insertion order of each
+    # major index, and sum repeated (major, minor) entries.
+    major, minor, vals = coo
+    order = np.lexsort((minor, major))
+    major, minor, vals = major[order], minor[order], vals[order]
+    if len(major) > 0:
+        first = np.ones(len(major), dtype=bool)
+        first[1:] = (major[1:] != major[:-1]) | (minor[1:] != minor[:-1])
+        if not first.all():
+            start = np.flatnonzero(first)
+            major, minor, vals = major[start], minor[start], np.add.reduceat(vals, start)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(major, minlength=n), out=indptr[1:])
+    return indptr, minor, vals
+
+def _terms(indices, data):
+    # '+coef x<col>' of every nonzero, formatted once for the whole matrix
+    return ['%+.17g x%d' % term for term in zip(data.tolist(), indices.tolist())]
+
+def _bound(name, lo, up):
+    if lo == -np.inf and up == np.inf:
+        return ' %s free\n' % name
+    return ' %s <= %s <= %s\n' % (
+      '-inf' if lo == -np.inf else '%.17g' % lo, name, '+inf' if up == np.inf else '%.17g' % up)
+
+
+# ---------------------------------------------------------------
+# Model and matrix construction
+# ---------------------------------------------------------------
+
+def matrix_model(model, direct=direct_constraints):
+    """
+    Copy of the abstract Temoa model without the constraint families in
+    direct, whose rows are added by build_matrix.
+    """
+    model = model.clone()
+    for name in direct:
+        model.del_component(name)
+    return model
+
+def build_matrix(instance, direct=direct_constraints):
+    """
+    Constraint matrix of a Temoa instance. Constraints in direct must have
+    been removed from the model (see matrix_model); all other active
+    constraints and the objective are read from their linear representation.
+    """
+    A = TemoaMatrix()
+
+    # Columns, in the order of the Var components and their indices
+    col_of_var = dict()
+    for var in instance.component_objects(Var, active=True):
+        name = var.name
+        for index, vd in var.items():
+            if vd.fixed:
+                lower = upper = value(vd)
+            else:
+                lower, upper = vd.lb, vd.ub
+            col_of_var[id(vd)] = A.add_col(name, index, lower, upper)
+
+    # Rows of the constraints built with Pyomo
+    for con in instance.component_objects(Constraint, active=True):
+        name = con.name
+        if name in direct:
+            raise ValueError('Constraint "{}" is built directly, remove it from the '
+                             'model with matrix_model'.format(name))
+        for index, cd in con.items():
+            if not cd.active:
+                continue
+            repn = _linear_repn(cd.body, name, index)
+            lower = value(cd.lower) - repn.constant if cd.has_lb() else None
+            upper = value(cd.upper) - repn.constant if cd.has_ub() else None
+            A.add_row(name, index, lower, upper,
+                      [col_of_var[id(vd)] for vd in repn.linear_vars], list(repn.linear_coefs))
+
+    # Rows of the constraints built directly
+    for name in direct:
+        direct_rows[name](instance, A)
+
+    # Objective
+    objectives = list(instance.component_data_objects(Objective, active=True))
+    if len(objectives) != 1:
+        raise ValueError('Expected a single active objective, found {}'.format(len(objectives)))
+    obj = objectives[0]
+    repn = _linear_repn(obj.expr, obj.name, None)
+    A.objective = obj.name
+    A.sense = -1 if obj.sense == maximize else 1
+    A.c0 = repn.constant
+    for vd, coef in zip(repn.linear_vars, repn.linear_coefs):
+        j = col_of_var[id(vd)]
+        A.c[j] = A.c.get(j, 0) + coef
+
+    return A
+
+def _linear_repn(expr, name, index):
+    repn = generate_standard_repn(expr, compute_values=True)
+    if not repn.is_linear():
+        raise ValueError('"{}" {} is not linear'.format(name, index))
+    return repn
+
+def load_solution(instance, A, x):
+    """Set the Var values of instance from the column values x of A."""
+    for (name, index), val in zip(A.col_names, x):
+        instance.find_component(name)[index].set_value(float(val), skip_validation=True)
+
+
+# ---------------------------------------------------------------
+# Rows of the constraints built directly, same rows, variables and
+# coefficients as the rules of the same name in temoa_rules
+# ---------------------------------------------------------------
+
+def CapacityRows(M, A):
+    flow_out = A.cols['V_FlowOut']
+    curtailment = A.cols.get('V_Curtailment', dict())
+    capacity = A.cols['V_Capacity']
+    for p, s, d, t, v in M.CapacityConstraint_psdtv:
+        if t in M.tech_storage:
+            continue
+
+        C2A, PLF, curtail, flows = CapacityFlows(M, p, t, v)
+        coef = value(M.CapacityFactorProcess[s, d, t, v]) * C2A * value(M.SegFrac[s, d]) * PLF
+        cols = [flow_out[p, s, d, S_i, t, v, S_o] for S_i, S_o in flows]
+
+        if coef == 0:
+            # Pyomo drops the capacity term of time slices with no capacity factor
+            capacity_col, capacity_val = [], []
+        else:
+            capacity_col, capacity_val = [capacity[t, v]], [coef]
+
+        if curtail:
+            # capacity == activity + curtailment
+            cols += [curtailment[p, s, d, S_i, t, v, S_o] for S_i, S_o in flows]
+            A.add_row('CapacityConstraint', (p, s, d, t, v), 0.0, 0.0,
+                      capacity_col + cols, capacity_val + [-1] * len(cols))
+        else:
+            # activity - capacity <= 0
+            A.add_row('CapacityConstraint', (p, s, d, t, v), None, 0.0,
+                      cols + capacity_col, [1] * len(cols) + [-val for val in capacity_val])
+
+def CommodityBalanceRows(M, A):
+    flow_out = A.cols['V_FlowOut']
+    flow_in = A.cols.get('V_FlowIn', dict())
+    flow_out_annual = A.cols.get('V_FlowOutAnnual', dict())
+    for p, s, d, c in M.CommodityBalanceConstraint_psdc:
+        if c in M.commodity_demand:
+            continue
+
+        to_storage, to_nonstorage, to_annual, out = CommodityBalanceFlows(M, p, c)
+        if len(out) == 0:
+            raise Exception("Unable to meet an interprocess '{}' transfer in ({}, {}, {}).\n"
+                            'No flow out.'.format(c, s, d, p))
+        try:
+            cols_out = [flow_out[p, s, d, S_i, S_t, S_v, c] for S_i, S_t, S_v in out]
+        except KeyError:
+            raise Exception('The commodity "' + str(c) + '" can be produced by at least one technology '
+                            'in the tech_annual set and one technology not in the tech_annual set. All '
+                            'the producers of the commodity must either be in tech_annual or not in tech_annual')
+
+        # production - consumption == 0
+        seg = value(M.SegFrac[s, d])
+        cols = list(chain(
+          cols_out,
+          (flow_in[p, s, d, c, S_t, S_v, S_o] for S_t, S_v, S_o in to_storage),
+          (flow_out[p, s, d, c, S_t, S_v, S_o] for S_t, S_v, S_o, eff in to_nonstorage),
+          (flow_out_annual[p, c, S_t, S_v, S_o] for S_t, S_v, S_o, eff in to_annual),
+        ))
+        vals = list(chain(
+          [1] * len(cols_out),
+          [-1] * len(to_storage),
+          (-(1 / eff) for S_t, S_v, S_o, eff in to_nonstorage),
+          (-(seg * (1 / eff)) for S_t, S_v, S_o, eff in to_annual),
+        ))
+        A.add_row('CommodityBalanceConstraint', (p, s, d, c), 0.0, 0.0, cols, vals)
+
+direct_rows = {
+  'CapacityConstraint': CapacityRows,
+  'CommodityBalanceConstraint': CommodityBalanceRows,
+}
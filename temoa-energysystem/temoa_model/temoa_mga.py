@@ -19,8 +19,10 @@ in LICENSE.txt.  Users uncompressing this from an archive may not have
 received this license file.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+from random import Random
+
 from pyomo.environ import *
-from temoa_rules import TotalCost_rule
+from temoa_rules import TotalCost_rule, ActivityByTech_Constraint
 
 def ActivityObj_rule ( M, prev_act_t ):
 	new_act = 0
@@ -80,4 +82,75 @@ def PreviousAct_rule ( instance, mga_weight, prev_activity_t ):
 					val = value( instance.V_ActivityByTech[t] )
 					if abs(val) < epsilon: continue
 					prev_activity_t[ t ] += val / act[s]
-				return prev_activity_t
\ No newline at end of file
+				return prev_activity_t
+
+# ---------------------------------------------------------------
+# Parallel MGA (see TemoaSolver.solveWithParallelMGA).
+# The components below are added once to a solved instance, the alternatives
+# only change the values of the mutable MGAWeight parameter, so one instance
+# solves every alternative.
+# ---------------------------------------------------------------
+
+def MGAObjective_rule ( M ):
+	return sum( M.MGAWeight[t] * M.V_ActivityByTech[t] for t in M.V_ActivityByTech )
+
+def MGACostLimit_rule ( M ):
+	return (1 + M.MGASlack) * M.MGACost >= TotalCost_rule( M )
+
+def AddMGAComponents ( M, mga_slack ):
+	"""
+	Add the total activity of each technology, the weighted activity objective
+	of the alternatives (SecondObj, deactivated) and the slacked cost limit
+	(PreviousSlackedObjective, deactivated until MGACost is set) to instance M.
+	"""
+	M.V_ActivityByTech = Var( M.tech_all, domain=NonNegativeReals )
+	M.ActivityByTechConstraint = Constraint( M.tech_all, rule=ActivityByTech_Constraint )
+	for t in M.tech_all:
+		if t not in M.ActivityByTechConstraint:
+			M.V_ActivityByTech[t].fix( 0 ) # no flows
+	M.MGAWeight = Param( M.tech_all, default=0, mutable=True )
+	M.MGASlack = Param( default=mga_slack, mutable=True )
+	M.MGACost = Param( default=0, mutable=True )
+	M.SecondObj = Objective( rule=MGAObjective_rule, sense=minimize )
+	M.SecondObj.deactivate()
+	M.PreviousSlackedObjective = Constraint( rule=MGACostLimit_rule )
+	M.PreviousSlackedObjective.deactivate()
+
+def SetMGAObjective ( M, cost ):
+	"""Switch instance M from total cost to the MGA objective, limited to the slacked cost."""
+	M.MGACost = cost
+	M.PreviousSlackedObjective.activate()
+	M.SecondObj.activate()
+	for obj in M.component_objects( Objective, active=True ):
+		if obj is not M.SecondObj:
+			obj.deactivate()
+
+def RandomWeights ( instance, base_activity, seed ):
+	"""
+	Weights of a random direction, uniform in [-1, 1] for each technology of
+	tech_mga (all technologies if empty). Each weight is divided by the activity
+	of the technology in the base solution (the mean activity when it is not
+	used) so that technologies tracked in different units weigh alike.
+	Alternatives with different seeds are independent of each other.
+	"""
+	rand = Random( seed )
+	techs = sorted( instance.tech_mga ) if len( instance.tech_mga ) > 0 else sorted( instance.tech_all )
+	used = [ a for a in base_activity.values() if a > 1e-6 ]
+	mean = sum( used ) / len( used ) if used else 1.0
+	weights = dict()
+	for t in techs:
+		activity = base_activity.get( t, 0 )
+		weights[ t ] = rand.uniform( -1, 1 ) / ( activity if activity > 1e-6 else mean )
+	return weights
+
+def PerturbedWeights ( prev_act_t, seed=None ):
+	"""
+	Weights of one alternative of a round of alternatives sharing the weights
+	prev_act_t (integer or normalized): without a seed they are kept, with a
+	seed (the number of the alternative) each weight is scaled by a random
+	factor in [0.5, 1.5] so the round explores several directions.
+	"""
+	if seed is None:
+		return dict( prev_act_t )
+	rand = Random( seed )
+	return dict( (t, w * rand.uniform( 0.5, 1.5 )) for t, w in sorted( prev_act_t.items() ))
@@ -164,7 +164,7 @@ def temoa_create_model(name="Temoa"):
     M.CostFixedVintageDefault = Param(M.CostFixedVintageDefault_tv)
 
     M.CostInvest_tv = Set(dimen=2, initialize=CostInvestIndices)
-    M.CostInvest = Param(M.CostInvest_tv)
+    M.CostInvest = Param(M.CostInvest_tv, mutable=True)
 
     M.CostVariable_ptv = Set(dimen=3, initialize=CostVariableIndices)
     M.CostVariable = Param(M.CostVariable_ptv, mutable=True)
@@ -198,8 +198,8 @@ def temoa_create_model(name="Temoa"):
     )
 
     # Define parameters associated with user-defined constraints
-    M.MinCapacity = Param(M.time_optimize, M.tech_all)
-    M.MaxCapacity = Param(M.time_optimize, M.tech_all)
+    M.MinCapacity = Param(M.time_optimize, M.tech_all, mutable=True)
+    M.MaxCapacity = Param(M.time_optimize, M.tech_all, mutable=True)
     M.MinCapacitySum = Param(M.time_optimize)  # for techs in tech_capacity
     M.MaxCapacitySum = Param(M.time_optimize)  # for techs in tech_capacity
     M.MaxActivity = Param(M.time_optimize, M.tech_all)
@@ -24,6 +24,92 @@ received this license file.  If not, see <http://www.gnu.org/licenses/>.
 from __future__ import division
 
 from temoa_initialize import *
+# ---------------------------------------------------------------
+# Flow index tables used to assemble constraints.
+# The sums in the Capacity, Demand, CommodityBalance and ReserveMargin
+# constraints run over the same processes for every time slice (s, d).
+# Each table below is computed once per constraint and (p, ...) index,
+# stored in M.flowIndexCache, and reused for every time slice.
+# ---------------------------------------------------------------
+
+def CapacityFlows(M, p, t, v):
+    """
+    Capacity to activity, process life fraction, curtailment membership and
+    (i, o) pairs of the flows of process (t, v) in period p.
+    """
+    key = ('Capacity', p, t, v)
+    if key not in M.flowIndexCache:
+        flows = [
+          (S_i, S_o)
+          for S_i in M.processInputs[p, t, v]
+          for S_o in M.ProcessOutputsByInput[p, t, v, S_i]
+        ]
+        M.flowIndexCache[key] = (value(M.CapacityToActivity[t]), value(M.ProcessLifeFrac[p, t, v]),
+                                 t in M.tech_curtailment, flows)
+    return M.flowIndexCache[key]
+
+def DemandFlows(M, p, dem):
+    """(i, t, v) of the time slice and annual flows that produce demand dem in period p."""
+    key = ('Demand', p, dem)
+    if key not in M.flowIndexCache:
+        supply = []
+        supply_annual = []
+        for S_t, S_v in M.commodityUStreamProcess[p, dem]:
+            terms = supply_annual if S_t in M.tech_annual else supply
+            for S_i in M.ProcessInputsByOutput[p, S_t, S_v, dem]:
+                terms.append((S_i, S_t, S_v))
+        M.flowIndexCache[key] = (supply, supply_annual)
+    return M.flowIndexCache[key]
+
+def CommodityBalanceFlows(M, p, c):
+    """
+    Flows into storage (t, v, o), into non-storage processes (t, v, o, efficiency),
+    into annual processes (t, v, o, efficiency) and out of processes (i, t, v) of
+    commodity c in period p.
+    """
+    key = ('CommodityBalance', p, c)
+    if key not in M.flowIndexCache:
+        to_storage = []
+        to_nonstorage = []
+        to_annual = []
+        for S_t, S_v in M.commodityDStreamProcess[p, c]:
+            for S_o in M.ProcessOutputsByInput[p, S_t, S_v, c]:
+                if S_t in M.tech_storage:
+                    to_storage.append((S_t, S_v, S_o))
+                elif S_t in M.tech_annual:
+                    to_annual.append((S_t, S_v, S_o, value(M.Efficiency[c, S_t, S_v, S_o])))
+                else:
+                    to_nonstorage.append((S_t, S_v, S_o, value(M.Efficiency[c, S_t, S_v, S_o])))
+        out = [
+          (S_i, S_t, S_v)
+          for S_t, S_v in M.commodityUStreamProcess[p, c]
+          for S_i in M.ProcessInputsByOutput[p, S_t, S_v, c]
+        ]
+        M.flowIndexCache[key] = (to_storage, to_nonstorage, to_annual, out)
+    return M.flowIndexCache[key]
+
+def ReserveMarginFlows(M, p):
+    """
+    Reserve technologies with available capacity (t, capacity credit, capacity to activity)
+    and (i, t, v, o) of their flows in period p.
+    """
+    key = ('ReserveMargin', p)
+    if key not in M.flowIndexCache:
+        capacity = [
+          (t, value(M.CapacityCredit[p, t]), value(M.CapacityToActivity[t]))
+          for t in M.tech_reserve
+          # Make sure (p,t) combinations are defined
+          if (p,t) in M.activeCapacityAvailable_pt
+        ]
+        generation = [
+          (S_i, t, S_v, S_o)
+          for (t,S_v) in M.processReservePeriods[p]
+          for S_i in M.processInputs[p, t, S_v]
+          for S_o in M.ProcessOutputsByInput[p, t, S_v, S_i]
+        ]
+        M.flowIndexCache[key] = (capacity, generation)
+    return M.flowIndexCache[key]
+
 # ---------------------------------------------------------------
 # Define the derived variables used in the objective function
 # and constraints below.
@@ -68,27 +154,27 @@ possibility.
     # The expressions below are defined in-line to minimize the amount of
     # expression cloning taking place with Pyomo.
     
+    C2A, PLF, curtailment, flows = CapacityFlows(M, p, t, v)
+
     useful_activity = sum( 
     M.V_FlowOut[p, s, d, S_i, t, v, S_o] 
-    for S_i in M.processInputs[p, t, v] 
-    for S_o in M.ProcessOutputsByInput[p, t, v, S_i]
+    for S_i, S_o in flows
     )
 
-    if t in M.tech_curtailment:
+    if curtailment:
         # If technologies are present in the curtailment set, then enough
         # capacity must be available to cover both activity and curtailment.
         return value(M.CapacityFactorProcess[s, d, t, v]) \
-            * value(M.CapacityToActivity[t]) * value(M.SegFrac[s, d]) \
-            * value(M.ProcessLifeFrac[p, t, v]) \
+            * C2A * value(M.SegFrac[s, d]) \
+            * PLF \
             * M.V_Capacity[t, v] == useful_activity + sum( \
             M.V_Curtailment[p, s, d, S_i, t, v, S_o] \
-            for S_i in M.processInputs[p, t, v] \
-            for S_o in M.ProcessOutputsByInput[p, t, v, S_i])
+            for S_i, S_o in flows)
     else:
         return value(M.CapacityFactorProcess[s, d, t, v]) \
-        * value(M.CapacityToActivity[t]) \
+        * C2A \
         * value(M.SegFrac[s, d]) \
-        * value(M.ProcessLifeFrac[p, t, v]) \
+        * PLF \
         * M.V_Capacity[t, v] >= useful_activity
 
 def CapacityAnnual_Constraint(M, p, t, v):
@@ -456,16 +542,16 @@ could satisfy both an end-use and internal system demand, then the output from
     if (s,d,dem) not in M.DemandSpecificDistribution.sparse_keys():
         return Constraint.Skip
 
+    flows, flows_annual = DemandFlows(M, p, dem)
+
     supply = sum(
         M.V_FlowOut[p, s, d, S_i, S_t, S_v, dem]
-        for S_t, S_v in M.commodityUStreamProcess[p, dem] if S_t not in M.tech_annual
-        for S_i in M.ProcessInputsByOutput[p, S_t, S_v, dem]
+        for S_i, S_t, S_v in flows
     )
 
     supply_annual = sum(
         M.V_FlowOutAnnual[p, S_i, S_t, S_v, dem]
-        for S_t, S_v in M.commodityUStreamProcess[p, dem] if S_t in M.tech_annual
-        for S_i in M.ProcessInputsByOutput[p, S_t, S_v, dem]
+        for S_i, S_t, S_v in flows_annual
     ) * value( M.SegFrac[ s, d])
 
     DemandConstraintErrorCheck(supply + supply_annual, p, s, d, dem)
@@ -572,29 +658,27 @@ reduces computational burden.
     if c in M.commodity_demand:
         return Constraint.Skip
 
+    to_storage, to_nonstorage, to_annual, out = CommodityBalanceFlows(M, p, c)
+
     vflow_in_ToStorage = sum(
         M.V_FlowIn[p, s, d, c, S_t, S_v, S_o]
-        for S_t, S_v in M.commodityDStreamProcess[p, c] if S_t in M.tech_storage
-        for S_o in M.ProcessOutputsByInput[p, S_t, S_v, c]
+        for S_t, S_v, S_o in to_storage
     )
 
     vflow_in_ToNonStorage = sum(
-        M.V_FlowOut[p, s, d, c, S_t, S_v, S_o] / value(M.Efficiency[c, S_t, S_v, S_o])
-        for S_t, S_v in M.commodityDStreamProcess[p, c] if S_t not in M.tech_storage and S_t not in M.tech_annual
-        for S_o in M.ProcessOutputsByInput[p, S_t, S_v, c]
+        M.V_FlowOut[p, s, d, c, S_t, S_v, S_o] / eff
+        for S_t, S_v, S_o, eff in to_nonstorage
     )
 
     vflow_in_ToNonStorageAnnual = value(M.SegFrac[s, d]) * sum(
-        M.V_FlowOutAnnual[p, c, S_t, S_v, S_o] / value(M.Efficiency[c, S_t, S_v, S_o])
-        for S_t, S_v in M.commodityDStreamProcess[p, c] if S_t not in M.tech_storage and S_t in M.tech_annual
-        for S_o in M.ProcessOutputsByInput[p, S_t, S_v, c]
+        M.V_FlowOutAnnual[p, c, S_t, S_v, S_o] / eff
+        for S_t, S_v, S_o, eff in to_annual
     )
 
     try:
       vflow_out = sum(
           M.V_FlowOut[p, s, d, S_i, S_t, S_v, c]
-          for S_t, S_v in M.commodityUStreamProcess[p, c]
-          for S_i in M.ProcessInputsByOutput[p, S_t, S_v, c]
+          for S_i, S_t, S_v in out
       )
     except:
       raise Exception('The commodity "'+str(c)+'" can be produced \
@@ -1389,23 +1473,21 @@ we write this equation for all the time-slices defined in the database in each r
     if not M.tech_reserve:  # If reserve set empty, skip the constraint
         return Constraint.Skip
 
+    capacity, generation = ReserveMarginFlows(M, p)
+
     cap_avail = sum(
-        value(M.CapacityCredit[p, t])
+        CC
         * M.V_CapacityAvailableByPeriodAndTech[p, t]
-        * value(M.CapacityToActivity[t])
+        * C2A
         * value(M.SegFrac[s, d])
-        for t in M.tech_reserve
-        # Make sure (p,t) combinations are defined
-        if (p,t) in M.activeCapacityAvailable_pt
+        for t, CC, C2A in capacity
     )
 
     # In most Temoa input databases, demand is endogenous, so we use electricity
     # generation instead.
     total_generation = sum(
         M.V_FlowOut[p, s, d, S_i, t, S_v, S_o] 
-        for (t,S_v) in M.processReservePeriods[p] 
-        for S_i in M.processInputs[p, t, S_v] 
-        for S_o in M.ProcessOutputsByInput[p, t, S_v, S_i] 
+        for S_i, t, S_v, S_o in generation
     )
 
     cap_target = total_generation * (1 + value(M.PlanningReserveMargin))
@@ -28,7 +28,7 @@ from pyomo.opt import SolverFactory as SF
 from pyomo.opt import SolverManagerFactory
 from pyomo.environ import *
 
-from temoa_config import TemoaConfig
+from temoa_config import TemoaConfig, db_2_data, db_extensions
 
 import errno, warnings
 import re as reg_exp
@@ -47,11 +47,12 @@ import sys, os, gc
 
 from pyomo.environ import DataPortal
 
-from pformat_results import pformat_results
+from pformat_results import pformat_results, merge_results
 
 from collections import defaultdict
 from temoa_rules import TotalCost_rule, ActivityByTech_Constraint
 from temoa_mga   import ActivityObj_rule, SlackedObjective_rule, PreviousAct_rule
+from temoa_mga   import AddMGAComponents, SetMGAObjective, RandomWeights, PerturbedWeights
 import traceback
 
 
@@ -219,6 +220,95 @@ class TemoaSolver(object):
 			prev_activity_t = PreviousAct_rule( temoaMGAInstance.instance, self.options.mga_weight, prev_activity_t )
 
 
+	'''
+	This function is called when MGA option is specified with parallel processes
+	or random weights. The base solve is done here, the alternatives are solved
+	by a pool of processes that each build the instance once (mga_worker_init)
+	and re-solve it with the weights of each alternative (mga_worker_solve).
+	Each alternative writes its results to a file of its own, merged into the
+	output database under its scenario name as the alternatives complete.
+	'''
+	def solveWithParallelMGA(self):
+		from multiprocessing import Pool
+
+		processes = self.options.mga_parallel or 1
+		random_weights = self.options.mga_weight == 'random'
+
+		# Base solve, minimizing total cost
+		temoaInstance1 = TemoaSolverInstance(self.model, self.optimizer, self.options, self.txt_file)
+		for k in temoaInstance1.create_temoa_instance():
+			yield k
+		AddMGAComponents( temoaInstance1.instance, self.options.mga )
+		for k in temoaInstance1.solve_temoa_instance():
+			yield k
+		temoaInstance1.handle_files(log_name='Complete_OutputLog.log' )
+
+		M = temoaInstance1.instance
+		Perfect_Foresight_Obj = value( M.TotalCost )
+		base_activity = dict( (t, value( M.V_ActivityByTech[t] )) for t in M.ActivityByTechConstraint )
+
+		scenarios = []
+		while self.options.next_mga():
+			scenarios.append( self.options.scenario )
+
+		# Random weights do not depend on previous alternatives, all are solved
+		# at once. Other weights are updated after each round of alternatives.
+		prev_activity_t = defaultdict( int )
+		if random_weights:
+			rounds = [ scenarios ]
+		else:
+			prev_activity_t = PreviousAct_rule( M, self.options.mga_weight, prev_activity_t )
+			rounds = [ scenarios[i:i + processes] for i in range(0, len(scenarios), processes) ]
+
+		# Without an output database (.dat input, no --output) the alternatives are solved but not stored
+		if not self.options.output:
+			msg = 'No Output File specified, the MGA alternatives are not stored.\n'
+			yield msg
+			SE.write( msg )
+			self.txt_file.write( msg )
+
+		last_output = None  # results of the last alternative, merged after all others
+		pool = Pool( processes, mga_worker_init, (self.options.file_location, self.options.solver, Perfect_Foresight_Obj) )
+		try:
+			for names in rounds:
+				tasks = []
+				for j, scenario in enumerate( names ):
+					if random_weights:
+						weights = RandomWeights( M, base_activity, scenarios.index( scenario ))
+					else:
+						# the first alternative of each round keeps the weights of the round
+						weights = PerturbedWeights( prev_activity_t, scenarios.index( scenario ) if j > 0 else None )
+					tasks.append( (scenario, weights) )
+
+				activities = []
+				for scenario, status, run_output, activity in pool.imap_unordered( mga_worker_solve, tasks ):
+					if run_output is not None:
+						if last_output is not None:
+							merge_results( last_output, self.options.output )
+							os.remove( last_output )
+						last_output = run_output
+					msg = 'MGA alternative {}: {}\n'.format( scenario, status )
+					yield msg
+					SE.write( msg )
+					self.txt_file.write( msg )
+					activities.append( activity )
+
+				# Update the weights with the activities of this round
+				if not random_weights:
+					for activity in activities:
+						for t, val in activity.items():
+							M.V_ActivityByTech[t].set_value( val )
+						prev_activity_t = PreviousAct_rule( M, self.options.mga_weight, prev_activity_t )
+
+			# The output database is vacuumed once, with the results of the last alternative
+			if last_output is not None:
+				merge_results( last_output, self.options.output, vacuum=self.options.vacuum )
+				os.remove( last_output )
+		finally:
+			pool.terminate()
+			pool.join()
+
+
 	'''
 	This function is called when MGA option is not specified.
 	'''
@@ -250,7 +340,11 @@ class TemoaSolver(object):
 
 		# Check and see if mga attribute exists and if mga is specified
 		try:
-			if hasattr(self.options, 'mga') and self.options.mga:
+			if hasattr(self.options, 'mga') and self.options.mga and \
+			  (self.options.mga_parallel or self.options.mga_weight == 'random'):
+				for k in self.solveWithParallelMGA():
+					yield k
+			elif hasattr(self.options, 'mga') and self.options.mga:
 				for k in self.solveWithMGA():
 					#yield "<div>" + k + "</div>"
 					yield k
@@ -288,6 +382,59 @@ class TemoaSolver(object):
 
 
 
+'''
+Worker processes of TemoaSolver.solveWithParallelMGA. Each process builds the
+instance once, switched to the MGA objective limited to the slacked cost of
+the base solve, and solves the alternatives it is given by changing the
+objective weights.
+'''
+mga_worker = dict()
+
+def mga_worker_init ( config_filename, solver, cost ):
+	from temoa_model import temoa_create_model
+
+	options = TemoaConfig( d_solver=solver )
+	options.build( config=config_filename )
+	# Spreadsheets and logs are written from the output database, once merged
+	options.saveEXCEL = options.saveTEXTFILE = options.keepPyomoLP = False
+
+	txt_file = open( os.devnull, 'w' )
+	temoaInstance = TemoaSolverInstance( temoa_create_model(), SolverFactory( options.solver ), options, txt_file )
+	for k in temoaInstance.create_temoa_instance():
+		pass
+	AddMGAComponents( temoaInstance.instance, options.mga )
+	SetMGAObjective( temoaInstance.instance, cost )
+
+	mga_worker['options'] = options
+	mga_worker['instance'] = temoaInstance.instance
+	mga_worker['optimizer'] = temoaInstance.optimizer
+
+def mga_worker_solve ( task ):
+	"""Solve the alternative (scenario name, {tech: weight}) and write its results to a file of its own."""
+	scenario, weights = task
+	options = mga_worker['options']
+	M = mga_worker['instance']
+
+	for t in M.tech_all:
+		M.MGAWeight[t] = weights.get( t, 0 )
+	M.solutions.clear()
+	result = mga_worker['optimizer'].solve( M )
+	status = str( result.solver.termination_condition )
+
+	run_output = None
+	activity = dict()
+	if status == 'optimal':
+		if options.output:
+			M.solutions.store_to( result )
+			options.scenario = scenario
+			options.run_output = path.splitext( options.output )[0] + '_' + scenario + '.sqlite'
+			pformat_results( M, result, options )
+			run_output = options.run_output
+		activity = dict( (t, value( M.V_ActivityByTech[t] )) for t in M.ActivityByTechConstraint )
+
+	return scenario, status, run_output, activity
+
+
 '''
 This class is for creating one temoa solver instance. It is used by TemoaSolver.
 (Multiple instances are created for MGA/non-MGA options).
@@ -314,12 +461,28 @@ class TemoaSolverInstance(object):
 			begin = time()
 			duration = lambda: time() - begin
 
+			# Data and index sets of a previous run on the same input files
+			cache = entry = None
+			if getattr( self.options, 'cache', None ):
+				# imported only when caching is enabled
+				from temoa_cache import TemoaCache, input_key, cache_entry, cached_instance
+				cache = TemoaCache( self.options.cache, self.options.cache_size )
+				cache_key = input_key( self.options.dot_dat, self.options )
+				entry = cache.load( cache_key )
+
 			modeldata = DataPortal( model=self.model )
 			# Recreate the pyomo command's ability to specify multiple "dot dat" files
 			# on the command lin			
 			for fname in self.options.dot_dat:
+				if entry is not None:
+					break
+				if path.splitext( fname )[1] in db_extensions:
+					# Input databases are read straight into the DataPortal
+					for name, data in db_2_data( fname, self.options ).items():
+						modeldata[ name ] = data
+					continue
 				if fname[-4:] != '.dat':
-					msg = "InputError: expecting a dot dat (e.g., data.dat) file, found '{}'\n"
+					msg = "InputError: expecting a dot dat (e.g., data.dat) or database file, found '{}'\n"
 					raise Exception( msg.format( fname ))
 				modeldata.load( filename=fname )
 			yield '\t\t\t\t\t[%8.2f]\n' % duration()
@@ -330,7 +493,12 @@ class TemoaSolverInstance(object):
 			SE.write( '[        ] Creating Temoa model instance.'); SE.flush()
 			self.txt_file.write( 'Creating Temoa model instance.')
 			
-			self.instance = self.model.create_instance( modeldata )
+			if entry is not None:
+				self.instance = cached_instance( self.model, entry )
+			else:
+				self.instance = self.model.create_instance( modeldata )
+				if cache is not None:
+					cache.store( cache_key, cache_entry( self.instance, modeldata.data() ))
 			yield '\t\t\t\t[%8.2f]\n' % duration()
 			SE.write( '\r[%8.2f]\n' % duration() )
 			self.txt_file.write( '[%8.2f]\n' % duration() )
@@ -0,0 +1,249 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# ---------------------------------------------------------------
+# Parameter sweeps on a single Temoa instance.
+#
+# Sensitivity and Monte Carlo cases that only change costs or capacity limits
+# do not need a new instance. TemoaSweep builds the instance once and, for
+# each case, sets the changed parameter values, rebuilds only the components
+# that use them (the objective, or the rows of the capacity constraints with
+# the changed indices) and re-solves. With a persistent solver only these
+# rows and the objective are sent to the solver, which keeps the model and
+# starts from the basis of the previous solve. The persistent interfaces of
+# Pyomo 5.5 are gurobi_persistent and cplex_persistent, the APPSI solvers
+# (appsi_highs, appsi_gurobi, ...) need Pyomo 6.
+#
+#   sweep = TemoaSweep( temoa_create_model(), data, solver='gurobi_persistent' )
+#   cases = [ {'CostInvest': scale( sweep.instance, 'CostInvest', m, 'E_NGCC' )}
+#             for m in (0.8, 0.9, 1.1, 1.2) ]
+#   for i, objective, termination in sweep.sweep( cases ):
+#       ...
+#
+# The objective of a case without an optimal solution (e.g. infeasible) is
+# None, its termination condition tells why.
+#
+# Variables can also be fixed between solves (sweep.fix), e.g. to evaluate
+# the first stage decisions of one case under the data of the others.
+# ---------------------------------------------------------------
+
+from time import time
+
+from pyomo.environ import SolverFactory, value
+from pyomo.opt import TerminationCondition
+
+from temoa_rules import TotalCost_rule, MaxCapacity_Constraint, MinCapacity_Constraint
+
+# Parameters a case can change, and the components built from them.
+# Constraints are indexed like their parameter, only the rows of the changed
+# indices are rebuilt.
+sweep_params = {
+    'CostInvest': ('TotalCost',),
+    'CostFixed': ('TotalCost',),
+    'CostVariable': ('TotalCost',),
+    'MaxCapacity': ('MaxCapacityConstraint',),
+    'MinCapacity': ('MinCapacityConstraint',),
+}
+
+sweep_rules = {
+    'TotalCost': TotalCost_rule,
+    'MaxCapacityConstraint': MaxCapacity_Constraint,
+    'MinCapacityConstraint': MinCapacity_Constraint,
+}
+
+# Position of the technology in the index of each parameter
+tech_position = {
+    'CostInvest': 0,
+    'CostFixed': 1,
+    'CostVariable': 1,
+    'MaxCapacity': 1,
+    'MinCapacity': 1,
+}
+
+
+def scale(instance, name, multiplier, tech=None):
+    """
+    Case values of parameter name multiplied by multiplier, for all indices
+    or only those of technology tech.
+    """
+    param = getattr(instance, name)
+    return dict(
+      (index, value(param[index]) * multiplier)
+      for index in param.sparse_iterkeys()
+      if tech is None or index[tech_position[name]] == tech
+    )
+
+
+class TemoaSweep(object):
+    def __init__(self, model, data, solver='glpk', solver_options=None):
+        """
+        Build the instance of model with data (a DataPortal) once. Solvers
+        with a persistent interface (gurobi_persistent, cplex_persistent, or
+        appsi_highs with Pyomo 6, ...) keep the model between solves, other
+        solvers are sent the whole instance for each case.
+        """
+        begin = time()
+        self.instance = model.create_instance(data)
+        self.times = {'build': time() - begin, 'solve': []}
+
+        self.optimizer = SolverFactory(solver)
+        if solver_options:
+            for option, val in solver_options.items():
+                self.optimizer.options[option] = val
+
+        self.appsi = hasattr(self.optimizer, 'update_config')
+        self.persistent = self.appsi or hasattr(self.optimizer, 'set_instance')
+        if self.appsi:
+            # changes are pushed by _push, the solver does not need to search the model for them
+            config = self.optimizer.update_config
+            config.check_for_new_or_removed_constraints = False
+            config.check_for_new_or_removed_vars = False
+            config.check_for_new_or_removed_params = False
+            config.check_for_new_objective = False
+            config.update_constraints = False
+            config.update_vars = False
+            config.update_params = False
+            config.update_named_expressions = False
+            config.update_objective = False
+            # fixed variables are sent as bounds, the rows built while they are fixed stay valid once freed
+            config.treat_fixed_vars_as_params = False
+        if self.persistent:
+            self.optimizer.set_instance(self.instance)
+
+        self.base = dict()  # name -> {index: value of the data}, of the values changed by a case
+        self.changed = dict()  # name -> indices set by the last case
+        self.fixed = dict()  # name -> {index: value}, of the variables fixed by fix
+        self.result = None
+        self.termination = None
+
+    def solve(self, case=None):
+        """
+        Set the parameter values of case ({name: {index: value}}) and re-solve.
+        Values set by the previous case and not by this one are restored to
+        those of the data. Returns the value of the objective, None if the
+        case has no optimal solution (see self.termination).
+        """
+        M = self.instance
+        if case is None:
+            case = dict()
+
+        # values of the previous case are restored unless set again
+        updates = dict()
+        for name, indices in self.changed.items():
+            updates[name] = dict((index, self.base[name][index]) for index in indices)
+        for name, values in case.items():
+            if name not in sweep_params:
+                raise ValueError('Parameter "{}" can not be changed between solves, expected one '
+                                 'of {}'.format(name, sorted(sweep_params)))
+            updates.setdefault(name, dict()).update(values)
+
+        touched = dict()  # component name -> changed indices
+        for name, values in updates.items():
+            param = getattr(M, name)
+            base = self.base.setdefault(name, dict())
+            for index, val in values.items():
+                if index not in param:
+                    raise ValueError('{}[{}] has no value in the data, only values of the data '
+                                     'can be changed'.format(name, index))
+                if index not in base:
+                    base[index] = value(param[index])
+                if value(param[index]) == val:
+                    continue
+                param[index] = val
+                for component in sweep_params[name]:
+                    touched.setdefault(component, set()).add(index)
+        self.changed = dict((name, set(values)) for name, values in case.items())
+
+        self._push(touched)
+
+        begin = time()
+        self.result = self.optimizer.solve(M, load_solutions=False)
+        self.times['solve'].append(time() - begin)
+
+        self.termination = self.result.solver.termination_condition
+        if self.termination != TerminationCondition.optimal:
+            return None
+        M.solutions.load_from(self.result)
+        return value(M.TotalCost)
+
+    def fix(self, values=None):
+        """
+        Fix the variables of values ({name: {index: value}}) for the next
+        solves, e.g. the first stage decisions of another solve. Variables
+        fixed by the previous call and not by this one are freed.
+        """
+        M = self.instance
+        if values is None:
+            values = dict()
+
+        changed = []
+        for name, indices in self.fixed.items():
+            var = getattr(M, name)
+            for index in indices:
+                if index not in values.get(name, ()):
+                    var[index].unfix()
+                    changed.append(var[index])
+        for name, indices in values.items():
+            var = getattr(M, name)
+            for index, val in indices.items():
+                if self.fixed.get(name, dict()).get(index) == val:
+                    continue
+                var[index].fix(val)
+                changed.append(var[index])
+        self.fixed = dict((name, dict(indices)) for name, indices in values.items())
+
+        if self.persistent and len(changed) > 0:
+            if self.appsi:
+                self.optimizer.update_variables(changed)
+            else:
+                for var in changed:
+                    self.optimizer.update_var(var)
+
+    def sweep(self, cases):
+        """Solve each case in turn, yields (case number, objective, termination condition)."""
+        for i, case in enumerate(cases):
+            objective = self.solve(case)
+            yield i, objective, self.termination
+
+    def _push(self, touched):
+        # Rebuild the touched components and send them to a persistent solver
+        M = self.instance
+        constraints = []
+        for name, indices in touched.items():
+            component = getattr(M, name)
+            if component.is_indexed():
+                for index in sorted(indices):
+                    if index in component:
+                        component[index].set_value(sweep_rules[name](M, *index))
+                        constraints.append(component[index])
+            else:
+                component.set_value(sweep_rules[name](M))
+                if self.persistent:
+                    self.optimizer.set_objective(component)
+
+        if self.persistent and len(constraints) > 0:
+            if self.appsi:
+                self.optimizer.remove_constraints(constraints)
+                self.optimizer.add_constraints(constraints)
+            else:
+                for con in constraints:
+                    self.optimizer.remove_constraint(con)
+                    self.optimizer.add_constraint(con)
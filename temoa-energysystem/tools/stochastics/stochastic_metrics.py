@@ -0,0 +1,436 @@
+# ---------------------------------------------------------------
+# EVPI and VSS of a stochastic Temoa run.
+#
+# EVPI.py and VSS.py build and solve a new instance for each scenario of the
+# tree, one after another, then solve the extensive form (EF) again. Here the
+# wait-and-see (WS) solves of the scenarios are shared by a pool of worker
+# processes. Each worker builds the instance of the root data (R.dat) once and
+# only swaps in the node data of each scenario (see temoa_sweep.py), so the
+# solver starts from the previous basis. The expected value problem (EV) is
+# solved on the same kind of instance, its first stage decisions are then
+# fixed on each worker's instance to get the expected result of the EV
+# solution (EEV).
+#
+#   EVPI = RP - WS        VSS = EEV - RP
+#
+# where RP is the objective of the EF (from --rp, or solved once with
+# temoa_stochastic.py when --ef is given and PySP is installed).
+#
+#   python stochastic_metrics.py path/to/tree --solver=appsi_highs --processes=8
+#
+# The instances are those of the model of temoa_model.py unless --model gives
+# the model file of the tree (a module with a model, as p_model of EVPI.py).
+# Node data must be parameters of that model: the CapReduction trees of
+# hurricane_ensemble.py need --model with the model of temoa_stochastic, which
+# runs on its own Python 2 and Pyomo install, where the APPSI solvers (the
+# default appsi_highs needs Pyomo 6) do not exist and --solver must be given.
+# Instances are reused only with the model of temoa_model.py and node data
+# that TemoaSweep can change (costs and capacity limits), otherwise a new
+# instance is built for each solve.
+# ---------------------------------------------------------------
+
+import argparse
+import os
+import re
+import sys
+from argparse import Namespace
+from multiprocessing import Pool, cpu_count
+from time import time
+
+from pyomo.environ import DataPortal, Objective, SolverFactory, value
+from pyomo.opt import TerminationCondition
+
+temoa_model_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'temoa_model'))
+
+# State of the process solving the scenarios (a pool worker or the main process)
+worker = dict()
+
+
+def load_model(p_model=None):
+    """
+    Model of the module p_model (path to its file), that of temoa_model.py by
+    default. The directory of the module is put first on the path, so that
+    the model imports its own temoa_rules, temoa_initialize, ...
+    """
+    if p_model is None:
+        p_model = os.path.join(temoa_model_dir, 'temoa_model.py')
+    head, tail = os.path.split(os.path.abspath(p_model))
+    sys.path.insert(0, head)
+    return __import__(os.path.splitext(tail)[0]).model
+
+
+def objective_value(instance):
+    return value(next(instance.component_data_objects(Objective, active=True)))
+
+
+def parse_item(item, number=float):
+    item = item.strip('\'"')
+    if item.lstrip('-').isdigit():
+        return int(item)
+    try:
+        return number(item)
+    except ValueError:
+        return item
+
+
+def read_dat_params(fname):
+    """
+    Parameters of a node .dat file (as written by generate_scenario_tree.py),
+    {name: {index: value}}, years as integers.
+    """
+    with open(fname, 'r') as f:
+        text = re.sub(r'#.*', '', f.read())
+    params = dict()
+    for name, rows in re.findall(r'\bparam\s+(\w+)\s*:=(.*?);', text, flags=re.DOTALL):
+        values = params.setdefault(name, dict())
+        for row in rows.strip().splitlines():
+            items = row.split()
+            if len(items) == 0:
+                continue
+            index = tuple(parse_item(i, str) for i in items[:-1])
+            if len(index) == 0:
+                index = None
+            elif len(index) == 1:
+                index = index[0]
+            values[index] = float(items[-1])
+    return params
+
+
+def read_tree(p_data):
+    """
+    Scenario tree of ScenarioStructure.dat in directory p_data: the root
+    node, the stages in order, the StageVariables of each stage and, for each
+    scenario, its probability and the nodes of its path from the root.
+    """
+    with open(os.path.join(p_data, 'ScenarioStructure.dat'), 'r') as f:
+        text = re.sub(r'#.*', '', f.read())
+
+    sets = dict()
+    for name, index, elements in re.findall(r'\bset\s+(\w+)\s*(?:\[\s*(\S+?)\s*\])?\s*:=(.*?);', text,
+                                            flags=re.DOTALL):
+        if index:
+            sets.setdefault(name, dict())[index] = elements.split()
+        else:
+            sets[name] = elements.split()
+    params = dict()
+    for name, rows in re.findall(r'\bparam\s+(\w+)\s*:=(.*?);', text, flags=re.DOTALL):
+        items = rows.split()
+        if len(items) == 1:
+            params[name] = items[0]
+        else:
+            params[name] = dict(zip(items[0::2], items[1::2]))
+
+    if params.get('ScenarioBasedData', 'True').lower() != 'false':
+        raise ValueError('Only trees with ScenarioBasedData := False (node data, as written by '
+                         'generate_scenario_tree.py) are supported')
+
+    parent = dict()
+    for node, children in sets.get('Children', dict()).items():
+        for child in children:
+            parent[child] = node
+    roots = [node for node in sets['Nodes'] if node not in parent]
+    if len(roots) != 1:
+        raise ValueError('Expected one root node in the scenario tree, found {}'.format(roots))
+
+    scenarios = dict()
+    for scenario in sets['Scenarios']:
+        node = params['ScenarioLeafNode'][scenario]
+        path = [node]
+        while node in parent:
+            node = parent[node]
+            path.append(node)
+        path.reverse()
+        probability = 1.0
+        for node in path:
+            probability *= float(params['ConditionalProbability'][node])
+        scenarios[scenario] = (probability, path)
+
+    return {
+        'root': roots[0],
+        'stages': sets['Stages'],
+        'stage_variables': sets.get('StageVariables', dict()),
+        'scenarios': scenarios,
+    }
+
+
+def scenario_case(p_data, path):
+    """Node data of the nodes of path (the root excluded), later nodes over earlier ones."""
+    case = dict()
+    for node in path[1:]:
+        for name, values in read_dat_params(os.path.join(p_data, node + '.dat')).items():
+            case.setdefault(name, dict()).update(values)
+    return case
+
+
+def expected_case(instance, cases, probabilities):
+    """
+    Expected value of the node data of the scenarios. Scenarios without a
+    value use that of the root data, or are left out of the expectation of
+    indices the root data has no value for.
+    """
+    expected = dict()
+    for name in set(name for case in cases.values() for name in case):
+        param = getattr(instance, name)
+        indices = set(index for case in cases.values() for index in case.get(name, ()))
+        values = dict()
+        for index in indices:
+            total, weight = 0.0, 0.0
+            for scenario, case in cases.items():
+                if index in case.get(name, ()):
+                    val = case[name][index]
+                elif index in param:
+                    val = value(param[index])
+                else:
+                    continue
+                total += probabilities[scenario] * val
+                weight += probabilities[scenario]
+            values[index] = total / weight
+        expected[name] = values
+    return expected
+
+
+def check_params(instance, cases, p_model):
+    """Raise ValueError if node data of cases are not parameters of the model."""
+    names = set(name for case in cases.values() for name in case)
+    missing = sorted(name for name in names if not hasattr(instance, name))
+    if len(missing) > 0:
+        raise ValueError('The node data of {} are not parameters of the model of {}, give the model of '
+                         'the tree with --model'.format(', '.join(missing), p_model or 'temoa_model.py'))
+
+
+def sweepable(instance, cases):
+    """True if TemoaSweep can set all the node data of cases on instance."""
+    from temoa_sweep import sweep_params
+    for case in cases.values():
+        for name, values in case.items():
+            if name not in sweep_params:
+                return False
+            param = getattr(instance, name)
+            if any(index not in param for index in values):
+                return False
+    return True
+
+
+def stage_values(instance, patterns):
+    """
+    Values of the variables of StageVariables patterns (e.g. V_Capacity[*,2016]),
+    {name: {index: value}}.
+    """
+    values = dict()
+    for pattern in patterns:
+        name, _, index = pattern.partition('[')
+        var = getattr(instance, name.strip(), None)
+        if var is None:  # not a variable of this model
+            continue
+        wanted = [i.strip() for i in index.rstrip(']').split(',')] if index else None
+        for key in var:
+            items = key if isinstance(key, tuple) else (key,)
+            if wanted is not None and not all(w == '*' or w == str(k) for w, k in zip(wanted, items)):
+                continue
+            val = var[key].value
+            if val is None:
+                continue
+            if var[key].lb is not None:
+                val = max(val, var[key].lb)  # solver tolerances
+            values.setdefault(name.strip(), dict())[key] = val
+    return values
+
+
+def build_data(model, files, case=None):
+    """DataPortal of files, with the values of case set over those of the files."""
+    data = DataPortal(model=model)
+    for fname in files:
+        data.load(filename=fname)
+    if case:
+        for name, values in case.items():
+            data.data().setdefault(name, dict()).update(values)
+    return data
+
+
+def init_worker(files, p_model, solver, solver_options, rebuild):
+    model = load_model(p_model)
+    worker.clear()
+    worker.update(model=model, files=files)
+    if rebuild:
+        worker['optimizer'] = SolverFactory(solver)
+        for option, val in (solver_options or dict()).items():
+            worker['optimizer'].options[option] = val
+    else:
+        from temoa_sweep import TemoaSweep  # model of temoa_model.py only
+        worker['sweep'] = TemoaSweep(model, build_data(model, files), solver, solver_options)
+        worker['instance'] = worker['sweep'].instance
+
+
+def solve_case(task):
+    """
+    Solve task (name, case, fixed): the root data with the values of case,
+    the variables of fixed ({name: {index: value}}) fixed. Returns
+    (name, objective, time), the objective is inf if there is no solution.
+    """
+    name, case, fixed = task
+    begin = time()
+    if 'sweep' in worker:
+        sweep = worker['sweep']
+        sweep.fix(fixed)
+        objective = sweep.solve(case)
+        termination = sweep.termination
+    else:
+        model = worker['model']
+        instance = worker['instance'] = model.create_instance(build_data(model, worker['files'], case))
+        for var_name, values in fixed.items():
+            var = getattr(instance, var_name)
+            for index, val in values.items():
+                var[index].fix(val)
+        result = worker['optimizer'].solve(instance, load_solutions=False)
+        termination = result.solver.termination_condition
+        objective = None
+        if termination == TerminationCondition.optimal:
+            instance.solutions.load_from(result)
+            objective = objective_value(instance)
+    if objective is None:
+        sys.stderr.write('\nNo solution of {}: {}\n'.format(name, termination))
+        objective = float('inf')
+    return name, objective, time() - begin
+
+
+def solve_rp(p_model, p_data, solver):
+    """
+    Objective of the extensive form, solved with ReferenceModel.py of the
+    directory of the model file. None without PySP.
+    """
+    if p_model is None:
+        p_model = os.path.join(temoa_model_dir, 'temoa_model.py')
+    try:
+        from temoa_stochastic import solve_ef
+    except ImportError as e:
+        sys.stderr.write('\nThe extensive form can not be solved ({}), RP, EVPI and VSS are '
+                         'not computed\n'.format(e))
+        return None
+    reference = os.path.join(os.path.dirname(os.path.abspath(p_model)), 'ReferenceModel.py')
+    return solve_ef(reference, p_data, Namespace(solver=solver))
+
+
+def stochastic_metrics(p_data, solver='appsi_highs', solver_options=None, processes=None, rp=None,
+                       p_model=None, ef=False):
+    """
+    EVPI and VSS of the scenario tree in directory p_data.
+    p_data -> directory of ScenarioStructure.dat and of the node .dat files.
+    solver, solver_options -> solver of all solves and its options.
+    processes -> number of processes of the WS and EEV solves (default one per
+    scenario, up to the number of CPUs), 1 solves them in this process.
+    rp -> objective of the extensive form if known, otherwise solved with
+    temoa_stochastic.py if ef is True.
+    p_model -> path to the model file of the tree (default temoa_model.py).
+    Raises ValueError if node data are not parameters of the model.
+    Returns a dictionary of the EV, WS, EEV, RP, EVPI and VSS, of the WS and
+    EEV objectives of each scenario and of the time of each stage.
+    """
+    times = dict()
+    begin = time()
+    tree = read_tree(p_data)
+    scenarios = sorted(tree['scenarios'])
+    probabilities = dict((s, tree['scenarios'][s][0]) for s in scenarios)
+    cases = dict((s, scenario_case(p_data, tree['scenarios'][s][1])) for s in scenarios)
+    files = [os.path.join(p_data, tree['root'] + '.dat')]
+
+    # instances are reused with the model of temoa_model.py and node data that TemoaSweep can change
+    model = load_model(p_model)
+    instance = model.create_instance(build_data(model, files))
+    check_params(instance, cases, p_model)
+    rebuild = p_model is not None or not sweepable(instance, cases)
+    init_worker(files, p_model, solver, solver_options, rebuild)
+    if rebuild:
+        worker['instance'] = instance
+    ev_case = expected_case(worker['instance'], cases, probabilities)
+    times['build'] = time() - begin
+
+    # expected value problem, and its first stage decisions
+    begin = time()
+    _, ev, _ = solve_case(('EV', ev_case, dict()))
+    fixed = stage_values(worker['instance'], tree['stage_variables'].get(tree['stages'][0], ()))
+    times['ev'] = time() - begin
+
+    if processes is None:
+        processes = min(len(scenarios), cpu_count())
+    ws_tasks = [(s, cases[s], dict()) for s in scenarios]
+    eev_tasks = [(s, cases[s], fixed) for s in scenarios]
+    if processes > 1:
+        pool = Pool(processes, initializer=init_worker, initargs=(files, p_model, solver, solver_options, rebuild))
+    try:
+        begin = time()
+        if processes > 1:
+            ws_results = pool.map(solve_case, ws_tasks, chunksize=1)
+        else:
+            ws_results = [solve_case(task) for task in ws_tasks]
+        times['ws'] = time() - begin
+
+        begin = time()
+        if processes > 1:
+            eev_results = pool.map(solve_case, eev_tasks, chunksize=1)
+        else:
+            eev_results = [solve_case(task) for task in eev_tasks]
+        times['eev'] = time() - begin
+    finally:
+        if processes > 1:
+            pool.close()
+            pool.join()
+
+    results = {'EV': ev, 'scenarios': dict(), 'times': times, 'rebuild': rebuild}
+    for (s, ws_obj, ws_time), (_, eev_obj, eev_time) in zip(ws_results, eev_results):
+        results['scenarios'][s] = {
+            'probability': probabilities[s],
+            'WS': ws_obj,
+            'EEV': eev_obj,
+            'time': ws_time + eev_time,
+        }
+    results['WS'] = sum(probabilities[s] * r['WS'] for s, r in results['scenarios'].items())
+    results['EEV'] = sum(probabilities[s] * r['EEV'] for s, r in results['scenarios'].items())
+
+    begin = time()
+    if rp is None and ef:
+        rp = solve_rp(p_model, p_data, solver)
+    times['rp'] = time() - begin
+    results['RP'] = rp
+    results['EVPI'] = None if rp is None else rp - results['WS']
+    results['VSS'] = None if rp is None else results['EEV'] - rp
+    return results
+
+
+def report(results):
+    lines = ['', 'Scenario        Probability               WS              EEV']
+    for s in sorted(results['scenarios']):
+        r = results['scenarios'][s]
+        lines.append('{:<14}{:>13.6g}{:>17.2f}{:>17.2f}'.format(s, r['probability'], r['WS'], r['EEV']))
+    lines.append('')
+    for name in ('EV', 'WS', 'EEV', 'RP', 'EVPI', 'VSS'):
+        if results[name] is None:
+            lines.append('{:<6}-'.format(name))
+        else:
+            lines.append('{:<6}{:.2f}'.format(name, results[name]))
+    if results['RP'] is None:
+        lines.append('EVPI + VSS = EEV - WS = {:.2f}'.format(results['EEV'] - results['WS']))
+    lines.append('')
+    lines.append('Time (s): ' + ', '.join(
+        '{} {:.1f}'.format(stage, results['times'][stage]) for stage in ('build', 'ev', 'ws', 'eev', 'rp')))
+    if results['rebuild']:
+        lines.append('(an instance was built for each solve, see --model and the node data TemoaSweep can change)')
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='EVPI and VSS of a stochastic Temoa run')
+    parser.add_argument('p_data', help='directory of ScenarioStructure.dat and of the node .dat files')
+    parser.add_argument('--solver', default='appsi_highs', help='solver of all solves (default appsi_highs)')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='processes of the WS and EEV solves (default one per scenario, up to the CPUs)')
+    parser.add_argument('--rp', type=float, default=None, help='objective of the extensive form, if known')
+    parser.add_argument('--ef', action='store_true',
+                        help='solve the extensive form for RP with ReferenceModel.py (needs PySP)')
+    parser.add_argument('--model', default=None,
+                        help='path to the model file of the tree (default temoa_model.py), e.g. '
+                             'temoa_stochastic/temoa_model/temoa_model.py for CapReduction trees')
+    args = parser.parse_args()
+
+    results = stochastic_metrics(args.p_data, args.solver, processes=args.processes, rp=args.rp,
+                                 p_model=args.model, ef=args.ef)
+    print(report(results))
@@ -26,7 +26,8 @@ received this license file.  If not, see <http://www.gnu.org/licenses/>.
 # ---------------------------------------------------------------------------
 
 
-__all__ = ('pformat_results', 'stringify_data')
+__all__ = ('pformat_results', 'stringify_data', 'collect_results',
+           'collect_scenario_results', 'write_results', 'write_scenario_results')
 
 from collections import defaultdict
 from cStringIO import StringIO
@@ -42,6 +43,15 @@ import sys
 from pyomo.core import value
 from IPython import embed as IP
 
+# Table dictionary below maps variable names to database table names
+output_tables = { "V_FlowIn"   : "Output_VFlow_In",  \
+				  "V_FlowOut"  : "Output_VFlow_Out", \
+				  "V_Capacity" : "Output_V_Capacity",       \
+				  "V_CapacityAvailableByPeriodAndTech"   : "Output_CapacityByPeriodAndTech",  \
+				  "V_EmissionActivityByPeriodAndProcess" : "Output_Emissions", \
+				  "Objective"  : "Output_Objective", \
+				  "Costs"      : "Output_Costs" }
+
 
 def stringify_data ( data, ostream=SO, format='plain' ):
 	# data is a list of tuples of ('var_name[index]', value)
@@ -62,52 +72,25 @@ def stringify_data ( data, ostream=SO, format='plain' ):
 		ostream.write( fmt.format(*row) )
 
 
-def pformat_results ( pyomo_instance, pyomo_result, options ):
-	from pyomo.core import Objective, Var, Constraint
-
-	output = StringIO()
+def collect_results ( pyomo_instance ):
+	"""
+	Non-zero values of the variables and costs of a solved instance, as a
+	dictionary {group: {index: value}} of plain dictionaries, so they can be
+	returned from another process.
+	"""
+	from pyomo.core import Objective
 
 	m = pyomo_instance            # lazy typist
-	result = pyomo_result
-
-	soln = result['Solution']
-	solv = result['Solver']      # currently unused, but may want it later
-	prob = result['Problem']     # currently unused, but may want it later
-
-	optimal_solutions = (
-	  'feasible', 'globallyOptimal', 'locallyOptimal', 'optimal'
-	)
-	if str(soln.Status) not in optimal_solutions:
-		output.write( 'No solution found.' )
-		return output
 
 	objs = list(m.component_data_objects( Objective ))
 	if len( objs ) > 1:
 		msg = '\nWarning: More than one objective.  Using first objective.\n'
 		SE.write( msg )
 
-	Cons = soln.Constraint
-
-
-	def collect_result_data( cgroup, clist, epsilon):
-		# cgroup = "Component group"; i.e., Vars or Cons
-		# clist = "Component list"; i.e., where to store the data
-		# epsilon = absolute value below which to ignore a result
-		results = defaultdict(list)
-		for name, data in cgroup.iteritems():
-			if not (abs( data['Value'] ) > epsilon ): continue
-
-			# name looks like "Something[some,index]"
-			group, index = name[:-1].split('[')
-			results[ group ].append( (name.replace("'", ''), data['Value']) )
-		clist.extend( t for i in sorted( results ) for t in sorted(results[i]))
-
 	#Create a dictionary in which to store "solved" variable values
 	svars = defaultdict( lambda: defaultdict( float ))   
 	
-	con_info = list()
 	epsilon = 1e-9   # threshold for "so small it's zero"
-
 	emission_keys = { (i, t, v, o) : set() for e, i, t, v, o in m.EmissionActivity }
 	for e, i, t, v, o in m.EmissionActivity:
 		emission_keys[(i, t, v, o)].add(e)
@@ -224,6 +207,85 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 		  )
 		svars[	'Costs'	][ 'V_DiscountedVariableCostsByProcess', t, v] += vcost
 
+	return dict( (group, dict( values )) for group, values in svars.iteritems() )
+
+
+def collect_scenario_results ( instances, processes=None ):
+	"""
+	collect_results of each of the solved instances, in parallel in processes
+	worker processes (default one per CPU). The workers are forked and read
+	the instances from this process, so the instances are never pickled; where
+	processes can not be forked the instances are read one after the other.
+	"""
+	import multiprocessing
+
+	global shared_instances
+
+	if processes is None:
+		processes = multiprocessing.cpu_count()
+	processes = min( processes, len(instances) )
+	if processes < 2 or not hasattr( os, 'fork' ):
+		return [ collect_results( i ) for i in instances ]
+
+	if hasattr( multiprocessing, 'get_context' ):
+		multiprocessing = multiprocessing.get_context( 'fork' )
+
+	shared_instances = instances
+	pool = multiprocessing.Pool( processes )
+	try:
+		return pool.map( collect_shared_results, range(len(instances)), chunksize=1 )
+	finally:
+		pool.close()
+		pool.join()
+		shared_instances = None
+
+shared_instances = None   # instances read by the workers of collect_scenario_results
+
+def collect_shared_results ( i ):
+	return collect_results( shared_instances[ i ] )
+
+
+def pformat_results ( pyomo_instance, pyomo_result, options ):
+	from pyomo.core import Objective, Var, Constraint
+
+	output = StringIO()
+
+	m = pyomo_instance            # lazy typist
+	result = pyomo_result
+
+	soln = result['Solution']
+	solv = result['Solver']      # currently unused, but may want it later
+	prob = result['Problem']     # currently unused, but may want it later
+
+	optimal_solutions = (
+	  'feasible', 'globallyOptimal', 'locallyOptimal', 'optimal'
+	)
+	if str(soln.Status) not in optimal_solutions:
+		output.write( 'No solution found.' )
+		return output
+
+	Cons = soln.Constraint
+
+
+	def collect_result_data( cgroup, clist, epsilon):
+		# cgroup = "Component group"; i.e., Vars or Cons
+		# clist = "Component list"; i.e., where to store the data
+		# epsilon = absolute value below which to ignore a result
+		results = defaultdict(list)
+		for name, data in cgroup.iteritems():
+			if not (abs( data['Value'] ) > epsilon ): continue
+
+			# name looks like "Something[some,index]"
+			group, index = name[:-1].split('[')
+			results[ group ].append( (name.replace("'", ''), data['Value']) )
+		clist.extend( t for i in sorted( results ) for t in sorted(results[i]))
+
+	svars = collect_results( m )
+
+	con_info = list()
+	objs = list(m.component_data_objects( Objective ))
+	obj_name, obj_value = objs[0].cname(True), value( objs[0] )
+
 	collect_result_data( Cons, con_info, epsilon=1e-9 )
 
 	msg = ( 'Model name: %s\n'
@@ -263,19 +325,6 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 	# Write outputs stored in dictionary to the user-specified database 
 	# -----------------------------------------------------------------
 
-	# Table dictionary below maps variable names to database table names
-	tables = { "V_FlowIn"   : "Output_VFlow_In",  \
-			   "V_FlowOut"  : "Output_VFlow_Out", \
-			   "V_Capacity" : "Output_V_Capacity",       \
-			   "V_CapacityAvailableByPeriodAndTech"   : "Output_CapacityByPeriodAndTech",  \
-			   "V_EmissionActivityByPeriodAndProcess" : "Output_Emissions", \
-			   "Objective"  : "Output_Objective", \
-			   "Costs"      : "Output_Costs"}
-	
-	db_tables = ['time_periods', 'time_season', 'time_of_day', 'technologies', 'commodities',\
-				'LifetimeTech', 'LifetimeProcess', 'Efficiency', 'EmissionActivity', 'ExistingCapacity']
-
-	
 	if isinstance(options, TemoaConfig):	
 		if not options.output:
 			if options.saveTEXTFILE or options.keepPyomoLP:
@@ -295,112 +344,176 @@ def pformat_results ( pyomo_instance, pyomo_result, options ):
 
 
 		con = sqlite3.connect(options.output)
-		cur = con.cursor()   # A database cursor enables traversal over DB records
 		con.text_factory = str # This ensures data is explored with UTF-8 encoding
 
-		### Copy tables from Input File to DB file.
-		# IF output file is empty database.
-		cur.execute("SELECT * FROM technologies")
-		is_db_empty = False #False for empty db file
-		for elem in cur:
-			is_db_empty = True #True for non-empty db file
-			break
-		
+		prepare_output( con, options )
+		write_results( svars, con, options.scenario )
+		con.close()			
 		
-		if is_db_empty: #This file could be schema with populated results from previous run. Or it could be a normal db file.
-			cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='input_file';")
-			does_input_file_table_exist = False
-			for i in cur: # This means that the 'input_file' table exists in db.
-				does_input_file_table_exist = True
-			if does_input_file_table_exist: #This block distinguishes normal database from schema.
-				#This is schema file. 
-				cur.execute("SELECT file FROM input_file WHERE id is '1';")
-				for i in cur:
-					tagged_file = i[0]
-				tagged_file = re.sub('["]', "", tagged_file)
-
-				if tagged_file == options.dot_dat[0]:
-					#If Input_file name matches, add output and check tech/comm
-					dat_to_db(options.dot_dat[0], con)
-				else:
-					#If not a match, delete output tables and update input_file. Call dat_to_db
-					for i in db_tables:
-						cur.execute("DELETE FROM "+i+";")
-						cur.execute("VACUUM;")		
+		save_scenario_files( options )
+	
+	return output
+
+
+def write_scenario_results ( results, options, dot_dats ):
+	"""
+	Write the results of the scenarios of a stochastic run to the output
+	database of options in a single transaction. results is a list of
+	(scenario, svars) as returned by collect_results, dot_dats the list of
+	.dat files of each scenario.
+	"""
+	if not results: return
+	if not options.output:
+		print "No Output File specified."
+		return
+	if not os.path.exists(options.output) :
+		print "Please put the "+options.output+" file in the right Directory"
+		return
+
+	con = sqlite3.connect(options.output)
+	con.text_factory = str # This ensures data is explored with UTF-8 encoding
+
+	options.dot_dat = dot_dats[0]   # the input tables are the same for all scenarios
+	prepare_output( con, options )
+	sectors = tech_sectors( con )
+	with con:
+		for scenario, svars in results:
+			insert_results( svars, con, scenario, sectors )
+	con.close()
+
+	for (scenario, svars), dot_dat in zip( results, dot_dats ):
+		options.scenario = scenario
+		options.dot_dat = dot_dat
+		save_scenario_files( options )
+
+
+def prepare_output ( con, options ):
+	# Copy the tables of the input file (options.dot_dat) to the output
+	# database con, if not there already
+	cur = con.cursor()   # A database cursor enables traversal over DB records
+	tables = output_tables
+	db_tables = ['time_periods', 'time_season', 'time_of_day', 'technologies', 'commodities',\
+				'LifetimeTech', 'LifetimeProcess', 'Efficiency', 'EmissionActivity', 'ExistingCapacity']
+
+	### Copy tables from Input File to DB file.
+	# IF output file is empty database.
+	cur.execute("SELECT * FROM technologies")
+	is_db_empty = False #False for empty db file
+	for elem in cur:
+		is_db_empty = True #True for non-empty db file
+		break
+	
+	
+	if is_db_empty: #This file could be schema with populated results from previous run. Or it could be a normal db file.
+		cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='input_file';")
+		does_input_file_table_exist = False
+		for i in cur: # This means that the 'input_file' table exists in db.
+			does_input_file_table_exist = True
+		if does_input_file_table_exist: #This block distinguishes normal database from schema.
+			#This is schema file. 
+			cur.execute("SELECT file FROM input_file WHERE id is '1';")
+			for i in cur:
+				tagged_file = i[0]
+			tagged_file = re.sub('["]', "", tagged_file)
+
+			if tagged_file == options.dot_dat[0]:
+				#If Input_file name matches, add output and check tech/comm
+				dat_to_db(options.dot_dat[0], con)
+			else:
+				#If not a match, delete output tables and update input_file. Call dat_to_db
+				for i in db_tables:
+					cur.execute("DELETE FROM "+i+";")
+					cur.execute("VACUUM;")		
+				
+				for i in tables.keys():
+					cur.execute("DELETE FROM "+tables[i]+";")
+					cur.execute("VACUUM;")
 					
-					for i in tables.keys():
-						cur.execute("DELETE FROM "+tables[i]+";")
-						cur.execute("VACUUM;")
-						
-					for i in options.dot_dat:
-						cur.execute("DELETE FROM input_file WHERE id=1;")
-						cur.execute("INSERT INTO input_file VALUES(1, '"+i+"');")
-						break
-					dat_to_db(i, con)
-			
-		else: #empty schema db file
-			cur.execute("CREATE TABLE IF NOT EXISTS input_file ( id integer PRIMARY KEY, file varchar(30));")
-			
-			for i in tables.keys():
-				cur.execute("DELETE FROM "+tables[i]+";")
-				cur.execute("VACUUM;")
-			
-			for i in options.dot_dat:
-				cur.execute("DELETE FROM input_file WHERE id=1;")
-				cur.execute("INSERT INTO input_file(id, file) VALUES(?, ?);", (1,  '"'+i+'"'))
-				break
-			dat_to_db(i, con)
+				for i in options.dot_dat:
+					cur.execute("DELETE FROM input_file WHERE id=1;")
+					cur.execute("INSERT INTO input_file VALUES(1, '"+i+"');")
+					break
+				dat_to_db(i, con)
 		
-
+	else: #empty schema db file
+		cur.execute("CREATE TABLE IF NOT EXISTS input_file ( id integer PRIMARY KEY, file varchar(30));")
 		
-		for table in svars.keys() :
-			if table in tables :
-				cur.execute("SELECT DISTINCT scenario FROM '"+tables[table]+"'")
-				for val in cur : 
-					if options.scenario == val[0]: # If scenario exists, delete
-						cur.execute("DELETE FROM "+tables[table]+" \
-									WHERE scenario is '"+options.scenario+"'") 
-				if table == 'Objective' : # Only table without sector info
-					for key in svars[table].keys():
-						key_str = str(key) # only 1 row to write
-						key_str = key_str[1:-1] # Remove parentheses
-						cur.execute("INSERT INTO "+tables[table]+" \
-									VALUES('"+options.scenario+"',"+key_str+", \
-									"+str(svars[table][key])+");")
-
-				else : # First add 'NULL' for sector then update
-					for key in svars[table].keys() : # Need to loop over keys (rows)
-						key_str = str(key)
-						key_str = key_str[1:-1] # Remove parentheses
-						cur.execute("INSERT INTO "+tables[table]+ \
-									" VALUES('"+options.scenario+"','NULL', \
-									"+key_str+","+str(svars[table][key])+");")
-					cur.execute("UPDATE "+tables[table]+" SET sector = \
-								(SELECT technologies.sector FROM technologies \
-								WHERE "+tables[table]+".tech = technologies.tech);")
-		con.commit()
-		con.close()			
+		for i in tables.keys():
+			cur.execute("DELETE FROM "+tables[i]+";")
+			cur.execute("VACUUM;")
 		
-		if options.saveEXCEL or options.saveTEXTFILE or options.keepPyomoLP:
-			for inpu in options.dot_dat:
-				file_ty = re.search(r"\b([\w-]+)\.(\w+)\b", inpu)
-			new_dir = options.path_to_db_io+os.sep+file_ty.group(1)+'_'+options.scenario+'_model'
-			if os.path.exists( new_dir ):
-				rmtree( new_dir )
-			os.mkdir(new_dir)
-			
-			if options.saveEXCEL:
-				file_type = re.search(r"([\w-]+)\.(\w+)\b", options.output)
-				file_n = file_type.group(1)
-				from DB_to_Excel import make_excel
-				temp_scenario = set()
-				temp_scenario.add(options.scenario)
-				make_excel(options.output, new_dir+os.sep+options.scenario, temp_scenario)
-				#os.system("python db_io"+os.sep+"DB_to_Excel.py -i \
-				#		  ""+options.output+" \
-				#		  " -o db_io"+os.sep+options.scenario+" -s "+options.scenario)
+		for i in options.dot_dat:
+			cur.execute("DELETE FROM input_file WHERE id=1;")
+			cur.execute("INSERT INTO input_file(id, file) VALUES(?, ?);", (1,  '"'+i+'"'))
+			break
+		dat_to_db(i, con)
 	
-	return output
+	con.commit()
+
+def tech_sectors ( con ):
+	# dictionary of the sector of each technology, first row of a technology is used
+	sectors = dict()
+	for tech, sector in con.execute( "SELECT tech, sector FROM technologies" ):
+		sectors.setdefault( tech, sector )
+	return sectors
+
+def insert_results ( svars, con, scenario, sectors ):
+	# Replace the rows of scenario in the output tables of con by the values in
+	# svars, the caller commits
+	for table in svars.keys():
+		if table not in output_tables: continue
+		name = output_tables[ table ]
+		con.execute( "DELETE FROM "+name+" WHERE scenario = ?;", (scenario,) )
+
+		if table == 'Objective': # Only table without sector info
+			# key looks like "('TotalCost')"
+			rows = [ (scenario, key[2:-2], val) for key, val in svars[table].items() ]
+			n_columns = 3
+		else:
+			# index columns follow scenario and sector
+			columns = [ row[1] for row in con.execute( "PRAGMA table_info("+name+");" ) ]
+			tech = columns.index( 'tech' ) - 2
+			rows = [
+			  (scenario, sectors.get( key[tech] )) + tuple( key ) + (val,)
+			  for key, val in svars[table].items()
+			]
+			n_columns = len( columns )
+		con.executemany(
+		  "INSERT INTO "+name+" VALUES ("+", ".join( ["?"] * n_columns )+");", rows )
+
+def write_results ( svars, con, scenario, sectors=None ):
+	"""
+	Write the values in svars to the output tables of database connection con,
+	replacing the rows of scenario, in a single transaction. The sector of each
+	row is looked up in sectors (tech -> sector), read from the technologies
+	table of con if not given.
+	"""
+	if sectors is None:
+		sectors = tech_sectors( con )
+
+	with con:
+		insert_results( svars, con, scenario, sectors )
+
+def save_scenario_files ( options ):
+	# Directory of the model files of options.scenario, with its Excel file
+	if options.saveEXCEL or options.saveTEXTFILE or options.keepPyomoLP:
+		for inpu in options.dot_dat:
+			file_ty = re.search(r"\b([\w-]+)\.(\w+)\b", inpu)
+		new_dir = options.path_to_db_io+os.sep+file_ty.group(1)+'_'+options.scenario+'_model'
+		if os.path.exists( new_dir ):
+			rmtree( new_dir )
+		os.mkdir(new_dir)
+		
+		if options.saveEXCEL:
+			file_type = re.search(r"([\w-]+)\.(\w+)\b", options.output)
+			file_n = file_type.group(1)
+			from DB_to_Excel import make_excel
+			temp_scenario = set()
+			temp_scenario.add(options.scenario)
+			make_excel(options.output, new_dir+os.sep+options.scenario, temp_scenario)
+			#os.system("python db_io"+os.sep+"DB_to_Excel.py -i \
+			#		  ""+options.output+" \
+			#		  " -o db_io"+os.sep+options.scenario+" -s "+options.scenario)
 	
 def dat_to_db(input_file, output_schema, run_partial=False):
 
@@ -210,7 +210,14 @@ class TemoaConfig( object ):
 		'mgaiter',
 		'path_to_db_io',
 		'path_to_logs',
-		'mgaweight'
+		'mgaweight',
+		'reduce_scenarios',
+		'reduce_tolerance',
+		'reduce_method',
+		'ph',
+		'ph_workers',
+		'ph_rho_factor',
+		'ph_max_iterations'
 	)
 	
 	t_ANY_ignore  = '[ \t]'
@@ -235,6 +242,13 @@ class TemoaConfig( object ):
 		self.mga              = None # mga slack value
 		self.mga_iter         = None
 		self.mga_weight       = None
+		self.reduce_scenarios = None # number of scenarios kept by scenario reduction
+		self.reduce_tolerance = None # distance allowed by scenario reduction
+		self.reduce_method    = 'forward'
+		self.ph               = False # Progressive Hedging instead of the extensive form
+		self.ph_workers       = 1
+		self.ph_rho_factor    = 1.0 # rho of capacity variables per unit of CostInvest
+		self.ph_max_iterations = 100
 
 		# To keep consistent with Kevin's argumetn parser, will be removed in the future.
 		self.graph_format     = None
@@ -277,6 +291,15 @@ class TemoaConfig( object ):
 		msg += '{:>{}s}: {}\n'.format('MGA slack value', width, self.mga)
 		msg += '{:>{}s}: {}\n'.format('MGA # of iterations', width, self.mga_iter)
 		msg += '{:>{}s}: {}\n'.format('MGA weighting method', width, self.mga_weight)
+		msg += spacer
+		msg += '{:>{}s}: {}\n'.format('Scenarios kept', width, self.reduce_scenarios)
+		msg += '{:>{}s}: {}\n'.format('Reduction tolerance', width, self.reduce_tolerance)
+		msg += '{:>{}s}: {}\n'.format('Reduction method', width, self.reduce_method)
+		msg += spacer
+		msg += '{:>{}s}: {}\n'.format('Progressive Hedging', width, self.ph)
+		msg += '{:>{}s}: {}\n'.format('PH workers', width, self.ph_workers)
+		msg += '{:>{}s}: {}\n'.format('PH rho factor', width, self.ph_rho_factor)
+		msg += '{:>{}s}: {}\n'.format('PH max iterations', width, self.ph_max_iterations)
 		msg += '**NOTE: If you are performing MGA runs, navigate to the DAT file and make any modifications to the MGA sets before proceeding.'
 		return msg
 
@@ -328,6 +351,34 @@ class TemoaConfig( object ):
 		r'--keep_pyomo_lp_file\b'
 		self.keepPyomoLP = True
 		
+	def t_reduce_scenarios(self, t):
+		r'--reduce_scenarios[\s\=]+\d+'
+		self.reduce_scenarios = int(t.value.replace('=', ' ').split()[1])
+
+	def t_reduce_tolerance(self, t):
+		r'--reduce_tolerance[\s\=]+[\.\deE\-]+'
+		self.reduce_tolerance = float(t.value.replace('=', ' ').split()[1])
+
+	def t_reduce_method(self, t):
+		r'--reduce_method[\s\=]+(forward|backward)\b'
+		self.reduce_method = t.value.replace('=', ' ').split()[1]
+
+	def t_ph_workers(self, t):
+		r'--ph_workers[\s\=]+\d+'
+		self.ph_workers = int(t.value.replace('=', ' ').split()[1])
+
+	def t_ph_rho_factor(self, t):
+		r'--ph_rho_factor[\s\=]+[\.\deE\-]+'
+		self.ph_rho_factor = float(t.value.replace('=', ' ').split()[1])
+
+	def t_ph_max_iterations(self, t):
+		r'--ph_max_iterations[\s\=]+\d+'
+		self.ph_max_iterations = int(t.value.replace('=', ' ').split()[1])
+
+	def t_ph(self, t):
+		r'--ph\b'
+		self.ph = True
+
 	def t_begin_mga(self, t):
 		r'--mga[\s\=]+\{'
 		t.lexer.push_state('mga')
@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# ---------------------------------------------------------------
+# Progressive Hedging of a stochastic tree.
+#
+# solve_ef builds the extensive form of the whole tree, which must fit in
+# the memory of a single node. Progressive Hedging (PH, pyomo/pysp/ph.py)
+# solves the scenarios one at a time and drives their decisions at each node
+# of the tree to agree through a penalty rho on each non-anticipative
+# variable. For Temoa:
+#
+# - rho of the capacity variables is their investment cost (CostInvest)
+#   times rho_factor, other variables keep the default rho of PH;
+# - the model with the expected values of the node data (the expected value
+#   problem) is solved first, and its solution is the starting point of the
+#   scenario solves of iteration 0;
+# - the scenarios are solved in parallel by PHPyro phsolverservers: local
+#   worker processes started here, or workers already running on a Pyro
+#   name server.
+#
+#   ef_obj = solve_ph( 'ReferenceModel.py', 'stoch_T_0', temoa_options, workers=8 )
+#
+# or from the command line:
+#
+#   python temoa_ph.py ReferenceModel.py stoch_T_0 --solver cplex --workers 8
+# ---------------------------------------------------------------
+
+import os
+import pickle
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from temoa_reduction import read_node_data, read_structure, scenario_tree
+
+# Expected value data and settings read by the PH callbacks, in the tree
+# directory, so that workers on other processes or hosts find them
+ph_data_file = 'TemoaPH.pkl'
+expected_value_file = 'ExpectedValue.dat'
+
+# Seconds given to the Pyro name server and dispatcher to start
+pyro_startup = 5
+
+ph_data_cache = dict()
+
+
+def expected_node_data(p_data, missing=1.0):
+    """
+    Expected value of the parameters of the node files of the tree in
+    directory p_data, {(param, index): value}: at each stage, the average of
+    the node values weighted by the probability of the nodes. Values a node
+    file does not give, that other nodes of the same stage give, are missing
+    (the default of CapReduction).
+    """
+    scenarios, cond_prob = scenario_tree(read_structure(p_data))
+    node_prob = dict()
+    node_stage = dict()
+    for leaf, path, prob in scenarios.values():
+        for stage, node in enumerate(path):
+            node_prob[node] = node_prob.get(node, 0.0) + prob
+            node_stage[node] = stage
+
+    expected = dict()
+    for stage in range(1, max(node_stage.values()) + 1):
+        nodes = [node for node in node_stage if node_stage[node] == stage]
+        data = dict((node, read_node_data(os.path.join(p_data, node + '.dat'))) for node in nodes)
+        total = sum(node_prob[node] for node in nodes)
+        keys = set(key for values in data.values() for key in values)
+        for key in keys:
+            expected[key] = sum(node_prob[node] * data[node].get(key, missing) for node in nodes) / total
+    return expected
+
+
+def write_expected_value(p_data, fname=expected_value_file, missing=1.0):
+    """
+    Write the data of the expected value problem of the tree in directory
+    p_data to fname in p_data: the root node file (the reference model)
+    followed by the expected values of the node files. Returns the path of
+    the file.
+    """
+    structure = read_structure(p_data)
+    scenarios, cond_prob = scenario_tree(structure)
+    root = list(scenarios.values())[0][1][0]
+    with open(os.path.join(p_data, root + '.dat')) as f:
+        text = f.read()
+
+    params = defaultdict(list)
+    for (name, index), val in sorted(expected_node_data(p_data, missing).items()):
+        params[name].append(' ' + '\t'.join(index) + '\t' + '%.10g' % val)
+
+    fname = os.path.join(p_data, fname)
+    with open(fname, 'w') as f:
+        f.write(text)
+        for name in sorted(params):
+            f.write('\n# Expected value\nparam ' + name + ' :=\n')
+            f.write('\n'.join(params[name]))
+            f.write('\n\t;\n')
+    return fname
+
+
+def import_model(p_model):
+    # module of the model file p_model (ReferenceModel.py)
+    (head, tail) = os.path.split(os.path.abspath(p_model))
+    if head not in sys.path:
+        sys.path.insert(0, head)
+    return __import__(tail[:-3], globals(), locals())
+
+
+def solve_expected_value(p_model, ev_file, solver):
+    """Instance of the model in p_model with the data of ev_file, solved."""
+    from pyomo.core import DataPortal
+    from pyomo.opt import SolverFactory
+
+    model = import_model(p_model).model
+    data = DataPortal(model=model)
+    data.load(filename=ev_file)
+    instance = model.create_instance(data)
+    with SolverFactory(solver) as opt:
+        opt.solve(instance)
+    return instance
+
+
+def variable_values(instance):
+    """Values of the variables of instance, {name: {index: value}}."""
+    from pyomo.core import Var
+
+    values = dict()
+    for var in instance.component_objects(Var, active=True):
+        values[var.name] = dict(
+            (index, var[index].value) for index in var if var[index].value is not None)
+    return values
+
+
+def set_variable_values(instance, values):
+    # Set the variables of instance to values (as variable_values)
+    for name, var_values in values.items():
+        var = getattr(instance, name, None)
+        if var is None:
+            continue
+        for index, val in var_values.items():
+            if index in var:
+                var[index].value = val
+
+
+def write_ph_data(p_data, rho_factor, values=None):
+    # Settings and expected value solution read by ph_rhosetter_callback
+    with open(os.path.join(p_data, ph_data_file), 'wb') as f:
+        pickle.dump({'rho_factor': rho_factor, 'values': values}, f, 2)
+
+
+def read_ph_data(p_data):
+    # Data of write_ph_data, read once per process
+    fname = os.path.join(p_data, ph_data_file)
+    if fname not in ph_data_cache:
+        if os.path.exists(fname):
+            with open(fname, 'rb') as f:
+                ph_data_cache[fname] = pickle.load(f)
+        else:
+            ph_data_cache[fname] = {'rho_factor': 1.0, 'values': None}
+    return ph_data_cache[fname]
+
+
+def investment_costs(instance):
+    """
+    CostInvest of each (tech, vintage) of instance, and the average
+    CostInvest of each technology.
+    """
+    from pyomo.core import value
+
+    costs = dict()
+    by_tech = defaultdict(list)
+    for t, v in instance.CostInvest.sparse_iterkeys():
+        costs[t, v] = value(instance.CostInvest[t, v])
+        by_tech[t].append(costs[t, v])
+    tech_costs = dict((t, sum(c) / len(c)) for t, c in by_tech.items())
+    return costs, tech_costs
+
+
+def ph_rhosetter_callback(ph, scenario_tree, scenario):
+    """
+    Rho setter of PH (--rho-cfgfile), run for each scenario by the process
+    holding its instance (PH itself, or the phsolverserver of the scenario)
+    before the iteration 0 solves. Sets rho of the capacity variables from
+    CostInvest, and the variables of the instance to the expected value
+    solution when there is one, the starting point of the iteration 0 solves.
+    """
+    data = read_ph_data(scenario_tree._scenario_instance_factory._data_directory)
+    instance = scenario._instance
+
+    if data['values']:
+        set_variable_values(instance, data['values'])
+
+    costs, tech_costs = investment_costs(instance)
+    for tree_node in scenario._node_list:
+        if tree_node._name not in scenario._rho:  # leaf node
+            continue
+        for variable_id in tree_node._standard_variable_ids:
+            name, index = tree_node._variable_ids[variable_id]
+            if name == 'V_Capacity':
+                cost = costs.get(index, tech_costs.get(index[0]))
+            elif name == 'V_CapacityAvailableByPeriodAndTech':
+                cost = tech_costs.get(index[1])
+            else:
+                continue
+            if cost:
+                ph.setRhoOneScenario(tree_node, scenario, variable_id, data['rho_factor'] * cost)
+
+
+def start_workers(n_workers, host='127.0.0.1'):
+    """
+    Start a Pyro name server, a dispatcher and n_workers phsolverservers on
+    this host, the local stand-in for workers on a cluster. Returns the
+    processes and the port of the name server.
+    """
+    from pyutilib.pyro import using_pyro3
+    from pyutilib.pyro.util import find_unused_port
+
+    processes = []
+    try:
+        port = find_unused_port()
+        if using_pyro3:
+            processes.append(subprocess.Popen(['pyomo_ns', '-r', '-k', '-n ' + host, '-p ' + str(port)]))
+        else:
+            processes.append(subprocess.Popen(['pyomo_ns', '--host=' + host, '--port=' + str(port)]))
+        time.sleep(pyro_startup)
+
+        processes.append(subprocess.Popen(['dispatch_srvr', '--host=' + host, '--port=' + str(port),
+                                           '--daemon-port=' + str(find_unused_port())]))
+        time.sleep(pyro_startup)
+
+        for i in range(n_workers):
+            processes.append(subprocess.Popen(['phsolverserver', '--pyro-host=' + host,
+                                               '--pyro-port=' + str(port)]))
+    except Exception:
+        stop_workers(processes)
+        raise
+    return processes, port
+
+
+def stop_workers(processes):
+    # Stop the processes of start_workers, workers first
+    for process in reversed(processes):
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def write_ph_results(model_module, p_data, ph, temoa_options):
+    # Results of the scenarios to the database of temoa_options, as solve_ef.
+    # The instances are only held by PH when it solves the scenarios itself
+    # (see solve_ph).
+    from pformat_results import collect_scenario_results, write_scenario_results
+
+    scenarios = ph._scenario_tree._scenarios
+    s2cd_dict, s2fp_dict = model_module.return_CP_and_path(p_data)
+    stochastic_run = temoa_options.scenario # Name of stochastic run
+    names = ['.'.join([stochastic_run, s.name]) for s in scenarios]
+    dot_dats = [[os.path.join(p_data, fname) for fname in s2fp_dict[s.name]] for s in scenarios]
+    msg = '\nStoring results from {} scenarios to database.\n'
+    sys.stderr.write(msg.format(len(scenarios)))
+    results = collect_scenario_results([s._instance for s in scenarios])
+    write_scenario_results(list(zip(names, results)), temoa_options, dot_dats)
+
+
+def solve_ph(p_model, p_data, temoa_options=None, solver=None, workers=1,
+             rho_factor=1.0, max_iterations=100, warmstart=True,
+             pyro_host=None, pyro_port=None):
+    """
+    solve_ph(p_model, p_data) -> expected cost of the stochastic program
+    Solves the model in p_model (ReferenceModel.py) on the tree in directory
+    p_data by Progressive Hedging. The solver, the number of workers, rho
+    factor and maximum number of iterations are read from temoa_options
+    when it gives them. With workers > 1, the scenarios are solved by local
+    phsolverservers, or by those already running on the Pyro name server of
+    pyro_host. With warmstart, the expected value problem is solved first.
+    The scenario results are written to the output database of temoa_options
+    when it gives one, which requires a single worker.
+    """
+    from pyomo.pysp.phinit import PH_DefaultOptions, PHFromScratch, PHCleanup
+
+    if temoa_options is not None:
+        solver = temoa_options.solver or solver
+        workers = getattr(temoa_options, 'ph_workers', None) or workers
+        rho_factor = getattr(temoa_options, 'ph_rho_factor', None) or rho_factor
+        max_iterations = getattr(temoa_options, 'ph_max_iterations', None) or max_iterations
+        if getattr(temoa_options, 'output', None) and (workers > 1 or pyro_host is not None):
+            # phsolverservers only send back the values of the non-anticipative
+            # variables, the scenario results can not be written to the database
+            raise ValueError('Results of Progressive Hedging can only be written to the output database when PH '
+                             'solves the scenarios itself, use --ph_workers 1 or no --output')
+        if getattr(temoa_options, 'reduce_scenarios', None) or getattr(temoa_options, 'reduce_tolerance', None):
+            from temoa_reduction import reduce_tree
+            p_data, kept, distance = reduce_tree(
+                p_data,
+                n_scenarios=temoa_options.reduce_scenarios,
+                tolerance=temoa_options.reduce_tolerance,
+                method=temoa_options.reduce_method)
+            msg = '\nScenario tree reduced to {} scenarios (distance {:.6g}): {}\n'
+            sys.stderr.write(msg.format(len(kept), distance, p_data))
+    if solver is None:
+        raise ValueError('No solver given for Progressive Hedging')
+    p_data = os.path.abspath(p_data)
+    model_module = import_model(p_model)
+
+    values = None
+    if warmstart:
+        ev_instance = solve_expected_value(p_model, write_expected_value(p_data), solver)
+        values = variable_values(ev_instance)
+        msg = '\nExpected value problem solved, objective {}\n'
+        sys.stderr.write(msg.format(ev_instance.TotalCost()))
+    write_ph_data(p_data, rho_factor, values)
+
+    options = PH_DefaultOptions()
+    options.model_directory = os.path.dirname(os.path.abspath(p_model))
+    options.instance_directory = p_data
+    options.solver_type = solver
+    options.max_iterations = max_iterations
+    # this file, not its compiled version
+    options.rho_cfgfile = re.sub(r'\.pyc$', '.py', os.path.abspath(__file__))
+
+    processes = []
+    ph = None
+    try:
+        if workers > 1 or pyro_host is not None:
+            if pyro_host is None:
+                pyro_host = '127.0.0.1'
+                processes, pyro_port = start_workers(workers, pyro_host)
+                options.phpyro_required_workers = workers
+            options.solver_manager_type = 'phpyro'
+            options.pyro_host = pyro_host
+            options.pyro_port = pyro_port
+
+        ph = PHFromScratch(options)
+        ph._iteration_0_has_warmstart = values is not None
+        failed = ph.solve()
+        if failed is not None:
+            raise RuntimeError('Progressive Hedging failed to solve scenarios: {}'.format(failed))
+        ph_obj = ph._scenario_tree.findRootNode().computeExpectedNodeCost()
+
+        if temoa_options is not None and getattr(temoa_options, 'output', None):
+            write_ph_results(model_module, p_data, ph, temoa_options)
+    finally:
+        PHCleanup(ph)
+        stop_workers(processes)
+
+    return ph_obj
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Solve a stochastic Temoa tree by Progressive Hedging.')
+    parser.add_argument('p_model', help='model file, ReferenceModel.py')
+    parser.add_argument('p_data', help='directory of ScenarioStructure.dat and the node files')
+    parser.add_argument('--solver', required=True)
+    parser.add_argument('--workers', type=int, default=1, help='number of local phsolverservers')
+    parser.add_argument('--rho_factor', type=float, default=1.0, help='rho of capacity variables per unit of CostInvest')
+    parser.add_argument('--max_iterations', type=int, default=100)
+    parser.add_argument('--no_warmstart', action='store_true', help='do not solve the expected value problem first')
+    parser.add_argument('--pyro_host', default=None, help='host of the name server of running phsolverservers')
+    parser.add_argument('--pyro_port', type=int, default=None)
+    args = parser.parse_args()
+
+    print(solve_ph(args.p_model, args.p_data, solver=args.solver, workers=args.workers,
+                   rho_factor=args.rho_factor, max_iterations=args.max_iterations,
+                   warmstart=not args.no_warmstart, pyro_host=args.pyro_host, pyro_port=args.pyro_port))
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# ---------------------------------------------------------------
+# Scenario reduction of a stochastic tree.
+#
+# The extensive form grows as branches^stages. Before it is built, the tree
+# written by generate_scenario_tree.py can be reduced to a subset of its
+# scenarios: each scenario is the vector of the parameter values of the node
+# files on its path (e.g. CapReduction), scenarios are compared by the
+# euclidean distance of these vectors, and the scenarios kept are chosen by
+# fast forward selection or backward reduction (Heitsch and Romisch, 2003,
+# Scenario reduction algorithms in stochastic programming, Comput Optim Appl
+# 24:187-206). The probability of each removed scenario goes to the nearest
+# scenario kept, and the conditional probabilities of the nodes are computed
+# again from the probabilities of the scenarios.
+#
+#   p_data, kept, distance = reduce_tree( 'stoch_T_0', n_scenarios=20 )
+#   solve_ef( 'ReferenceModel.py', p_data, temoa_options )
+#
+# or from the command line:
+#
+#   python temoa_reduction.py stoch_T_0 --scenarios 20
+# ---------------------------------------------------------------
+
+import os
+import re
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+
+structure_file = 'ScenarioStructure.dat'
+
+# Sets and parameters of ScenarioStructure.dat
+structure_re = re.compile(r'^\s*(set|param)\s+([^\s:]+)\s*:=(.*?);', re.MULTILINE | re.DOTALL)
+# Parameters of a node file
+param_re = re.compile(r'^\s*param\s+(\w+)[^:;]*:=(.*?);', re.MULTILINE | re.DOTALL)
+
+
+def read_structure(p_data):
+    """
+    Sets and parameters of the ScenarioStructure.dat in directory p_data,
+    {(kind, name): list of elements}, in the order of the file.
+    """
+    with open(os.path.join(p_data, structure_file)) as f:
+        text = re.sub(r'#.*', '', f.read())
+    structure = OrderedDict()
+    for kind, name, elements in structure_re.findall(text):
+        structure[(kind, name)] = elements.split()
+    return structure
+
+
+def scenario_tree(structure):
+    """
+    Scenarios of a tree, as an ordered dict of scenario name to (leaf node,
+    nodes of its path from the root, probability), and the conditional
+    probabilities of the nodes.
+    """
+    if structure.get(('param', 'ScenarioBasedData'), ['False'])[0] != 'False':
+        raise ValueError('Only trees with node data (ScenarioBasedData False) can be reduced')
+
+    cond_prob = dict()
+    elements = structure[('param', 'ConditionalProbability')]
+    for node, prob in zip(elements[0::2], elements[1::2]):
+        cond_prob[node] = float(prob)
+
+    parent = dict()
+    for (kind, name), children in structure.items():
+        if name.startswith('Children['):
+            for child in children:
+                parent[child] = name[len('Children['):-1]
+
+    scenarios = OrderedDict()
+    elements = structure[('param', 'ScenarioLeafNode')]
+    for scenario, leaf in zip(elements[0::2], elements[1::2]):
+        path = [leaf]
+        while path[-1] in parent:
+            path.append(parent[path[-1]])
+        path.reverse()
+        prob = 1.0
+        for node in path:
+            prob *= cond_prob[node]
+        scenarios[scenario] = (leaf, path, prob)
+
+    return scenarios, cond_prob
+
+
+def read_node_data(fname):
+    """Values of the parameters of a node file, {(param, index): value}."""
+    data = dict()
+    if not os.path.exists(fname):
+        return data
+    with open(fname) as f:
+        text = re.sub(r'#.*', '', f.read())
+    for name, rows in param_re.findall(text):
+        items = rows.split()
+        if not items:
+            continue
+        # rows of the index then the value
+        width = len(rows.strip().split('\n', 1)[0].split())
+        index = [tuple(items[i:i + width - 1]) for i in range(0, len(items), width)]
+        data.update(zip([(name, i) for i in index], map(float, items[width - 1::width])))
+    return data
+
+
+def scenario_vectors(p_data, scenarios, missing=1.0):
+    """
+    Matrix of the parameter values of the node files on the path of each
+    scenario (one row per scenario). The root node (R.dat, the reference
+    model) is the same for all scenarios and is left out. Values a node file
+    does not give, that other nodes of the same stage give, are missing (the
+    default of CapReduction).
+    """
+    depth = max(len(path) for leaf, path, prob in scenarios.values())
+    columns = []
+    for stage in range(1, depth):
+        nodes = sorted(set(path[stage] for leaf, path, prob in scenarios.values() if len(path) > stage))
+        data = dict((node, read_node_data(os.path.join(p_data, node + '.dat'))) for node in nodes)
+        keys = sorted(set(key for values in data.values() for key in values))
+        stage_values = dict((node, np.array([data[node].get(key, missing) for key in keys])) for node in nodes)
+        columns.append((keys, stage_values))
+
+    vectors = np.empty((len(scenarios), sum(len(keys) for keys, stage_values in columns)))
+    for i, (leaf, path, prob) in enumerate(scenarios.values()):
+        col = 0
+        for stage, (keys, stage_values) in enumerate(columns, 1):
+            if stage < len(path):
+                vectors[i, col:col + len(keys)] = stage_values[path[stage]]
+            else:
+                vectors[i, col:col + len(keys)] = missing
+            col += len(keys)
+    return vectors
+
+
+def distances(vectors):
+    """Euclidean distance of each pair of scenarios."""
+    sq = (vectors ** 2).sum(axis=1)
+    d = sq[:, None] + sq[None, :] - 2.0 * vectors.dot(vectors.T)
+    np.maximum(d, 0.0, out=d)
+    np.fill_diagonal(d, 0.0)
+    return np.sqrt(d, out=d)
+
+
+def redistribute(d, prob, kept):
+    """
+    Probabilities of the scenarios kept, each given the probability of the
+    removed scenarios nearest to it, and the (Kantorovich) distance of the
+    reduced distribution to the original one.
+    """
+    nearest = np.argmin(d[:, kept], axis=1)
+    new_prob = np.bincount(nearest, weights=prob, minlength=len(kept))
+    distance = float(prob.dot(d[np.arange(len(prob)), np.asarray(kept)[nearest]]))
+    return new_prob, distance
+
+
+block_size = 256
+
+
+def forward_selection(d, prob, n_scenarios=None, tolerance=None):
+    """
+    Fast forward selection: scenarios are selected one at a time, each the
+    one that most reduces the distance to the original distribution, until
+    n_scenarios are selected or the distance is at most tolerance times the
+    distance of the best single scenario. Returns the indices selected.
+    """
+    n = len(prob)
+    if n_scenarios is None:
+        n_scenarios = n
+    selected = []
+    c = None  # distance of each scenario to the nearest selected one
+    first = None
+    while len(selected) < min(n_scenarios, n):
+        if c is None:
+            z = prob.dot(d)
+        else:
+            # by blocks of rows, d is not copied whole
+            z = np.zeros(n)
+            for start in range(0, n, block_size):
+                rows = slice(start, start + block_size)
+                z += prob[rows].dot(np.minimum(c[rows, None], d[rows]))
+        z[selected] = np.inf
+        u = int(np.argmin(z))
+        selected.append(u)
+        c = d[:, u].copy() if c is None else np.minimum(c, d[:, u])
+        if first is None:
+            first = z[u]
+        if tolerance is not None and z[u] <= tolerance * first:
+            break
+    return sorted(selected)
+
+
+def backward_reduction(d, prob, n_scenarios=None, tolerance=None):
+    """
+    Backward reduction: scenarios are removed one at a time, each the one of
+    least probability times distance to its nearest remaining scenario, that
+    is given its probability, until n_scenarios remain or removing one more
+    would take the distance past tolerance times the distance of the best
+    single scenario (bounded by the probability moved times the distance
+    moved). Returns the indices kept.
+    """
+    n = len(prob)
+    if n_scenarios is None:
+        n_scenarios = 1
+    kept = np.ones(n, dtype=bool)
+    q = prob.astype(float).copy()
+    dk = d.copy()
+    np.fill_diagonal(dk, np.inf)
+    nearest = np.argmin(dk, axis=1)
+    nearest_d = dk[np.arange(n), nearest]
+    limit = np.inf if tolerance is None else tolerance * prob.dot(d).min()
+    moved = 0.0
+    while kept.sum() > max(n_scenarios, 1):
+        z = np.where(kept, q * nearest_d, np.inf)
+        l = int(np.argmin(z))
+        if moved + z[l] > limit:
+            break
+        moved += z[l]
+        kept[l] = False
+        q[nearest[l]] += q[l]
+        dk[:, l] = np.inf
+        for k in np.flatnonzero(kept & (nearest == l)):
+            nearest[k] = np.argmin(dk[k])
+            nearest_d[k] = dk[k, nearest[k]]
+    return list(np.flatnonzero(kept))
+
+
+reduction_methods = {
+    'forward': forward_selection,
+    'backward': backward_reduction,
+}
+
+
+def write_structure(fname, structure, scenarios, kept, new_prob):
+    # ScenarioStructure.dat of the scenarios kept, other sets and parameters
+    # (stages, stage variables, stage costs) as in the original
+    names = list(scenarios.keys())
+    node_prob = dict()
+    for i, p in zip(kept, new_prob):
+        for node in scenarios[names[i]][1]:
+            node_prob[node] = node_prob.get(node, 0.0) + p
+
+    parent = dict()
+    for i in kept:
+        path = scenarios[names[i]][1]
+        for a, b in zip(path[:-1], path[1:]):
+            parent[b] = a
+
+    def keep_pairs(elements, test):
+        pairs = zip(elements[0::2], elements[1::2])
+        return ['  '.join(pair) for pair in pairs if test(pair)]
+
+    lines = []
+    for (kind, name), elements in structure.items():
+        if name == 'Scenarios':
+            elements = [names[i] for i in kept]
+        elif name == 'Nodes':
+            elements = [node for node in elements if node in node_prob]
+        elif name.startswith('Children['):
+            if name[len('Children['):-1] not in node_prob:
+                continue
+            elements = [node for node in elements if node in node_prob]
+        elif name == 'NodeStage':
+            elements = keep_pairs(elements, lambda pair: pair[0] in node_prob)
+        elif name == 'ConditionalProbability':
+            elements = []
+            for node in structure[(kind, name)][0::2]:
+                if node in node_prob:
+                    cond = node_prob[node] / node_prob[parent[node]] if node in parent else 1.0
+                    elements.append('{}  {!r}'.format(node, float(cond)))
+        elif name == 'ScenarioLeafNode':
+            scenario_names = set(names[i] for i in kept)
+            elements = keep_pairs(elements, lambda pair: pair[0] in scenario_names)
+        elif name == 'StageCostVariable':
+            elements = keep_pairs(elements, lambda pair: True)
+
+        if len(elements) == 1 and kind == 'param':
+            lines.append('{}  {}  :=  {} ;\n'.format(kind, name, elements[0]))
+        else:
+            lines.append('{}  {}  :=\n  {}\n\t;\n'.format(kind, name, '\n  '.join(elements)))
+
+    with open(fname, 'w') as f:
+        f.write('\n'.join(lines))
+
+
+def reduce_tree(p_data, output=None, n_scenarios=None, tolerance=None, method='forward', missing=1.0):
+    """
+    reduce_tree(p_data) -> (output, names of the scenarios kept, distance)
+    Reduce the scenario tree in directory p_data to n_scenarios scenarios, or
+    to the fewest scenarios within tolerance (relative to the distance of the
+    best single scenario), by method 'forward' (fast forward selection,
+    suited to keeping few scenarios) or 'backward' (backward reduction, suited
+    to removing few). The reduced tree is written to directory output
+    (default p_data + '_reduced') with the node files of the nodes kept.
+    """
+    if n_scenarios is None and tolerance is None:
+        raise ValueError('Give the number of scenarios to keep or a tolerance')
+    if method not in reduction_methods:
+        raise ValueError('Unknown reduction method {}, expected one of {}'.format(
+            method, sorted(reduction_methods)))
+
+    structure = read_structure(p_data)
+    scenarios, cond_prob = scenario_tree(structure)
+    prob = np.array([p for leaf, path, p in scenarios.values()])
+    d = distances(scenario_vectors(p_data, scenarios, missing))
+
+    kept = reduction_methods[method](d, prob, n_scenarios, tolerance)
+    new_prob, distance = redistribute(d, prob, kept)
+
+    if output is None:
+        output = os.path.normpath(p_data) + '_reduced'
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+
+    names = list(scenarios.keys())
+    nodes = set(node for i in kept for node in scenarios[names[i]][1])
+    for fname in ['ReferenceModel.dat'] + sorted(node + '.dat' for node in nodes):
+        if os.path.exists(os.path.join(p_data, fname)):
+            shutil.copyfile(os.path.join(p_data, fname), os.path.join(output, fname))
+    write_structure(os.path.join(output, structure_file), structure, scenarios, kept, new_prob)
+
+    return output, [names[i] for i in kept], distance
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reduce the scenarios of a stochastic Temoa tree.')
+    parser.add_argument('p_data', help='directory of ScenarioStructure.dat and the node files')
+    parser.add_argument('--scenarios', type=int, default=None, help='number of scenarios to keep')
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help='distance allowed, relative to the distance of the best single scenario')
+    parser.add_argument('--method', choices=sorted(reduction_methods), default='forward')
+    parser.add_argument('--output', default=None, help='directory of the reduced tree')
+    args = parser.parse_args()
+
+    output, kept, distance = reduce_tree(args.p_data, args.output, args.scenarios, args.tolerance, args.method)
+    print('Kept {} scenarios, distance {:.6g}, written to {}'.format(len(kept), distance, output))
@@ -121,8 +121,22 @@ def solve_ef(p_model, p_data, temoa_options = None):
     mdoel, where ScenarioStructure.dat should resides.
     Returns a float point number of the value of objective function for the
     stochastic program model.
+    If temoa_options asks for scenario reduction (reduce_scenarios or
+    reduce_tolerance), the tree is reduced first and the extensive form is
+    built from the reduced tree (see temoa_reduction.py).
     """
 
+    if temoa_options is not None and (
+      getattr(temoa_options, 'reduce_scenarios', None) or
+      getattr(temoa_options, 'reduce_tolerance', None) ):
+        from temoa_reduction import reduce_tree
+        p_data, kept, distance = reduce_tree( p_data,
+          n_scenarios=temoa_options.reduce_scenarios,
+          tolerance=temoa_options.reduce_tolerance,
+          method=temoa_options.reduce_method )
+        msg = '\nScenario tree reduced to {} scenarios (distance {:.6g}): {}\n'
+        sys.stderr.write( msg.format( len(kept), distance, p_data ))
+
     options = ScenarioTreeManagerClientSerial.register_options()
 
     if os.path.basename(p_model) == 'ReferenceModel.py':
@@ -149,7 +163,7 @@ def solve_ef(p_model, p_data, temoa_options = None):
         # Write to database
         if hasattr(temoa_options, 'output'):
 			sys.path.append(options.model_location)
-			from pformat_results import pformat_results
+			from pformat_results import collect_scenario_results, write_scenario_results
 			# from temoa_config import TemoaConfig
 			# temoa_options = TemoaConfig()
 			# temoa_options.config = temoa_options.config
@@ -162,21 +176,19 @@ def solve_ef(p_model, p_data, temoa_options = None):
 			# kludge to use return_CP_and_path() function
 			s2cd_dict, s2fp_dict = return_CP_and_path(p_data)
 			stochastic_run = temoa_options.scenario # Name of stochastic run
-			for s in manager.scenario_tree.scenarios:
-				ins = s._instance
-				temoa_options.scenario = '.'.join( [stochastic_run, s.name] )
-				temoa_options.dot_dat = list()
-				for fname in s2fp_dict[s.name]:
-					temoa_options.dot_dat.append(
-						os.path.join(options.scenario_tree_location, fname)
-					)
-				# temoa_options.output = os.path.join(
-				#     options.scenario_tree_location, 
-				#     stochastic_output
-				#     )
-				msg = '\nStoring results from scenario {} to database.\n'.format(s.name)
-				sys.stderr.write(msg)
-				formatted_results = pformat_results( ins, ef_result, temoa_options )
+			scenarios = manager.scenario_tree.scenarios
+			names = [ '.'.join( [stochastic_run, s.name] ) for s in scenarios ]
+			dot_dats = [
+				[ os.path.join(options.scenario_tree_location, fname)
+				  for fname in s2fp_dict[s.name] ]
+				for s in scenarios
+			]
+			# The results of the scenarios are read in parallel, then written to
+			# the database in a single transaction
+			msg = '\nStoring results from {} scenarios to database.\n'
+			sys.stderr.write(msg.format(len(scenarios)))
+			results = collect_scenario_results( [s._instance for s in scenarios] )
+			write_scenario_results( zip(names, results), temoa_options, dot_dats )
 
     ef_instance.solutions.store_to( ef_result )
     ef_obj = value( ef_instance.EF_EXPECTED_COST.values()[0] )
@@ -203,4 +215,8 @@ if __name__ == "__main__":
     p_dot_dat = temoa_options.dot_dat[0] # must be ScenarioStructure.dat
     p_data = os.path.dirname(p_dot_dat)
     print p_model, p_data
-    print solve_ef(p_model, p_data, temoa_options)
+    if temoa_options.ph:
+        from temoa_ph import solve_ph
+        print solve_ph(p_model, p_data, temoa_options)
+    else:
+        print solve_ef(p_model, p_data, temoa_options)
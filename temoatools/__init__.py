@@ -8,7 +8,11 @@ from .move_data_to_universal_db import move_data_to_db
 from .temoa_model_build import build
 from .temoa_model_build import createSensitivityCases
 from .temoa_model_build import createMonteCarloCases
+from .temoa_model_delta import compileBaseline
+from .temoa_model_delta import buildCase
 from .temoa_model_run import run
+from .temoa_model_run import run_inprocess
+from .results_database import ResultsDatabase
 from .analyze_activity_tod import getActivityTOD
 from .analyze_activity_year import getActivity
 from .analyze_capacity import getCapacity
@@ -16,11 +20,21 @@ from .analyze_capacity_new import getCapacityNew
 from .analyze_costs import getCosts
 from .analyze_emissions import getEmissions
 from .fragility_curves import fragility
+from .fragility_curves import fragility_many
+from .fragility_curves import FragilityLibrary
+from .hurricane_ensemble import hurricane_branches
+from .hurricane_ensemble import cap_reduction_rates
+from .hurricane_ensemble import write_scenario_tree
 from .stochastic_postprocessing import stoch_expand
 from .stochastic_postprocessing import stoch_resample
+from .stochastic_postprocessing import weighted_mean
+from .stochastic_postprocessing import weighted_cdf
+from .stochastic_postprocessing import weighted_quantile
 from .combine_data_files import combine
 from .monte_carlo_inputs import createMonteCarloCases_distributions
 from .combined_analysis import analyze_db
+from .batch import BatchRunner
+from .batch import run_batch
 
 # storing where resources folder is
 resource_path = os.path.join(os.path.split(__file__)[0], "resources")
\ No newline at end of file
@@ -1,5 +1,4 @@
 import os
-import sqlite3
 import pandas as pd
 import temoatools as tt
 
@@ -9,7 +8,7 @@ resolution = 600  # DPI
 
 # ==============================================================================
 def getActivity(folders, dbs, switch='fuel', sector_name='electric', save_data='N', create_plots='N',
-                conversion=277.777778, run_name=''):
+                conversion=277.777778, run_name='', results=None):
     #    inputs:
     #    1) folders         - paths containing dbs (list or single string if all in the same path)
     #    2) dbs             - names of databases (list)
@@ -19,6 +18,7 @@ def getActivity(folders, dbs, switch='fuel', sector_name='electric', save_data='
     #    6) create_plots      - 'Y' or 'N', default is 'N'
     #    7) conversion      - conversion to GWh, default is 277.778 (from PJ).
     #    8) run_name         - Used for saving results in dedicated folder
+    #    9) results         - ResultsDatabase shared with other analyses, only used with a single db
 
     #    outputs:
     #    1) activity     - pandas DataFrame holding capacity for each model year
@@ -48,7 +48,8 @@ def getActivity(folders, dbs, switch='fuel', sector_name='electric', save_data='
 
     # Iterate through each db
     for folder, db in zip(folders, dbs):
-        activity_single = SingleDB(folder, db, switch=switch, sector_name=sector_name, conversion=conversion)
+        activity_single = SingleDB(folder, db, switch=switch, sector_name=sector_name, conversion=conversion,
+                                   results=results)
         activity = pd.concat([activity, activity_single])
 
     # Reset index (remove multi-level indexing, easier to use in Excel)
@@ -101,66 +102,28 @@ def getActivity(folders, dbs, switch='fuel', sector_name='electric', save_data='
 
 
 # ==============================================================================
-def SingleDB(folder, db, switch='fuel', sector_name='electric', conversion=277.777778):
+def SingleDB(folder, db, switch='fuel', sector_name='electric', conversion=277.777778, results=None):
     #    inputs:
     #    1) folder          - path containing db
     #    2) db              - name of database
     #    3) switch          - 'fuel' or 'tech', basis of categorization
     #    4) sectorName      - name of temoa sector to be analyzed
     #    5) conversion      - conversion to GWh, default is 277.778 (from PJ)
+    #    6) results         - ResultsDatabase shared with other analyses, opened here if not provided
     #    outputs:
     #    1) activity     - pandas DataFrame holding capacity for each model year
     # ==============================================================================
     print("\tAnalyzing db: ", db)
 
-    # save original folder
-    origDir = os.getcwd()
-
-    # move to folder
-    os.chdir(folder)
-
     # Connect to Database
-    con = sqlite3.connect(db)
-    cur = con.cursor()
-
-    # Read from database:
-    #   Select All Efficiencies
-    qry = "SELECT * FROM Efficiency"
-    cur.execute(qry)
-    db_efficiency = cur.fetchall()
-    #   Select All time_periods
-    qry = "SELECT * FROM time_periods"
-    cur.execute(qry)
-    db_t_periods = cur.fetchall()
-    #   Select All technologies
-    qry = "SELECT * FROM technologies"
-    cur.execute(qry)
-    db_technologies = cur.fetchall()
-    #   Select All Flows
-    qry = "SELECT * FROM Output_VFlow_Out"
-    cur.execute(qry)
-    db_Output_VFlow_Out = cur.fetchall()
-
-    # Review db_t_periods to select future time periods
-    future_t_periods = []
-    for t_periods, flag in db_t_periods:
-        if flag == 'f':
-            if t_periods not in future_t_periods:
-                future_t_periods.append(t_periods)
-
-    # Review db_technologies to select related sector
-    techs = []
-    for tech, flag, sector, tech_desc, tech_category in db_technologies:
-        if sector == sector_name or sector_name == "all":
-            if tech not in techs:
-                techs.append(tech)
-
-    # Review db_efficiency to create a dictionary of fuels
-    d = {}
-    for input_comm, tech, vintage, output_comm, efficiency, ef_notes in db_efficiency:
-        if tech in techs:
-            if tech not in d.keys():
-                d[tech] = input_comm
+    close = results is None
+    if results is None:
+        results = tt.ResultsDatabase(folder, db)
+
+    # Future time periods, technologies in the related sector and their fuels
+    future_t_periods = sorted(results.future_periods())
+    techs = results.technologies(sector_name)
+    d = results.tech_fuels(techs)
 
     # Sort data and assign as columns and rows
     if switch == 'fuel':
@@ -168,35 +131,28 @@ def SingleDB(folder, db, switch='fuel', sector_name='electric', conversion=277.7
     elif switch == 'tech':
         cols = sorted(techs)
 
-    future_t_periods = sorted(future_t_periods)
-
     #   Identify Unique Scenarios
-    qry = "SELECT * FROM Output_Objective"
-    cur.execute(qry)
-    db_objective = cur.fetchall()
-    scenarios = []
-    for scenario, objective_name, total_system_cost in db_objective:
-        if scenario not in scenarios:
-            scenarios.append(scenario)
+    scenarios = results.scenarios()
 
     # Create pandas DataFrame to hold activity for all scenarios
     index = pd.MultiIndex.from_product([[db], scenarios, cols], names=['database', 'scenario', 'fuelOrTech'])
     df = pd.DataFrame(index=index, columns=future_t_periods[:-1], dtype='float64')
     df = df.fillna(0.0)  # Default value to zero
 
-    ## Review db_Output_VFlow_Out to fill data frame
-    for scenario, sector, t_periods, t_season, t_day, input_comm, tech, vintage, output_comm, vflow_out in db_Output_VFlow_Out:
-        if sector == sector_name or sector_name == "all":
-            if switch == 'fuel':
-                df.loc[(db, scenario, d[tech]), t_periods] = df.loc[(db, scenario,
-                                                                     d[tech]), t_periods] + vflow_out * conversion
-            elif switch == 'tech':
-                df.loc[(db, scenario, tech), t_periods] = df.loc[
-                                                              (db, scenario, tech), t_periods] + vflow_out * conversion
+    # Sum flows by scenario, period and technology
+    where = {} if sector_name == "all" else {'sector': sector_name}
+    flows = results.aggregate('Output_VFlow_Out', ['scenario', 't_periods', 'tech'], 'vflow_out', where=where)
+    if close:
+        results.close()
 
-    # return to original folder
-    os.chdir(origDir)
+    # Categorize by fuel or technology and add to data frame
+    if switch == 'fuel':
+        flows['fuelOrTech'] = flows.tech.map(d)
+    elif switch == 'tech':
+        flows['fuelOrTech'] = flows.tech
+    flows['database'] = db
+    flows = flows.groupby(['database', 'scenario', 'fuelOrTech', 't_periods']).value.sum().unstack('t_periods')
+    df = df + flows.reindex(index=df.index, columns=df.columns).fillna(0.0) * conversion
 
     # return as a DataFrame
-    # activity = df2
     return df
@@ -1,5 +1,4 @@
 import os
-import sqlite3
 import pandas as pd
 import temoatools as tt
 
@@ -15,7 +14,7 @@ def name(db):
 
 # ==============================================================================
 def getCapacityNew(folders, dbs, switch='fuel', sector_name='electric', save_data='N', create_plots='N',
-                run_name=''):
+                run_name='', results=None):
     #    inputs:
     #    1) folders         - paths containing dbs (list or single string if all in the same path)
     #    2) dbs             - names of databases (list)
@@ -24,6 +23,7 @@ def getCapacityNew(folders, dbs, switch='fuel', sector_name='electric', save_dat
     #    5) saveData         - 'Y' or 'N', default is 'N'
     #    6) createPlot      - 'Y' or 'N', default is 'N'
     #    7) run_name         - Used for saving results in dedicated folder
+    #    8) results         - ResultsDatabase shared with other analyses, only used with a single db
     #
     #    outputs:
     #    1) capacity     - pandas DataFrame holding capacity for each model year
@@ -53,7 +53,7 @@ def getCapacityNew(folders, dbs, switch='fuel', sector_name='electric', save_dat
 
     # Iterate through each db
     for folder, db in zip(folders, dbs):
-        capacity_single = SingleDB(folder, db, switch=switch, sector_name=sector_name)
+        capacity_single = SingleDB(folder, db, switch=switch, sector_name=sector_name, results=results)
         capacity = pd.concat([capacity, capacity_single])
 
     # Reset index (remove multi-level indexing, easier to use in Excel)
@@ -108,66 +108,28 @@ def getCapacityNew(folders, dbs, switch='fuel', sector_name='electric', save_dat
 
 
 # ==============================================================================
-def SingleDB(folder, db, switch='fuel', sector_name='electric'):
+def SingleDB(folder, db, switch='fuel', sector_name='electric', results=None):
     #    inputs:
     #    1) folder          - path containing db
     #    2) db              - name of databas
     #    3) switch          - 'fuel' or 'tech', basis of categorization
     #    5) sectorName      - name of temoa sector to be analyzed
+    #    6) results         - ResultsDatabase shared with other analyses, opened here if not provided
     #
     #    outputs:
     #    1) capacity     - pandas DataFrame holding capacity for each model year
     # ==============================================================================
     print("\tAnalyzing db: ", db)
 
-    # save original folder
-    origDir = os.getcwd()
-
-    # move to folder
-    os.chdir(folder)
-
     # Connect to Database
-    con = sqlite3.connect(db)
-    cur = con.cursor()
-
-    # Read from database:
-    #   Select All Efficiencies
-    qry = "SELECT * FROM Efficiency"
-    cur.execute(qry)
-    db_efficiency = cur.fetchall()
-    #   Select All time_periods
-    qry = "SELECT * FROM time_periods"
-    cur.execute(qry)
-    db_t_periods = cur.fetchall()
-    #   Select All technologies
-    qry = "SELECT * FROM technologies"
-    cur.execute(qry)
-    db_technologies = cur.fetchall()
-    #   Select All Capacities
-    qry = "SELECT * FROM Output_V_Capacity"
-    cur.execute(qry)
-    db_Output_CapacityByPeriodAndTech = cur.fetchall()
-
-    # Review db_t_periods to select future time periods
-    future_t_periods = []
-    for t_periods, flag in db_t_periods:
-        if flag == 'f':
-            if t_periods not in future_t_periods:
-                future_t_periods.append(t_periods)
-
-    # Review db_technologies to select related sector
-    techs = []
-    for tech, flag, sector, tech_desc, tech_category in db_technologies:
-        if sector == sector_name or sector_name == "all":
-            if tech not in techs:
-                techs.append(tech)
-
-    # Review db_efficiency to create a dictionary of fuels
-    d = {}
-    for input_comm, tech, vintage, output_comm, efficiency, ef_notes in db_efficiency:
-        if tech in techs:
-            if tech not in d.keys():
-                d[tech] = input_comm
+    close = results is None
+    if results is None:
+        results = tt.ResultsDatabase(folder, db)
+
+    # Future time periods, technologies in the related sector and their fuels
+    future_t_periods = sorted(results.future_periods())
+    techs = results.technologies(sector_name)
+    d = results.tech_fuels(techs)
 
     # Sort data and assign as columns and rows
     if switch == 'fuel':
@@ -175,41 +137,34 @@ def SingleDB(folder, db, switch='fuel', sector_name='electric'):
     elif switch == 'tech':
         cols = sorted(techs)
 
-    future_t_periods = sorted(future_t_periods)
     rows = future_t_periods[:-1]
     rows.append('Initial')
 
     #   Identify Unique Scenarios
-    qry = "SELECT * FROM Output_Objective"
-    cur.execute(qry)
-    db_objective = cur.fetchall()
-    scenarios = []
-    for scenario, objective_name, total_system_cost in db_objective:
-        if scenario not in scenarios:
-            scenarios.append(scenario)
+    scenarios = results.scenarios()
 
     # Create pandas DataFrame to hold new capacity for all scenarios
     index = pd.MultiIndex.from_product([[db], scenarios, cols], names=['database', 'scenario', 'fuelOrTech'])
     df = pd.DataFrame(index=index, columns=rows, dtype='float64')
     df = df.fillna(0.0)  # Default value to zero
 
-    # Review db_Output_V_Capacity to fill data frame with capacity installed during time horizon
-    for scenario, sector, tech, vintage, capacity in db_Output_CapacityByPeriodAndTech:
-        if vintage in future_t_periods:
-            if sector == sector_name or sector_name == "all":
-                if switch == 'fuel':
-                    df.loc[(db, scenario, d[tech]), vintage] = df.loc[(db, scenario, d[tech]), vintage] + capacity
-                elif switch == 'tech':
-                    df.loc[(db, scenario, tech), vintage] = df.loc[(db, scenario, tech), vintage] + capacity
-        else:  # initial capacity
-            if sector == sector_name or sector_name == "all":
-                if switch == 'fuel':
-                    df.loc[(db, scenario, d[tech]), 'Initial'] = df.loc[(db, scenario, d[tech]), 'Initial'] + capacity
-                elif switch == 'tech':
-                    df.loc[(db, scenario, tech), 'Initial'] = df.loc[(db, scenario, tech), 'Initial'] + capacity
-
-    # return to original folder
-    os.chdir(origDir)
+    # Sum new capacity by scenario, vintage and technology
+    where = {} if sector_name == "all" else {'sector': sector_name}
+    capacity = results.aggregate('Output_V_Capacity', ['scenario', 'vintage', 'tech'], 'capacity', where=where)
+    if close:
+        results.close()
+
+    # Capacity installed during time horizon by vintage, capacity installed before as initial capacity
+    capacity['vintage'] = capacity.vintage.astype(object).where(capacity.vintage.isin(future_t_periods), 'Initial')
+
+    # Categorize by fuel or technology and add to data frame
+    if switch == 'fuel':
+        capacity['fuelOrTech'] = capacity.tech.map(d)
+    elif switch == 'tech':
+        capacity['fuelOrTech'] = capacity.tech
+    capacity['database'] = db
+    capacity = capacity.groupby(['database', 'scenario', 'fuelOrTech', 'vintage']).value.sum().unstack('vintage')
+    df = df + capacity.reindex(index=df.index, columns=df.columns).fillna(0.0)
 
     # return capacity as a DataFrame
     return df
@@ -1,5 +1,5 @@
 import os
-import sqlite3
+import numpy as np
 import pandas as pd
 import temoatools as tt
 
@@ -8,7 +8,8 @@ resolution = 600  # DPI
 
 
 # ==============================================================================
-def getCosts(folders, dbs, elc_dmd='ELC_DMD', conversion=0.359971, save_data='N', create_plots='N', run_name=''):
+def getCosts(folders, dbs, elc_dmd='ELC_DMD', conversion=0.359971, save_data='N', create_plots='N', run_name='',
+             results=None):
     #    inputs:
     #    1) folders         - paths containing dbs (list or single string if all in the same path)
     #    2) dbs             - names of databases (list)
@@ -18,6 +19,7 @@ def getCosts(folders, dbs, elc_dmd='ELC_DMD', conversion=0.359971, save_data='N'
     #    5) save_data         - 'Y' or 'N', default is 'N'
     #    6) create_plots     - 'Y' or 'N', default is 'N'
     #    7) run_name         - Used for saving results in dedicated folder
+    #    8) results         - ResultsDatabase shared with other analyses, only used with a single db
     #
     #    outputs:
     #    1) yearlyCosts     - pandas DataFrame holding yearly_costs
@@ -50,7 +52,8 @@ def getCosts(folders, dbs, elc_dmd='ELC_DMD', conversion=0.359971, save_data='N'
     # Iterate through each db
     for folder, db in zip(folders, dbs):
         # Access costs
-        yearlyCosts_single, LCOE_single = SingleDB(folder, db, elc_dmd=elc_dmd, conversion=conversion)
+        yearlyCosts_single, LCOE_single = SingleDB(folder, db, elc_dmd=elc_dmd, conversion=conversion,
+                                                   results=results)
 
         yearlyCosts = pd.concat([yearlyCosts, yearlyCosts_single])
         LCOE = pd.concat([LCOE, LCOE_single])
@@ -100,12 +103,13 @@ def getCosts(folders, dbs, elc_dmd='ELC_DMD', conversion=0.359971, save_data='N'
     # ==============================================================================
 
 
-def SingleDB(folder, db, elc_dmd='ELC_DMD', conversion=0.359971):
+def SingleDB(folder, db, elc_dmd='ELC_DMD', conversion=0.359971, results=None):
     #    inputs:
     #    1) folder          - path containing db
     #    2) db              - names of databases
     #    3) elc_dmd         - quantity that represents electricity demand
     #    4) conversion      - converts from cost units per activity to cents/kWH
+    #    5) results         - ResultsDatabase shared with other analyses, opened here if not provided
     #
     #    outputs:
     #    1) yearlyCosts     - pandas DataFrame holding yearly costs
@@ -113,125 +117,56 @@ def SingleDB(folder, db, elc_dmd='ELC_DMD', conversion=0.359971):
     # ==============================================================================
     print("\tAnalyzing db: ", db)
 
-    # Save original directory
-    origDir = os.getcwd()
-
-    # Move to folder
-    os.chdir(folder)
-
     # Connect to Database
-    con = sqlite3.connect(db)
-    cur = con.cursor()
+    close = results is None
+    if results is None:
+        results = tt.ResultsDatabase(folder, db)
 
     #   Identify Unique Scenarios
-    qry = 'SELECT * FROM Output_Objective'
-    cur.execute(qry)
-    db_objective = cur.fetchall()
-    scenarios = []
-    for scenario, objective_name, total_system_cost in db_objective:
-        if scenario not in scenarios:
-            scenarios.append(scenario)
+    scenarios = results.scenarios()
 
     # Review time_periods, only interested in future periods
-    qry = 'SELECT * FROM time_periods'
-    cur.execute(qry)
-    db_t_periods = cur.fetchall()
-
-    t_periods = []
-    for t_period, flag in db_t_periods:
-        if flag == 'f':
-            t_periods.append(t_period)
-
-    t_periods = sorted(t_periods)
+    t_periods = sorted(results.future_periods())
     t_periods = t_periods[:-1]
 
-    # Review technologies  
-    qry = "SELECT * FROM technologies"
-    cur.execute(qry)
-    db_tech = cur.fetchall()
-
-    techs = []
-    for tech, flag, sector, tech_desc, tech_category in db_tech:
-        techs.append(tech)
+    # Review technologies
+    techs = results.technologies()
 
     # ------------
-    # CostInvest
+    # Costs by period and technology (initialized to zero), last entry of each period and technology is used
     # ------------
-    # Access database
-    qry = "SELECT * FROM CostInvest"
-    cur.execute(qry)
-    db_CostInvest = cur.fetchall()
-
-    # Create dataframe to hold technology costs (initialized to zero)
-    rows = t_periods
-    cols = techs
-    df_CostInvest = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-    # Store Data
-    for tech, vintage, cost_invest, cost_invest_units, cost_invest_notes in db_CostInvest:
-        if vintage in t_periods and tech in techs:
-            df_CostInvest.loc[vintage, tech] = cost_invest
-
-    # ------------
-    # CostFixed
-    # ------------
-    # Access database
-    qry = "SELECT * FROM CostFixed"
-    cur.execute(qry)
-    db_CostFixed = cur.fetchall()
-
-    # Create dataframe to hold technology costs (initialized to zero)
-    rows = t_periods
-    cols = techs
-    df_CostFixed = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-    # Store Data
-    for periods, tech, vintage, cost_fixed, cost_fixed_units, cost_fixed_notes in db_CostFixed:
-        if periods in t_periods and tech in techs:
-            df_CostFixed.loc[periods, tech] = cost_fixed
-
-            # ------------
-    # CostVariable
-    # ------------
-    # Access database
-    qry = "SELECT * FROM CostVariable"
-    cur.execute(qry)
-    db_CostVariable = cur.fetchall()
-
-    # Create dataframe to hold technology costs (initialized to zero)
-    rows = t_periods
-    cols = techs
-    df_CostVariable = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-    # Store Data
-    for periods, tech, vintage, cost_variable, cost_variable_units, cost_variable_notes in db_CostVariable:
-        if periods in t_periods and tech in techs:
-            df_CostVariable.loc[periods, tech] = cost_variable
+    df_CostInvest = costTable(results.table('CostInvest'), 'vintage', 'cost_invest', t_periods, techs)
+    df_CostFixed = costTable(results.table('CostFixed'), 'periods', 'cost_fixed', t_periods, techs)
+    df_CostVariable = costTable(results.table('CostVariable'), 'periods', 'cost_variable', t_periods, techs)
 
     # ------------
     # Discount Rate
     # ------------
-    qry = "SELECT * FROM GlobalDiscountRate"
-    cur.execute(qry)
-    db_rate = cur.fetchall()
-    rate = db_rate[0][0]
+    rate = float(results.table('GlobalDiscountRate').rate.iloc[0])
 
     # ------------
     # LifetimeLoanTech
     # ------------
-    # Access database
-    qry = "SELECT * FROM LifetimeLoanTech"
-    cur.execute(qry)
-    db_loanLife = cur.fetchall()
-
-    # Create dataframe to hold yearly installs (initialized to zero)
-    rows = techs
-    cols = ["loan"]
-    df_loanLife = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
+    df_loanLife = results.table('LifetimeLoanTech')
+    loanLife = pd.Series(df_loanLife.loan.to_numpy(), index=df_loanLife.tech.astype(str).to_numpy())
+    loanLife = loanLife[~loanLife.index.duplicated(keep='last')]
+    loanLife = loanLife.reindex(techs).fillna(0.0).to_numpy(dtype='float64')
 
-    # Store Data
-    for tech, loan, loan_notes, in db_loanLife:
-        df_loanLife.loc[tech, "loan"] = loan
+    # ------------
+    # Outputs of all scenarios
+    # ------------
+    # Activity
+    db_activity = results.aggregate('Output_VFlow_Out', ['scenario', 't_periods', 'tech'], 'vflow_out')
+    # Electricity demand
+    db_demand = results.aggregate('Output_VFlow_Out', ['scenario', 't_periods'], 'vflow_out',
+                                  where={'output_comm': elc_dmd})
+    # New Capacity
+    db_newCapacity = results.table('Output_V_Capacity')
+    # Active Capacity
+    db_activeCapacity = results.table('Output_CapacityByPeriodAndTech')
+
+    if close:
+        results.close()
 
     # Create pandas DataFrame to hold yearlyEmissions for all scenarios
     index = pd.MultiIndex.from_product([[db], scenarios], names=['database', 'scenario'])
@@ -240,165 +175,93 @@ def SingleDB(folder, db, elc_dmd='ELC_DMD', conversion=0.359971):
     LCOE = pd.DataFrame(index=index, columns=['LCOE'], dtype='float64')
     LCOE = LCOE.fillna(0.0)  # Default value to zero
 
+    # Years each loan is repaid: buildYear <= year <= buildYear + N, indexed [year, buildYear, tech]
+    years = np.array(t_periods, dtype='float64')
+    repaid = (years[None, :, None] <= years[:, None, None]) & \
+             (years[:, None, None] <= years[None, :, None] + loanLife[None, None, :])
+    # Assume Fixed-Rate Payment (https://www.investopedia.com/terms/f/fixed-rate-payment.asp)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        paymentFactor = rate / (1 - (1 + rate) ** -loanLife)
+
+    # Discount factors for LCOE, based on initial year
+    discount = (1.0 + rate) ** (years - years[0])
+
     # ------------
     # Iterate through scenarios
     # ------------
     for s in scenarios:
         print("\t\tAnalyzing Scenario: ", s)
 
-        # Create dataframe to hold yearly costs (initialized to zero)
-        rows = t_periods
-        cols = ['CostInvest', 'CostFixed', 'CostVariable', 'CostTotal', 'ELC_DMD', 'ELC_Cost']
-        df = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-        # ------------
-        # Activity
-        # ------------
-        # Access database
-        qry = "SELECT * FROM Output_VFlow_Out"
-        cur.execute(qry)
-        db_activity = cur.fetchall()
-
-        # Create dataframe to hold activity (initialized to zero)
-        rows = t_periods
-        cols = techs
-        df_activity = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-        # Store Data
-        for scenario, sector, t_period, t_season, t_day, input_comm, tech, vintage, output_comm, vflow_out in db_activity:
-            if scenario == s:
-                # Store Activity for each technology
-                if t_period in t_periods and tech in techs:
-                    df_activity.loc[t_period, tech] = df_activity.loc[t_period, tech] + vflow_out
-                # Store electricity demand
-                if output_comm == elc_dmd:
-                    df.loc[t_period, 'ELC_DMD'] = df.loc[t_period, 'ELC_DMD'] + vflow_out
+        # Activity, new capacity and active capacity by period and technology (initialized to zero)
+        df_activity = outputTable(db_activity, s, 't_periods', 'value', t_periods, techs, aggregate=True)
+        df_newCapacity = outputTable(db_newCapacity, s, 'vintage', 'capacity', t_periods, techs)
+        df_activeCapacity = outputTable(db_activeCapacity, s, 't_periods', 'capacity', t_periods, techs)
 
         # ------------
-        # New Capacity
+        # Analysis - Investments translated to loans
         # ------------
-        # Access database
-        qry = "SELECT * FROM Output_V_Capacity"
-        cur.execute(qry)
-        db_newCapacity = cur.fetchall()
-
-        # Create dataframe to hold yearly installs (initialized to zero)
-        rows = t_periods
-        cols = techs
-        df_newCapacity = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-        # Store Data
-        for scenario, sector, tech, vintage, capacity, in db_newCapacity:
-            if scenario == s:
-                if vintage in t_periods and tech in techs:
-                    df_newCapacity.loc[vintage, tech] = capacity
-
-        # ------------
-        # Active Capacity
-        # ------------
-        # Access database
-        qry = "SELECT * FROM Output_CapacityByPeriodAndTech"
-        cur.execute(qry)
-        db_activeCapacity = cur.fetchall()
-
-        # Create dataframe to hold yearly installs (initialized to zero)
-        rows = t_periods
-        cols = techs
-        df_activeCapacity = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-        # Store Data
-        for scenario, sector, t_period, tech, capacity, in db_activeCapacity:
-            if scenario == s:
-                if t_period in t_periods and tech in techs:
-                    df_activeCapacity.loc[t_period, tech] = capacity
-
-        # ------------
-        # Analysis - Investments
-        # ------------
-        # Create dataframe (initialized to zero)
-        rows = t_periods
-        cols = techs
-        df_investments = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-        for year in t_periods:
-            for tech in techs:
-                costInvest = df_newCapacity.loc[year, tech] * df_CostInvest.loc[year, tech]
-                df_investments.loc[year, tech] = df_investments.loc[year, tech] + costInvest
-
-        # ------------
-        # Analysis - Translate Investments to Loans
-        # ------------
-        # Create dataframe (initialized to zero)
-        rows = t_periods
-        cols = techs
-        df_loanPayments = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
-
-        for tech in techs:
-            for buildYear in t_periods:
-
-                if df_investments.loc[buildYear, tech] > 0:
-                    loan = df_investments.loc[buildYear, tech]
-                    N = df_loanLife.loc[tech, "loan"]
-                    # Assume Fixed-Rate Payment (https://www.investopedia.com/terms/f/fixed-rate-payment.asp)
-                    annualPayment = rate / (1 - (1 + rate) ** -N) * loan
-                    if debug == True:
-                        print("Tech: " + tech + ",Year: " + str(buildYear) + ",YearlyPayment: " + str(annualPayment))
-
-                    for year in t_periods:
-                        if buildYear <= year and year <= buildYear + N:
-                            df_loanPayments.loc[year, tech] = df_loanPayments.loc[year, tech] + annualPayment
+        investments = df_newCapacity.to_numpy() * df_CostInvest.to_numpy()
+        annualPayment = np.where(investments > 0, paymentFactor[None, :] * investments, 0.0)
+        loanPayments = (repaid * annualPayment[None, :, :]).sum(axis=1)
+        if debug == True:
+            print(pd.DataFrame(annualPayment, index=t_periods, columns=techs))
 
         # ------------
         # Analysis - Translate to yearly costs
         # ------------
-        for year in t_periods:
-            for tech in techs:
-                # CostInvest (loan payments)
-                costInvest = df_loanPayments.loc[year, tech]
-                df.loc[year, 'CostInvest'] = df.loc[year, 'CostInvest'] + costInvest
-
-                # CostFixed
-                costFixed = df_activeCapacity.loc[year, tech] * df_CostFixed.loc[year, tech]
-                df.loc[year, 'CostFixed'] = df.loc[year, 'CostFixed'] + costFixed
-
-                # CostVariable
-                costVariable = df_activity.loc[year, tech] * df_CostVariable.loc[year, tech]
-                df.loc[year, 'CostVariable'] = df.loc[year, 'CostVariable'] + costVariable
-
-                # Sum Costs
-                totalTechCost = costInvest + costFixed + costVariable
-                df.loc[year, 'CostTotal'] = df.loc[year, 'CostTotal'] + totalTechCost
+        rows = t_periods
+        cols = ['CostInvest', 'CostFixed', 'CostVariable', 'CostTotal', 'ELC_DMD', 'ELC_Cost']
+        df = pd.DataFrame(data=0.0, index=rows, columns=cols, dtype='float64')
 
-            # Calculate Yearly Cost of Electricity
-            df.loc[year, 'ELC_Cost'] = df.loc[year, 'CostTotal'] / df.loc[year, 'ELC_DMD'] * conversion
+        costFixed = df_activeCapacity.to_numpy() * df_CostFixed.to_numpy()
+        costVariable = df_activity.to_numpy() * df_CostVariable.to_numpy()
+        df['CostInvest'] = loanPayments.sum(axis=1)
+        df['CostFixed'] = costFixed.sum(axis=1)
+        df['CostVariable'] = costVariable.sum(axis=1)
+        df['CostTotal'] = (loanPayments + costFixed + costVariable).sum(axis=1)
+        demand = db_demand[db_demand.scenario == s].set_index('t_periods').value
+        df['ELC_DMD'] = demand.reindex(t_periods).fillna(0.0).to_numpy(dtype='float64')
 
-        # yearlyCosts_single = df.ELC_Cost
+        # Calculate Yearly Cost of Electricity
+        df['ELC_Cost'] = df['CostTotal'] / df['ELC_DMD'] * conversion
 
         # ------------
         # Analysis - Calculate LCOE (based on initial year)
         # based on: https://www.energy.gov/sites/prod/files/2015/08/f25/LCOE.pdf
         # ------------
-        num = 0.0
-        denom = 0.0
-
-        for year in t_periods:
-            t = year - t_periods[0]
-            num = num + df.loc[year, 'CostTotal'] / (1.0 + rate) ** t
-            denom = denom + df.loc[year, 'ELC_DMD'] / (1.0 + rate) ** t
-
+        num = (df['CostTotal'].to_numpy() / discount).sum()
+        denom = (df['ELC_DMD'].to_numpy() / discount).sum()
         LCOE_single = num / denom * conversion
 
-        # df.loc[t_periods[0],'LCOE'] = LCOE
-
         # Store yearlyCosts_single and LCOE_single
-        for year in df.index:
-            yearlyCosts.loc[(db, s), year] = df.loc[year, 'ELC_Cost']
-        LCOE.loc[(db, s), ] = LCOE_single
-
-    # Return to original directory
-    os.chdir(origDir)
+        yearlyCosts.loc[(db, s), :] = df['ELC_Cost'].to_numpy()
+        LCOE.loc[(db, s), 'LCOE'] = LCOE_single
 
     # ------------
     # Return Calculations
     # ------------
     return yearlyCosts, LCOE
+
+
+# ==============================================================================
+# Table of an input (cost) indexed by period and technology, the last entry of each pair is used
+def costTable(db_table, period, value, t_periods, techs):
+    db_table = pd.DataFrame({period: db_table[period].to_numpy(), 'tech': db_table.tech.astype(str).to_numpy(),
+                             value: db_table[value].to_numpy()})
+    db_table = db_table.drop_duplicates([period, 'tech'], keep='last')
+    df = db_table.pivot(index=period, columns='tech', values=value)
+    return df.reindex(index=t_periods, columns=techs).fillna(0.0).astype('float64')
+
+
+# ==============================================================================
+# Table of a scenario's output indexed by period and technology, summed or with the last entry of each pair used
+def outputTable(db_table, scenario, period, value, t_periods, techs, aggregate=False):
+    db_table = db_table[db_table.scenario == scenario]
+    db_table = pd.DataFrame({period: db_table[period].to_numpy(), 'tech': db_table.tech.astype(str).to_numpy(),
+                             value: db_table[value].to_numpy()})
+    if aggregate:
+        db_table = db_table.groupby([period, 'tech'], as_index=False)[value].sum()
+    else:
+        db_table = db_table.drop_duplicates([period, 'tech'], keep='last')
+    df = db_table.pivot(index=period, columns='tech', values=value)
+    return df.reindex(index=t_periods, columns=techs).fillna(0.0).astype('float64')
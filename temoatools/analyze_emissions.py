@@ -1,5 +1,4 @@
 import os
-import sqlite3
 import pandas as pd
 import temoatools as tt
 
@@ -8,7 +7,7 @@ resolution = 600  # DPI
 
 
 # ==============================================================================
-def getEmissions(folders, dbs, conversion=1E-6, save_data='N', create_plots='N', run_name=''):
+def getEmissions(folders, dbs, conversion=1E-6, save_data='N', create_plots='N', run_name='', results=None):
     # ==============================================================================
     #    inputs:
     #    1) folders         - paths containing dbs (list or single string if all in the same path)
@@ -18,6 +17,7 @@ def getEmissions(folders, dbs, conversion=1E-6, save_data='N', create_plots='N',
     #    4) save_data        - 'Y' or 'N', default is 'N'
     #    5) create_plots     - 'Y' or 'N', default is 'N'
     #    6) run_name         - Used for saving results in dedicated folder
+    #    7) results         - ResultsDatabase shared with other analyses, only used with a single db
     #
     #    outputs:
     #    1) yearlyEmissions     - pandas DataFrame holding yearly emissions
@@ -49,11 +49,8 @@ def getEmissions(folders, dbs, conversion=1E-6, save_data='N', create_plots='N',
 
     # Iterate through each db
     for folder, db in zip(folders, dbs):
-        # Move to folder
-        os.chdir(folder)
-
         # Access costs
-        yearlyEmissions_single, avgEmissions_single = SingleDB(folder, db, conversion=conversion)
+        yearlyEmissions_single, avgEmissions_single = SingleDB(folder, db, conversion=conversion, results=results)
 
         # Store costs
         yearlyEmissions = pd.concat([yearlyEmissions, yearlyEmissions_single])
@@ -109,12 +106,13 @@ def getEmissions(folders, dbs, conversion=1E-6, save_data='N', create_plots='N',
 
 
 # ==============================================================================
-def SingleDB(folder, db, conversion=1E-6):
+def SingleDB(folder, db, conversion=1E-6, results=None):
     #    inputs:
     #    1) folder          - path containing db
     #    2) db              - name of database
     #    3) conversion      - converts from emission units to Mton
     #           default is conversion from kton to Mton is 1E-6
+    #    4) results         - ResultsDatabase shared with other analyses, opened here if not provided
     #
     #    outputs:
     #    1) yearlyEmissions     - pandas DataFrame holding yearly emissions
@@ -122,72 +120,36 @@ def SingleDB(folder, db, conversion=1E-6):
     # ==============================================================================
     print("\tAnalyzing db: ", db)
 
-    # Save original directory
-    origDir = os.getcwd()
-
-    # Move to folder
-    os.chdir(folder)
-
     # Connect to Database
-    con = sqlite3.connect(db)
-    cur = con.cursor()
+    close = results is None
+    if results is None:
+        results = tt.ResultsDatabase(folder, db)
 
     #   Identify Unique Scenarios
-    qry = "SELECT * FROM Output_Objective"
-    cur.execute(qry)
-    db_objective = cur.fetchall()
-    scenarios = []
-    for scenario, objective_name, total_system_cost in db_objective:
-        if scenario not in scenarios:
-            scenarios.append(scenario)
-
-    #   Select All time_periods
-    qry = "SELECT * FROM time_periods"
-    cur.execute(qry)
-    db_t_periods = cur.fetchall()
-
-    # Review db_t_periods to select future time periods
-    future_t_periods = []
-    for t_periods, flag in db_t_periods:
-        if flag == 'f':
-            if t_periods not in future_t_periods:
-                future_t_periods.append(t_periods)
-
-    future_t_periods = sorted(future_t_periods)
+    scenarios = results.scenarios()
+
+    # Future time periods
+    future_t_periods = sorted(results.future_periods())
     future_t_periods = future_t_periods[:-1]  # no calculations are performed for the last time_period
 
-    # Read from database:
-    qry = "SELECT * FROM Output_Emissions"
-    cur.execute(qry)
-    db_Output_Emissions = cur.fetchall()
+    # Sum emissions by scenario and period
+    emissions = results.aggregate('Output_Emissions', ['scenario', 't_periods'], 'emissions')
 
     # Close connection
-    con.close()
+    if close:
+        results.close()
 
     # Create pandas DataFrame to hold yearlyEmissions
     index = pd.MultiIndex.from_product([[db], scenarios], names=['database', 'scenario'])
-    yearlyEmissions = pd.DataFrame(index=index, columns=future_t_periods, dtype='float64')
-    yearlyEmissions = yearlyEmissions.fillna(0.0)  # Default value to zero
+    emissions['database'] = db
+    emissions = emissions.set_index(['database', 'scenario', 't_periods']).value.unstack('t_periods')
+    yearlyEmissions = emissions.reindex(index=index, columns=future_t_periods).fillna(0.0)
+    yearlyEmissions.columns.name = None
+    if debug == True:
+        print(yearlyEmissions)
+
+    # Average emissions
     avgEmissions = pd.DataFrame(index=index, columns=['avgEmissions'], dtype='float64')
-    avgEmissions = avgEmissions.fillna(0.0)  # Default value to zero
-
-    # Iterate through scenarios
-    for s in scenarios:
-        print("\t\tAnalyzing Scenario: ", s)
-        # Review db_Output_Emissions to fill data frame
-        for scenario, sector, t_period, emissions_comm, tech, vintage, emissions in db_Output_Emissions:
-            if scenario == s:
-                yearlyEmissions.loc[(db, s), t_period] = yearlyEmissions.loc[(db, s), t_period] + emissions
-                if debug == True:
-                    print('scenario:  ' + scenario)
-                    print('t_period:  ' + str(t_period))
-                    print('emissions: ' + str(emissions))
-                    print(yearlyEmissions)
-
-        # Sum average emissions
-        avgEmissions.loc[(db, s),] = yearlyEmissions.loc[(db, s),].mean()
-
-    # Return to original directory
-    os.chdir(origDir)
+    avgEmissions['avgEmissions'] = yearlyEmissions.mean(axis=1)
 
     return yearlyEmissions, avgEmissions
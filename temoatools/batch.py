@@ -0,0 +1,304 @@
+import os
+import sys
+import time
+import traceback
+import multiprocessing as mp
+import multiprocessing.connection
+import temoatools as tt
+
+
+# =============================================================================
+# Persistent worker pool for batches of Temoa cases (Monte Carlo, sensitivity)
+#
+# Each worker imports Temoa/Pyomo and builds the abstract model once, then is
+# handed cases one at a time over its own pipe until none are left. Results are
+# streamed back to the parent as soon as each case finishes. Workers that crash
+# are restarted and workers that exceed the memory ceiling are recycled after
+# their current case.
+# =============================================================================
+class BatchRunner(object):
+    def __init__(self, evaluate, ncpus=1, temoa_path=None, max_memory_mb=None, max_restarts=10, retry_crashed=False,
+                 debug=False):
+        #    inputs:
+        #    1) evaluate        - function called as evaluate(case_id, case), must be importable by the workers
+        #    2) ncpus           - number of long-lived worker processes
+        #    3) temoa_path      - path to Temoa directory that contains temoa_model/, imported when the worker starts
+        #    4) max_memory_mb   - memory ceiling per worker, a worker above it is replaced after its current case
+        #    5) max_restarts    - maximum number of times crashed workers are restarted (recycling is not counted)
+        #    6) retry_crashed   - if True, the case a worker was evaluating when it crashed is queued once more
+        #    7) debug           - if True, prints worker starts, crashes and recycling
+        self.evaluate = evaluate
+        self.ncpus = max(1, int(ncpus))
+        self.temoa_path = temoa_path
+        self.max_memory_mb = max_memory_mb
+        self.max_restarts = max_restarts
+        self.retry_crashed = retry_crashed
+        self.debug = debug
+
+        self.ctx = mp.get_context()
+        self.workers = {}  # worker_id -> process
+        self.conns = {}  # worker_id -> parent end of the worker's pipe
+        self.current = {}  # worker_id -> case_id being evaluated (None if idle)
+        self.n_restarts = 0
+        self.next_worker_id = 0
+
+    # -----------------------------------------------------
+    # Evaluate all cases, yielding results as they complete
+    # -----------------------------------------------------
+    def run(self, cases):
+        #    inputs:
+        #    1) cases      - iterable of (case_id, case) pairs, i.e. from sensitivity_cases or monte_carlo_cases,
+        #                   case_ids must be unique
+        #
+        #    outputs:
+        #    1) generator of dictionaries with case_id, error, result, message and worker
+        #
+        #    Each worker has its own pipe and is handed one case at a time, so a worker that crashes cannot leave a
+        #    shared queue locked and the parent always knows which case was lost.
+        cases = list(cases)
+        seen = set()
+        duplicates = set()
+        for case_id, case in cases:
+            if case_id in seen:
+                duplicates.add(case_id)
+            seen.add(case_id)
+        if len(duplicates) > 0:
+            # results are matched to cases by case_id, a repeated case_id would replace the earlier case
+            duplicates = sorted(duplicates, key=str)
+            raise ValueError('Duplicate case_id: ' + ', '.join(str(case_id) for case_id in duplicates))
+        cases = dict(cases)
+        todo = list(cases.keys())
+        todo.reverse()  # pop() from the end keeps the original order
+        pending = set(cases.keys())
+        retried = set()
+
+        for i in range(min(self.ncpus, len(todo))):
+            self.start_worker()
+
+        try:
+            for worker_id in list(self.workers.keys()):
+                self.dispatch(worker_id, todo, cases)
+
+            while len(pending) > 0:
+                if len(self.workers) == 0:
+                    # Nothing left to evaluate the remaining cases
+                    for case_id in sorted(pending, key=str):
+                        yield {'case_id': case_id, 'error': True, 'result': None,
+                               'message': 'Not evaluated, maximum number of worker restarts reached', 'worker': None}
+                    pending.clear()
+                    break
+
+                lookup = dict((conn, worker_id) for worker_id, conn in self.conns.items())
+                for conn in mp.connection.wait(list(lookup.keys()), timeout=1.0):
+                    worker_id = lookup[conn]
+                    try:
+                        msg = conn.recv()
+                    except (EOFError, OSError):
+                        # Worker died without reporting
+                        for output in self.crashed(worker_id, todo, cases, pending, retried):
+                            yield output
+                        continue
+
+                    case_id, error, result, message, memory = msg
+                    self.current[worker_id] = None
+                    if case_id in pending:
+                        pending.discard(case_id)
+                        yield {'case_id': case_id, 'error': error, 'result': result, 'message': message,
+                               'worker': worker_id}
+
+                    if memory is None:
+                        self.dispatch(worker_id, todo, cases)
+                    else:
+                        # worker exceeded memory ceiling, replace it
+                        if self.debug:
+                            print('Recycling worker ' + str(worker_id) + ' (' + str(round(memory)) + ' MB)')
+                        self.dispatch(worker_id, [], cases)
+                        self.join_worker(worker_id)
+                        if len(todo) > 0:
+                            self.dispatch(self.start_worker(), todo, cases)
+
+        finally:
+            self.close()
+
+    # -----------------------------------------------------
+    # Evaluate all cases, returning results ordered as the cases were given
+    # -----------------------------------------------------
+    def map(self, cases):
+        cases = list(cases)
+        results = {}
+        for output in self.run(cases):
+            results[output['case_id']] = output
+        return [results[case_id] for case_id, case in cases]
+
+    # -----------------------------------------------------
+    # Worker management
+    # -----------------------------------------------------
+    def start_worker(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id = self.next_worker_id + 1
+        parent_conn, child_conn = self.ctx.Pipe()
+        p = self.ctx.Process(target=worker_loop,
+                             args=(worker_id, self.evaluate, child_conn, self.temoa_path, self.max_memory_mb))
+        p.daemon = True
+        p.start()
+        child_conn.close()
+        self.workers[worker_id] = p
+        self.conns[worker_id] = parent_conn
+        self.current[worker_id] = None
+        if self.debug:
+            print('Started worker ' + str(worker_id) + ' (pid ' + str(p.pid) + ')')
+        return worker_id
+
+    def dispatch(self, worker_id, todo, cases):
+        # Send the next case to an idle worker, or tell it to stop if there is nothing left
+        if len(todo) > 0:
+            case_id = todo.pop()
+            self.current[worker_id] = case_id
+            task = (case_id, cases[case_id])
+        else:
+            task = None
+        try:
+            self.conns[worker_id].send(task)
+        except (BrokenPipeError, OSError):
+            pass  # worker already died, handled by run() when its pipe closes
+
+    def join_worker(self, worker_id):
+        p = self.workers.pop(worker_id, None)
+        conn = self.conns.pop(worker_id, None)
+        self.current.pop(worker_id, None)
+        if p is not None:
+            p.join(timeout=10.0)
+            if p.is_alive():
+                p.terminate()
+        if conn is not None:
+            conn.close()
+        return p
+
+    def crashed(self, worker_id, todo, cases, pending, retried):
+        outputs = []
+        case_id = self.current.get(worker_id)
+        p = self.join_worker(worker_id)
+        exitcode = p.exitcode if p is not None else None
+        if self.debug:
+            print('Worker ' + str(worker_id) + ' exited with code ' + str(exitcode))
+
+        # Decide what happens to the case the worker was evaluating
+        if case_id is not None and case_id in pending:
+            if self.retry_crashed and case_id not in retried:
+                retried.add(case_id)
+                todo.append(case_id)
+            else:
+                pending.discard(case_id)
+                outputs.append({'case_id': case_id, 'error': True, 'result': None,
+                                'message': 'Worker crashed with exit code ' + str(exitcode), 'worker': worker_id})
+
+        # Replace the worker
+        if len(todo) > 0 and self.n_restarts < self.max_restarts:
+            self.n_restarts = self.n_restarts + 1
+            self.dispatch(self.start_worker(), todo, cases)
+        return outputs
+
+    def close(self):
+        for worker_id in list(self.conns.keys()):
+            self.dispatch(worker_id, [], None)
+        for worker_id in list(self.workers.keys()):
+            self.join_worker(worker_id)
+
+
+# =============================================================================
+# Worker process: warm up once, then evaluate cases until told to stop
+# =============================================================================
+def worker_loop(worker_id, evaluate, conn, temoa_path, max_memory_mb):
+    # Import Temoa and Pyomo and build the abstract model before the first case
+    if temoa_path is not None:
+        tt.load_temoa(temoa_path)
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break  # parent went away
+        if task is None:
+            break
+        case_id, case = task
+
+        try:
+            result = evaluate(case_id, case)
+            error, message = False, ''
+        except Exception:
+            result, error, message = None, True, traceback.format_exc()
+
+        # Ask to be recycled if this worker has grown beyond the memory ceiling
+        memory = None
+        if max_memory_mb is not None:
+            memory = memory_mb()
+            if memory is not None and memory <= max_memory_mb:
+                memory = None
+
+        conn.send((case_id, error, result, message, memory))
+
+    conn.close()
+
+
+# =============================================================================
+# Resident memory of the current process in MB (None if it cannot be determined)
+# =============================================================================
+def memory_mb():
+    # Linux - current resident set size
+    try:
+        with open('/proc/self/statm') as f:
+            rss_pages = int(f.read().split()[1])
+        return rss_pages * os.sysconf('SC_PAGE_SIZE') / 1.0E6
+    except (IOError, OSError, ValueError, AttributeError):
+        pass
+
+    # Other Unix - peak resident set size
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            return rss / 1.0E6  # bytes
+        return rss / 1.0E3  # kilobytes
+    except ImportError:
+        return None
+
+
+# =============================================================================
+# Case definitions
+# =============================================================================
+def sensitivity_cases(cases):
+    # rows of createSensitivityCases, one case per row
+    return [(caseNum, cases.loc[caseNum]) for caseNum in cases.index]
+
+
+def monte_carlo_cases(cases, n_cases=None):
+    # columns of createMonteCarloCases, each case holds type, variable, tech and multiplier for every variable
+    if n_cases is None:
+        n_cases = len(cases.columns) - 3
+    case_list = []
+    for caseNum in range(n_cases):
+        MCinputs = cases.loc[:, ['type', 'variable', 'tech', caseNum]]
+        MCinputs = MCinputs.rename(columns={caseNum: 'multiplier'})
+        case_list.append((caseNum, MCinputs))
+    return case_list
+
+
+# =============================================================================
+# Convenience function
+# =============================================================================
+def run_batch(evaluate, cases, ncpus=1, temoa_path=None, max_memory_mb=None, max_restarts=10, retry_crashed=False,
+              debug=False):
+    #    inputs:
+    #    1) evaluate        - function called as evaluate(case_id, case), must be importable by the workers
+    #    2) cases           - list of (case_id, case) pairs, i.e. from sensitivity_cases or monte_carlo_cases
+    #    3-8)               - see BatchRunner
+    #
+    #    outputs:
+    #    1) outputs         - list of dictionaries (case_id, error, result, message, worker), same order as cases
+    t0 = time.time()
+    runner = BatchRunner(evaluate, ncpus=ncpus, temoa_path=temoa_path, max_memory_mb=max_memory_mb,
+                         max_restarts=max_restarts, retry_crashed=retry_crashed, debug=debug)
+    outputs = runner.map(cases)
+    if debug:
+        print('Batch of ' + str(len(outputs)) + ' cases completed in ' + str(round(time.time() - t0, 2)) + ' s')
+    return outputs
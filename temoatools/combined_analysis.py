@@ -3,51 +3,48 @@ import numpy as np
 import pandas as pd
 import temoatools as tt
 
+# Long-format schema of analyze_db outputs
+entries = ['scenario', 'iteration', 'database', 'quantity', 'quantity_type', 'tech_or_fuel', 'year', 'season',
+           'tod', 'value']
+# Entries with few unique values, stored as categories
+categories = ['scenario', 'database', 'quantity', 'quantity_type', 'tech_or_fuel', 'season', 'tod']
+
+
+def get_block(quantity, value, quantity_type=None, tech_or_fuel=None, year=None, season=None, tod=None):
+    # columns of a block of rows with the same quantity
+    # entries can be a single value (repeated for each row), an array (one per row) or None (nan)
+    block = {'quantity': quantity, 'quantity_type': quantity_type, 'tech_or_fuel': tech_or_fuel, 'year': year,
+             'season': season, 'tod': tod, 'value': np.atleast_1d(np.asarray(value, dtype='float64'))}
+    return block
+
+
+def combine_blocks(blocks, scenario, iteration, db):
+    # concatenate blocks once into a DataFrame with the analyze_db schema
+    lengths = [len(block['value']) for block in blocks]
+    n_rows = sum(lengths)
+
+    data = {}
+    data['scenario'] = np.full(n_rows, scenario, dtype=object)
+    data['iteration'] = np.full(n_rows, iteration)
+    data['database'] = np.full(n_rows, db, dtype=object)
+    for entry in entries[3:]:
+        parts = []
+        for block, length in zip(blocks, lengths):
+            if block[entry] is None:
+                parts.append(np.full(length, np.nan, dtype=object))
+            elif np.ndim(block[entry]) == 0:
+                parts.append(np.full(length, block[entry], dtype=object))
+            else:
+                parts.append(np.asarray(block[entry], dtype=object))
+        data[entry] = np.concatenate(parts) if len(parts) > 0 else np.empty(0, dtype=object)
+
+    output = pd.DataFrame(data, columns=entries)
+    for entry in categories:
+        output[entry] = output[entry].astype('category')
+    output['year'] = pd.to_numeric(output['year']).astype('Int64')
+    output['value'] = output['value'].astype('float64')
 
-def get_series(scenario, iteration, db):
-    # create Pandas Series
-    entries = ['scenario', 'iteration', 'database', 'quantity', 'quantity_type', 'tech_or_fuel', 'year', 'season',
-               'tod', 'value']
-    s = pd.Series(index=entries)
-
-    # populate required entries
-    s['scenario'] = scenario
-    s['iteration'] = iteration
-    s['database'] = db
-
-    # set remaining entries to nan as default
-    s['quantity'] = np.nan
-    s['quantity_type'] = np.nan
-    s['tech_or_fuel'] = np.nan
-    s['year'] = np.nan
-    s['season'] = np.nan
-    s['tod'] = np.nan
-    s['value'] = np.nan
-
-    return s
-
-
-def get_df(scenario, iteration, db, n_rows):
-    # create Pandas DataFrame
-    entries = ['scenario', 'iteration', 'database', 'quantity', 'quantity_type', 'tech_or_fuel', 'year', 'season',
-               'tod', 'value']
-    mc_df = pd.DataFrame(index=range(n_rows), columns=entries)
-
-    # populate required entries
-    mc_df.loc[:, 'scenario'] = scenario
-    mc_df.loc[:, 'iteration'] = iteration
-    mc_df.loc[:, 'database'] = db
-
-    # set remaining entries to nan as default
-    mc_df.loc[:, 'quantity'] = np.nan
-    mc_df.loc[:, 'quantity_type'] = np.nan
-    mc_df.loc[:, 'tech_or_fuel'] = np.nan
-    mc_df.loc[:, 'year'] = np.nan
-    mc_df.loc[:, 'season'] = np.nan
-    mc_df.loc[:, 'tod'] = np.nan
-    mc_df.loc[:, 'value'] = np.nan
-
-    return mc_df
+    return output
 
 
 def analyze_db(folder, db, scenario='default', iteration=0, switch='fuel', tod_analysis=False, debug=False):
@@ -69,9 +66,9 @@ def analyze_db(folder, db, scenario='default', iteration=0, switch='fuel', tod_a
         t0 = time.time()
 
     # -----------------------------------
-    # create dataframe to hold outputs
+    # blocks of rows, combined into the output once all analyses are complete
     # -----------------------------------
-    output = pd.DataFrame()
+    blocks = []
 
     # -----------------------------------
     # check for appropriate value of switch
@@ -79,24 +76,22 @@ def analyze_db(folder, db, scenario='default', iteration=0, switch='fuel', tod_a
     if switch not in ['tech', 'fuel']:
         switch = 'fuel'
 
+    # -----------------------------------
+    # read each table of the database once, shared by all analyses
+    # -----------------------------------
+    results = tt.ResultsDatabase(folder, db, cache_outputs=True)
+
     # -----------------------------------
     # yearly_costs and LCOE
     # -----------------------------------
-    yearly_costs, LCOE = tt.getCosts(folder, db)
+    yearly_costs, LCOE = tt.getCosts(folder, db, results=results)
 
     # LCOE
-    row = get_series(scenario, iteration, db)
-    row['quantity'] = 'LCOE'
-    row['value'] = LCOE
-    output = output.append(row, ignore_index=True)
+    blocks.append(get_block('LCOE', LCOE.loc[0, 'LCOE']))
 
     # yearly_costs
     yearly_costs = yearly_costs.drop(columns=['database', 'scenario'])
-    df = get_df(scenario, iteration, db, yearly_costs.shape[1])
-    df.loc[:, 'quantity'] = 'costs_by_year'
-    df.loc[:, 'year'] = yearly_costs.columns
-    df.loc[:, 'value'] = yearly_costs.loc[0, :].values
-    output = output.append(df, ignore_index=True)
+    blocks.append(get_block('costs_by_year', yearly_costs.loc[0, :].values, year=yearly_costs.columns))
 
     if debug:
         t1 = time.time()
@@ -104,21 +99,14 @@ def analyze_db(folder, db, scenario='default', iteration=0, switch='fuel', tod_a
     # -----------------------------------
     # yearly_emissions and average_emissions
     # -----------------------------------
-    yearly_emissions, average_emissions = tt.getEmissions(folder, db)
+    yearly_emissions, average_emissions = tt.getEmissions(folder, db, results=results)
 
     # average_emissions
-    row = get_series(scenario, iteration, db)
-    row['quantity'] = 'average_emissions'
-    row['value'] = average_emissions
-    output = output.append(row, ignore_index=True)
+    blocks.append(get_block('average_emissions', average_emissions.loc[0, 'avgEmissions']))
 
     # yearly_emissions
     yearly_emissions = yearly_emissions.drop(columns=['database', 'scenario'])
-    df = get_df(scenario, iteration, db, yearly_costs.shape[1])
-    df.loc[:, 'quantity'] = 'emissions_by_year'
-    df.loc[:, 'year'] = yearly_emissions.columns
-    df.loc[:, 'value'] = yearly_emissions.loc[0, :].values
-    output = output.append(df, ignore_index=True)
+    blocks.append(get_block('emissions_by_year', yearly_emissions.loc[0, :].values, year=yearly_emissions.columns))
 
     if debug:
         t2 = time.time()
@@ -127,18 +115,13 @@ def analyze_db(folder, db, scenario='default', iteration=0, switch='fuel', tod_a
     # capacity_by_year
     # -----------------------------------
     # analyze
-    capacity_by_year = tt.getCapacity(folder, db, switch=switch)
+    capacity_by_year = tt.getCapacity(folder, db, switch=switch, results=results)
     capacity_by_year = capacity_by_year.drop(columns=['database', 'scenario'])
     # reorganize
     temp = pd.melt(capacity_by_year, id_vars=['fuelOrTech'], var_name='year')
     # store results
-    df = get_df(scenario, iteration, db, temp.shape[0])
-    df.loc[:, 'quantity'] = 'capacity_by_year'
-    df.loc[:, 'quantity_type'] = switch
-    df.loc[:, 'tech_or_fuel'] = temp.loc[:, 'fuelOrTech'].values
-    df.loc[:, 'year'] = temp.loc[:, 'year'].values
-    df.loc[:, 'value'] = temp.loc[:, 'value'].values
-    output = output.append(df, ignore_index=True)
+    blocks.append(get_block('capacity_by_year', temp.loc[:, 'value'].values, quantity_type=switch,
+                            tech_or_fuel=temp.loc[:, 'fuelOrTech'].values, year=temp.loc[:, 'year'].values))
 
     if debug:
         t3 = time.time()
@@ -147,18 +130,13 @@ def analyze_db(folder, db, scenario='default', iteration=0, switch='fuel', tod_a
     # activity_by_year
     # -----------------------------------
     # analyze
-    activity_by_year = tt.getActivity(folder, db, switch=switch)
+    activity_by_year = tt.getActivity(folder, db, switch=switch, results=results)
     activity_by_year = activity_by_year.drop(columns=['database', 'scenario'])
     # reorganize
     temp = pd.melt(activity_by_year, id_vars=['fuelOrTech'], var_name='year')
     # store results
-    df = get_df(scenario, iteration, db, temp.shape[0])
-    df.loc[:, 'quantity'] = 'activity_by_year'
-    df.loc[:, 'quantity_type'] = switch
-    df.loc[:, 'tech_or_fuel'] = temp.loc[:, 'fuelOrTech'].values
-    df.loc[:, 'year'] = temp.loc[:, 'year'].values
-    df.loc[:, 'value'] = temp.loc[:, 'value'].values
-    output = output.append(df, ignore_index=True)
+    blocks.append(get_block('activity_by_year', temp.loc[:, 'value'].values, quantity_type=switch,
+                            tech_or_fuel=temp.loc[:, 'fuelOrTech'].values, year=temp.loc[:, 'year'].values))
 
     if debug:
         t4 = time.time()
@@ -168,18 +146,21 @@ def analyze_db(folder, db, scenario='default', iteration=0, switch='fuel', tod_a
     # -----------------------------------
     if tod_analysis:
         # analyze
-        activity_by_tod = tt.getActivityTOD(folder, db, switch=switch)
+        activity_by_tod = tt.getActivityTOD(folder, db, switch=switch, results=results)
         activity_by_tod = activity_by_tod.drop(columns=['database', 'scenario'])
         # store results
-        df = get_df(scenario, iteration, db, activity_by_tod.shape[0])
-        df.loc[:, 'quantity'] = 'activity_by_tod'
-        df.loc[:, 'quantity_type'] = switch
-        df.loc[:, 'tech_or_fuel'] = activity_by_tod.loc[:, 'fuelOrTech'].values
-        df.loc[:, 'year'] = activity_by_tod.loc[:, 'year'].values
-        df.loc[:, 'season'] = activity_by_tod.loc[:, 'season'].values
-        df.loc[:, 'tod'] = activity_by_tod.loc[:, 'tod'].values
-        df.loc[:, 'value'] = activity_by_tod.loc[:, 'value'].values
-        output = output.append(df, ignore_index=True)
+        blocks.append(get_block('activity_by_tod', activity_by_tod.loc[:, 'value'].values, quantity_type=switch,
+                                tech_or_fuel=activity_by_tod.loc[:, 'fuelOrTech'].values,
+                                year=activity_by_tod.loc[:, 'year'].values,
+                                season=activity_by_tod.loc[:, 'season'].values,
+                                tod=activity_by_tod.loc[:, 'tod'].values))
+
+    results.close()
+
+    # -----------------------------------
+    # create dataframe holding outputs
+    # -----------------------------------
+    output = combine_blocks(blocks, scenario, iteration, db)
 
     if debug:
         t5 = time.time()
@@ -0,0 +1,233 @@
+import os
+import re
+import shutil
+import numpy as np
+import pandas as pd
+from .fragility_curves import library as fragility_library
+
+# =============================================================================#
+# Hurricane ensembles for stochastic Temoa
+#
+# Builds the scenario tree of temoa_stochastic from a distribution of hurricane
+# wind speeds, without options files, generate_scenario_tree.py or
+# rewrite_tree_nodes.py:
+#
+#    branches = hurricane_branches(df.MaxWind_mph, 5)  # e.g. output of hurricaneBackcasting.py
+#    rates = cap_reduction_rates(branches, techs, curves)
+#    write_scenario_tree('T_0', 'T.dat', branches, rates)
+#
+# Every node of the tree is followed by the same hurricane branches. The node files
+# hold CapReduction[p, t, v]: the capacity of vintage v remaining after the hurricanes
+# of the path to the node that struck once the vintage was built (as
+# rewrite_tree_nodes.py).
+# =============================================================================#
+
+# Stage variables of ScenarioStructure.dat, as PySP wildcards of the indices of each period
+# (the same variables generate_scenario_tree_JB.py lists from a model instance)
+stage_variables = ('V_FlowIn[{p},*,*,*,*,*,*]',
+                   'V_FlowOut[{p},*,*,*,*,*,*]',
+                   'V_Capacity[*,{p}]',
+                   'V_EmissionActivityByPeriodAndTech[*,{p},*]',
+                   'V_ActivityByPeriodTechAndOutput[{p},*,*]',
+                   'V_CapacityAvailableByPeriodAndTech[{p},*]')
+
+
+# =============================================================================#
+# Hurricane branches
+# =============================================================================#
+def hurricane_branches(windspeeds, n_branches, method='quantize', weights=None, seed=None):
+    #    inputs:
+    #    1) windspeeds - wind speeds (mph) of sampled years, zero for years without hurricanes,
+    #                    or a scipy.stats distribution (frozen, e.g. scipy.stats.weibull_min(c, scale=s))
+    #    2) n_branches - number of branches after each node
+    #    3) method     - 'quantize': branches of equal probability, each the mean wind speed of its share of the
+    #                                samples (the quantile at its middle for a distribution). Branches with the same
+    #                                wind speed are merged, so there may be fewer than n_branches
+    #                    'sample'  : n_branches wind speeds drawn at random, each of probability 1/n_branches
+    #    4) weights    - weight of each sampled wind speed (default equal)
+    #    5) seed       - random seed of method 'sample'
+    #
+    #    outputs:
+    #    1) DataFrame indexed by branch name (H1, H2, ... by increasing wind speed) with columns windspeed (mph)
+    #       and probability
+    if n_branches < 1:
+        raise ValueError('n_branches must be at least 1')
+
+    distribution = hasattr(windspeeds, 'ppf')
+    if not distribution:
+        windspeeds = np.asarray(windspeeds, dtype=float)
+        if weights is None:
+            weights = np.ones(len(windspeeds))
+        weights = np.asarray(weights, dtype=float)
+        if len(windspeeds) == 0 or weights.shape != windspeeds.shape:
+            raise ValueError('windspeeds and weights must be lists of the same length')
+        weights = weights / weights.sum()
+
+    if method == 'quantize':
+        if distribution:
+            wind = windspeeds.ppf((np.arange(n_branches) + 0.5) / n_branches)
+            prob = np.full(n_branches, 1.0 / n_branches)
+        else:
+            order = np.argsort(windspeeds, kind='stable')
+            w = windspeeds[order]
+            p = weights[order]
+            # each sample belongs to the branch holding the middle of its share of the probability
+            share = np.cumsum(p) - p / 2.0
+            branch = np.minimum((share * n_branches).astype(int), n_branches - 1)
+            prob = np.bincount(branch, weights=p, minlength=n_branches)
+            wind = np.bincount(branch, weights=p * w, minlength=n_branches)
+            keep = prob > 0.0
+            wind = wind[keep] / prob[keep]
+            prob = prob[keep]
+    elif method == 'sample':
+        rng = np.random.default_rng(seed)
+        if distribution:
+            wind = np.sort(windspeeds.rvs(size=n_branches, random_state=rng))
+        else:
+            wind = np.sort(rng.choice(windspeeds, size=n_branches, p=weights))
+        prob = np.full(n_branches, 1.0 / n_branches)
+    else:
+        raise ValueError('Invalid method: ' + str(method) + ", expected 'quantize' or 'sample'")
+
+    df = pd.DataFrame({'windspeed': np.maximum(wind, 0.0), 'probability': prob})
+    if method == 'quantize':
+        df = df.groupby('windspeed', as_index=False, sort=True)['probability'].sum()
+    df.index = ['H' + str(i + 1) for i in range(len(df))]
+    return df
+
+
+# =============================================================================#
+# Capacity reductions
+# =============================================================================#
+def cap_reduction_rates(branches, techs, curves, cutoff=0.05, library=None):
+    #    inputs:
+    #    1) branches - DataFrame of hurricane_branches (windspeed column used)
+    #    2) techs    - dictionary of temoa technology to fragility curve group, e.g. {'TRANS': 'trans'}
+    #    3) curves   - dictionary of fragility curve group to fragility curve, e.g. {'trans': 'trans_UK_base'}
+    #    4) cutoff   - smallest capacity remaining (zero values crash the solver)
+    #    5) library  - FragilityLibrary of the curves (default the curves of temoatools)
+    #
+    #    outputs:
+    #    1) DataFrame of the capacity remaining after each branch, indexed by technology with a column per branch
+    if library is None:
+        library = fragility_library
+    tech_list = list(techs.keys())
+    p_failure = library.evaluate_many([curves[techs[tech]] for tech in tech_list], branches['windspeed'].values)
+    rates = np.clip(np.round(1.0 - p_failure, 3), cutoff, 1.0)
+    return pd.DataFrame(rates, index=tech_list, columns=branches.index)
+
+
+# =============================================================================#
+# Scenario tree
+# =============================================================================#
+def read_dat_sets(dat_file):
+    # Sets of a temoa .dat file, {name: list of elements}, years as integers
+    with open(dat_file, 'r') as f:
+        text = f.read()
+    sets = {}
+    for name, elements in re.findall(r'^\s*set\s+(\w+)\s*:=(.*?);', text, flags=re.MULTILINE | re.DOTALL):
+        elements = [e.strip('\'"') for e in re.sub(r'#.*', '', elements).split()]
+        sets[name] = [int(e) if e.isdigit() else e for e in elements]
+    return sets
+
+
+def write_scenario_tree(dirname, dat_file, branches, rates, stochastic_points=None, force=True):
+    #    inputs:
+    #    1) dirname           - directory of the tree, emptied first if force (as generate_scenario_tree.py)
+    #    2) dat_file          - .dat file of the reference model, copied to R.dat and ReferenceModel.dat
+    #    3) branches          - DataFrame of hurricane_branches (probability column used)
+    #    4) rates             - DataFrame of cap_reduction_rates
+    #    5) stochastic_points - periods followed by hurricane branches (default all periods), other
+    #                           periods are followed by a single HedgingStrategy node
+    #    6) force             - remove the files of an existing dirname
+    #
+    #    outputs:
+    #    1) ScenarioStructure.dat, R.dat, ReferenceModel.dat and a .dat file of CapReduction per node in dirname
+    #    2) returns the number of scenarios
+    if os.path.isdir(dirname):
+        if os.listdir(dirname) and not force:
+            raise ValueError('Not empty: ' + dirname + ', use force=True to replace the tree')
+        shutil.rmtree(dirname)
+    os.makedirs(dirname)
+
+    sets = read_dat_sets(dat_file)
+    periods = sorted(sets['time_future'])[:-1]  # time_optimize
+    vintages = np.array(sorted(set(sets.get('time_exist', [])) | set(periods)))
+    if stochastic_points is None:
+        stochastic_points = periods
+
+    # technologies of the model
+    tech_all = set(sets.get('tech_resource', [])) | set(sets.get('tech_production', []))
+    techs = [tech for tech in rates.index if tech in tech_all]
+    for tech in rates.index:
+        if tech not in tech_all:
+            print('Warning: ' + str(tech) + ' is not a technology of ' + dat_file + ', no CapReduction written')
+    rate = rates.loc[techs, branches.index].values.astype(float)
+    names = list(branches.index)
+    probabilities = list(branches['probability'].values)
+
+    # index of each value of a node file, per period (technology by vintage, as values.ravel())
+    rows = {}
+    for p in periods:
+        rows[p] = [str(p) + '\t' + str(t) + '\t' + str(v) + '\t' for t in techs for v in vintages]
+
+    nodes, nodestage, probability, children, leaves = [], [], [], [], []
+
+    def add_node(bname, k, prob, decisions, values):
+        # node bname at period periods[k], values - CapReduction of techs by vintages
+        p = periods[k]
+        nodes.append(bname)
+        nodestage.append(bname + '   s' + str(p))
+        probability.append(bname + '  ' + str(prob))
+
+        if bname != 'R':
+            lines = [row + '%.10g' % val for row, val in zip(rows[p], values.ravel())]
+            with open(os.path.join(dirname, bname + '.dat'), 'w') as f:
+                f.write('# Decision: ' + ', '.join(decisions) + '\n\n')
+                f.write('param CapReduction :=\n')
+                f.write('\n'.join(lines))
+                f.write('\n\t;\n')
+
+        if k == len(periods) - 1:
+            leaves.append(bname[2:])
+            return
+        if p in stochastic_points:
+            # the hurricane strikes the vintages built by period p
+            struck = vintages <= p
+            child_names = []
+            for j in range(len(names)):
+                child_values = values.copy()
+                child_values[:, struck] *= rate[:, j:j + 1]
+                child_names.append(bname + 's' + str(j))
+                add_node(child_names[-1], k + 1, probabilities[j], decisions + [names[j]], child_values)
+        else:
+            child_names = [bname + 's0']
+            add_node(child_names[0], k + 1, 1, decisions, values)
+        children.append((bname, child_names))
+
+    add_node('R', 0, 1, [], np.ones((len(techs), len(vintages))))
+
+    # Scenario structure, as generate_scenario_tree.py
+    stage_vars = '\n\n'.join(
+        'set  StageVariables[s' + str(p) + ']  :=\n  ' + '\n  '.join(v.format(p=p) for v in stage_variables) +
+        '\n\t;' for p in periods)
+    children_sets = '\n'.join(
+        'set  Children[' + bname + ']  :=\n  ' + '\n  '.join(c) + '\n\t;\n' for bname, c in children)
+
+    with open(os.path.join(dirname, 'ScenarioStructure.dat'), 'w') as f:
+        f.write('set  Stages  :=\n  s' + '\n  s'.join(str(p) for p in periods) + '\n\t;\n\n')
+        f.write('set  Scenarios  :=\n  S' + '\n  S'.join(leaves) + '\n\t;\n\n')
+        f.write('set  Nodes  :=\n  ' + '\n  '.join(nodes) + '\n\t;\n\n')
+        f.write(children_sets + '\n')
+        f.write(stage_vars + '\n\n')
+        f.write('param  NodeStage  :=\n  ' + '\n  '.join(nodestage) + '\n\t;\n\n')
+        f.write('param  ConditionalProbability  :=\n  ' + '\n  '.join(probability) + '\n\t;\n\n')
+        f.write('param  ScenarioLeafNode  :=\n  ' + '\n  '.join('S' + i + '  Rs' + i for i in leaves) + '\n\t;\n\n')
+        f.write('param  StageCostVariable  :=\n  ' +
+                '\n  '.join('s' + str(p) + ' StochasticPointCost[' + str(p) + ']' for p in periods) + '\n\t;\n\n')
+        f.write('param  ScenarioBasedData  :=  False ;\n')
+
+    shutil.copyfile(dat_file, os.path.join(dirname, 'ReferenceModel.dat'))
+    shutil.copyfile(dat_file, os.path.join(dirname, 'R.dat'))
+
+    return len(leaves)
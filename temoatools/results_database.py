@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import pandas as pd
+
+
+# =============================================================================
+# Read-once access to a solved Temoa database, shared by the analyze_* modules
+#
+# Tables are read the first time they are requested and cached as DataFrames,
+# with text columns stored as categories. Sums of output tables are computed
+# in SQLite (GROUP BY) unless the table is already cached or cache_outputs is
+# True, in which case the cached table is grouped with pandas. Use
+# cache_outputs=True when several metrics are calculated from the same
+# database (i.e. analyze_db) so each table is read at most once.
+# =============================================================================
+class ResultsDatabase(object):
+    def __init__(self, folder, db, cache_outputs=False):
+        #    inputs:
+        #    1) folder          - path containing db
+        #    2) db              - name of database
+        #    3) cache_outputs   - if True, output tables are read in full and cached instead of summed in SQLite
+        self.folder = folder
+        self.db = db
+        self.path = os.path.abspath(os.path.join(folder, db))
+        self.cache_outputs = cache_outputs
+        self.con = sqlite3.connect(self.path)
+        self.tables = {}
+        self.reads = []  # names of tables (or sums of tables) read from the database, in order
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.con is not None:
+            self.con.close()
+            self.con = None
+
+    # -----------------------------------------------------
+    # Full table, read once and cached
+    # -----------------------------------------------------
+    def table(self, name):
+        if name not in self.tables:
+            df = pd.read_sql_query("SELECT * FROM " + name, self.con)
+            # an empty table has no types to infer, its columns are left as read
+            for col in (df.columns if len(df) > 0 else []):
+                if df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype):
+                    df[col] = df[col].astype('category')
+            self.tables[name] = df
+            self.reads.append(name)
+        return self.tables[name]
+
+    # -----------------------------------------------------
+    # Sum of value grouped by the columns in by, for rows matching where ({column: value})
+    # -----------------------------------------------------
+    def aggregate(self, name, by, value, where=None):
+        if where is None:
+            where = {}
+
+        if name in self.tables or self.cache_outputs:
+            # pandas groupby of the cached table
+            df = self.table(name)
+            for col, val in where.items():
+                df = df[df[col] == val]
+            df = df.groupby(by, observed=True, sort=False)[value].sum().reset_index()
+            df = df.rename(columns={value: 'value'})
+            # results are small, return plain columns
+            for col in by:
+                if isinstance(df[col].dtype, pd.CategoricalDtype):
+                    df[col] = df[col].astype(df[col].cat.categories.dtype)
+            return df
+
+        # GROUP BY in SQLite
+        qry = "SELECT " + ", ".join(by) + ", SUM(" + value + ") AS value FROM " + name
+        if len(where) > 0:
+            qry = qry + " WHERE " + " AND ".join(col + " = ?" for col in where.keys())
+        qry = qry + " GROUP BY " + ", ".join(by)
+        self.reads.append('SUM ' + name)
+        return pd.read_sql_query(qry, self.con, params=list(where.values()))
+
+    # -----------------------------------------------------
+    # Quantities used by every analysis
+    # -----------------------------------------------------
+    def future_periods(self):
+        # future time periods, in the order listed (unsorted)
+        df = self.table('time_periods')
+        return [int(t) for t in df.t_periods[df.flag == 'f'].drop_duplicates()]
+
+    def technologies(self, sector_name='all'):
+        # technologies of a sector ("all" for every sector), in the order listed
+        df = self.table('technologies')
+        if not sector_name == "all":
+            df = df[df.sector == sector_name]
+        return [str(tech) for tech in df.tech.drop_duplicates()]
+
+    def tech_fuels(self, techs):
+        # dictionary of the input commodity (fuel) of each technology, first entry in Efficiency is used
+        df = self.table('Efficiency')
+        df = df[df.tech.isin(techs)].drop_duplicates('tech')
+        return dict((str(tech), str(fuel)) for tech, fuel in zip(df.tech, df.input_comm))
+
+    def scenarios(self):
+        # unique scenarios, in the order listed in Output_Objective
+        df = self.table('Output_Objective')
+        return [str(scenario) for scenario in df.scenario.drop_duplicates()]
@@ -1,4 +1,8 @@
 import os
+import csv
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
 import time
 
@@ -9,41 +13,45 @@ import time
 # If running the stochastic model with the same hurricane wind speeds
 # but different probabilities, then instead of re-running the temoa solution
 # the results can be copied and weighted to get new distributions
+#
+# The results are streamed row by row: each row is written as read and a copy with the database column
+# mapped through db_shift is held in a temporary file that is appended once the original rows are written
 # ===========================================
 def stoch_expand(path, filename, db_shift):
-    # Move to results directory
-    cwd = os.getcwd()
-    os.chdir(path)
-
-    # Read-in existing results
-    filein = filename + ".csv"
-    f = open(filein, 'r')
-    filedata = f.read()
-    f.close()
-
-    # Make a replacement on a copy of filedata, to preserve original results
-    newdata = filedata
-    # Remove first line of newdata, so that when combined we do not have the headings twice
-    ind = newdata.find("\n") + 2
-    newdata = newdata[ind:]
-    # Add a row number for the first line
-    newdata = "0" + newdata
-
-    # Replace db names with db_shift
-    for key in db_shift.keys():
-        newdata = newdata.replace(key, db_shift[key])
-
-    # Combine data
-    combdata = filedata + newdata
-
-    # Write out updated results
-    fileout = filename + "_exp.csv"
-    f = open(fileout, 'w')
-    f.write(combdata)
-    f.close()
-
-    # Return to original folder
-    os.chdir(cwd)
+    #    inputs:
+    #    1) path            - folder containing results
+    #    2) filename        - name of results csv (without extension), must have a database column
+    #    3) db_shift        - dictionary of database names of the copied rows, {original: new}
+    #
+    #    outputs:
+    #    1) filename_exp.csv - original rows followed by the copied rows
+    filein = os.path.join(path, filename + ".csv")
+    fileout = os.path.join(path, filename + "_exp.csv")
+
+    with open(filein, 'r', newline='') as f_in:
+        # keep the line endings of the original file
+        header_line = f_in.readline()
+        lineterminator = '\r\n' if header_line.endswith('\r\n') else '\n'
+        header = next(csv.reader([header_line]))
+        if 'database' not in header:
+            raise ValueError(filein + ' does not have a database column')
+        db_col = header.index('database')
+
+        with open(fileout, 'w', newline='') as f_out, tempfile.TemporaryFile('w+', newline='', dir=path) as f_tmp:
+            f_out.write(header_line)
+            writer = csv.writer(f_out, lineterminator=lineterminator)
+            writer_tmp = csv.writer(f_tmp, lineterminator=lineterminator)
+
+            # Write original rows, copies with the database replaced go to the temporary file
+            for row in csv.reader(f_in):
+                writer.writerow(row)
+                if len(row) > db_col:
+                    row[db_col] = db_shift.get(row[db_col], row[db_col])
+                writer_tmp.writerow(row)
+
+            # Combine data
+            f_tmp.seek(0)
+            shutil.copyfileobj(f_tmp, f_out)
 
 
 # ===========================================
@@ -52,8 +60,23 @@ def stoch_expand(path, filename, db_shift):
 # The stochastic model solves each node, but does not provide results in a format that weights the results.
 # This script resamples the results based on the calculated probabilities and a Monte Carlo population
 # of 10,000 so that plotting functions from seaborn can be used to easily visualize the results
+#
+# mode='repeat' copies the rows of each scenario int(n_population * prob) times (probability lost to truncation
+# is dropped), mode='sample' draws n_population scenarios per database with numpy (reproducible with seed) and
+# mode='weighted' keeps each row once with a weight column, for use with weighted_quantile, weighted_cdf and
+# weighted_mean instead of a population
 # ===========================================
-def stoch_resample(path, filename, node_prob):
+def stoch_resample(path, filename, node_prob, mode='repeat', n_population=10000, seed=None):
+    #    inputs:
+    #    1) path            - folder containing results
+    #    2) filename        - name of results csv (without extension), i.e. from stoch_expand
+    #    3) node_prob       - dictionary of branch probabilities for each case number
+    #    4) mode            - 'repeat', 'sample' or 'weighted', see above
+    #    5) n_population    - size of population per database for 'repeat' and 'sample'
+    #    6) seed            - seed of the random number generator for 'sample'
+    #
+    #    outputs:
+    #    1) df2             - resampled results, also saved as filename_resampled.csv
     # Move to results directory
     cwd = os.getcwd()
     os.chdir(path)
@@ -76,10 +99,6 @@ def stoch_resample(path, filename, node_prob):
     # Create new columns
     df.loc[:, "prob"] = 0.0  # to store probabilities (prob)
     df.loc[:, "entry"] = 0  # to store entry number
-    entry = 0  # Reset entry number
-    # Create a new dataframe to store results
-    n_population = 10000
-    df2 = pd.DataFrame()
 
     # ------------------
     # Compute Probabilities
@@ -89,30 +108,16 @@ def stoch_resample(path, filename, node_prob):
     # s = "D_#.S1s1s1s1"
     # s = "D_#.S2s2s2s2"
 
-    for s in df.loc[:, "scenario"].unique():
-
-        # Find each row for this scenario
-        indices = df.loc[:, "scenario"] == s
-        # Find positions of '_' and 'S' in scenario name to identify case_num and p_case
-        ind1 = s.find("_") + 1
-        ind2 = s.find("S") + 1
-        case_num = s[ind1]
-        p_case = node_prob[case_num]
-        # Compute probability of this scenario recursively
-        prob = p_case[int(s[ind2])]
-        while ind2 < len(s) - 1:
-            ind2 = ind2 + 2
-            prob = prob * p_case[int(s[ind2])]
-
-        # Store prob
-        df.loc[indices, "prob"] = prob
-
-        # Copy repeats into a new database
-        repeats = int(n_population * prob)
-        for i in range(repeats):
-            entry = entry + 1
-            df.loc[indices, "entry"] = entry
-            df2 = df2.append(df.loc[indices, :], ignore_index=True)
+    # Rows (positions in df) of each scenario
+    scenarios = df.loc[:, "scenario"].unique()
+    codes = pd.Categorical(df.loc[:, "scenario"], categories=scenarios).codes
+    order = np.argsort(codes, kind='stable')
+    splits = np.cumsum(np.bincount(codes, minlength=len(scenarios)))[:-1]
+    rows = np.split(order, splits)
+
+    probs = np.zeros(len(scenarios))
+    for i, s in enumerate(scenarios):
+        probs[i] = scenario_prob(s, node_prob)
 
         # Update user on time elapsed
         t = time.time()
@@ -120,6 +125,46 @@ def stoch_resample(path, filename, node_prob):
         print(s, ": elapsed time (s): ", str(round(dt, 2)))
         t_prev = t
 
+    # Store prob
+    df.loc[:, "prob"] = probs[codes]
+
+    # ------------------
+    # Number of copies of each scenario
+    # ------------------
+    if mode == 'repeat':
+        repeats = (n_population * probs).astype('int64')
+    elif mode == 'sample':
+        # draw n_population scenarios per database, probabilities normalized within each database
+        rng = np.random.default_rng(seed)
+        repeats = np.zeros(len(scenarios), dtype='int64')
+        databases = df.iloc[[r[0] for r in rows]].database.to_numpy()
+        for db in pd.unique(databases):
+            ind = np.flatnonzero(databases == db)
+            draws = rng.choice(len(ind), size=n_population, p=probs[ind] / probs[ind].sum())
+            repeats[ind] = np.bincount(draws, minlength=len(ind))
+    elif mode == 'weighted':
+        repeats = np.ones(len(scenarios), dtype='int64')
+    else:
+        raise ValueError("mode must be 'repeat', 'sample' or 'weighted'")
+
+    # ------------------
+    # Resampled results, a single copy of the selected rows
+    # ------------------
+    # Each repeat of the rows of a scenario gets the next entry number
+    positions = [np.tile(rows[i], repeats[i]) for i in range(len(scenarios))]
+    first = np.concatenate([[0], np.cumsum(repeats)[:-1]]) + 1
+    entries = [np.repeat(np.arange(first[i], first[i] + repeats[i]), len(rows[i])) for i in range(len(scenarios))]
+    positions = np.concatenate(positions) if len(positions) > 0 else np.empty(0, dtype='int64')
+    if len(positions) > 0:
+        # text columns with few unique values are copied as categories
+        categories = [col for col in ['scenario', 'database', 'quantity', 'fuelOrTech'] if col in df.columns]
+        df2 = df.astype(dict((col, 'category') for col in categories)).iloc[positions].reset_index(drop=True)
+        df2.loc[:, "entry"] = np.concatenate(entries)
+        if mode == 'weighted':
+            df2.loc[:, "weight"] = df2.loc[:, "prob"]
+    else:
+        df2 = pd.DataFrame()
+
     # ------------------
     # Check if successful (total probability per database==1)
     # ------------------
@@ -140,3 +185,49 @@ def stoch_resample(path, filename, node_prob):
 
     # Return to original folder
     os.chdir(cwd)
+
+    return df2
+
+
+# ===========================================
+# Probability of a stochastic scenario, i.e. "D_#.S0s1s2", product of the probability of each branch
+# ===========================================
+def scenario_prob(s, node_prob):
+    # Find positions of '_' and 'S' in scenario name to identify case_num and p_case
+    ind1 = s.find("_") + 1
+    ind2 = s.find("S") + 1
+    case_num = s[ind1]
+    p_case = node_prob[case_num]
+    # Compute probability of this scenario recursively
+    prob = p_case[int(s[ind2])]
+    while ind2 < len(s) - 1:
+        ind2 = ind2 + 2
+        prob = prob * p_case[int(s[ind2])]
+    return prob
+
+
+# ===========================================
+# Weighted statistics of results resampled with mode='weighted'
+# ===========================================
+def weighted_mean(values, weights):
+    # expected value
+    return np.average(np.asarray(values, dtype='float64'), weights=np.asarray(weights, dtype='float64'))
+
+
+def weighted_cdf(values, weights):
+    #    outputs:
+    #    1) x               - sorted unique values
+    #    2) cdf             - probability of a value less than or equal to x
+    values = np.asarray(values, dtype='float64')
+    weights = np.asarray(weights, dtype='float64')
+    x, inverse = np.unique(values, return_inverse=True)
+    cdf = np.cumsum(np.bincount(inverse.ravel(), weights=weights, minlength=len(x)))
+    return x, cdf / cdf[-1]
+
+
+def weighted_quantile(values, weights, q):
+    # smallest value with a cumulative probability of at least q (inverted cdf), q can be a float or array
+    x, cdf = weighted_cdf(values, weights)
+    # small tolerance so that rounding in the cumulative sum does not skip to the next value
+    ind = np.searchsorted(cdf, np.asarray(q, dtype='float64') - 1E-12, side='left')
+    return x[np.minimum(ind, len(x) - 1)]
@@ -49,7 +49,7 @@ demand_commodity = 'ELC_DMD'
 # Function to build a temoa model
 # =============================================================================
 def build(modelInputs, scenarioXLSX, scenarioName, outFilename, sensitivity={}, MCinputs={},
-          path=os.path.normcase('.'), mc_type='perturbations'):
+          path=os.path.normcase('.'), mc_type='perturbations', schema_template=False):
     data_path = os.path.join(path, 'data')
     # Get empty dictionary of local variables
     local = getEmptyLocalDict()
@@ -101,7 +101,7 @@ def build(modelInputs, scenarioXLSX, scenarioName, outFilename, sensitivity={},
     local, outputs = processConnections(inputs, local, outputs)
 
     # Copy temoa_schema_mod.db and write(commit) outputs to it
-    Write2Temoa(outputs, outFilename)
+    Write2Temoa(outputs, outFilename, schema_template=schema_template)
 
     return inputs
 
@@ -160,10 +160,46 @@ def getEmptyTemoaDict():
     return outputs
 
 
+# =============================================================================
+# Insert statements for each temoa table, prepared once per connection by sqlite3's statement cache
+# =============================================================================
+insertCommands = dict((table, 'INSERT INTO ' + table + ' VALUES (' + ','.join(['?'] * numEntries) + ')')
+                      for table, numEntries in temoaTables)
+
+# In-memory copy of the empty temoa database, (process id, connection), see getSchemaTemplate
+schemaTemplate = None
+
+
+# =============================================================================
+# Empty temoa database held in memory, cloned with the SQLite backup API
+# =============================================================================
+def getSchemaTemplate():
+    global schemaTemplate
+    # sqlite connections cannot be shared with forked processes, load a template per process
+    if schemaTemplate is None or not schemaTemplate[0] == os.getpid():
+        emptydB = os.path.join(tt.resource_path, "db_schema_temoa_mod.sqlite")
+        source = sqlite3.connect(emptydB)
+        template = sqlite3.connect(':memory:')
+        source.backup(template)
+        source.close()
+        schemaTemplate = (os.getpid(), template)
+    return schemaTemplate[1]
+
+
 # =============================================================================
 # Write outputs to an empty temoa database
 # =============================================================================
-def Write2Temoa(outputs, outFilename):
+def Write2Temoa(outputs, outFilename, schema_template=False, journal_mode='MEMORY'):
+    #    inputs:
+    #    1) outputs         - dictionary of temoa tables (lists of rows)
+    #    2) outFilename     - name of database to write (without extension), written to databases/
+    #    3) schema_template - if True, the empty database is cloned from an in-memory template instead of copied
+    #    4) journal_mode    - sqlite journal mode used while writing. The database is new and written in a single
+    #                         transaction, so the journal only needs to support rollback ('MEMORY'). 'WAL' is
+    #                         persistent and should be avoided on network file systems.
+    #
+    #    outputs:
+    #    1) errors          - list of (table, message) for tables that could not be inserted
     # Keep track of working directory
     workDir = os.getcwd()
 
@@ -183,36 +219,43 @@ def Write2Temoa(outputs, outFilename):
     # Delete old *.sqlite file (if it already exists) and copy/rename copy of temoa_schema.sqlite
     if os.path.isfile(outputdB):
         os.remove(outputdB)
-    shutil.copyfile(emptydB, outputdB)
+    if not schema_template:
+        shutil.copyfile(emptydB, outputdB)
 
-    # Set-up sqlite connection
-    conn = sqlite3.connect(outputdB)
-    c = conn.cursor()
-
-    for table, numEntries in temoaTables:
-
-        # Create SQL command based on number of entries
-        command = 'INSERT INTO ' + table + ' VALUES (?'
-        for i in range(numEntries - 1):
-            command = command + ',?'
-        command = command + ')'
-
-        # Execute SQL Command
-        try:
-            if len(outputs[table]) == 1 and numEntries == 1:
-                c.execute(command, outputs[table])
-            else:
-                c.executemany(command, outputs[table])
-        except:
-            print('Error inputting ' + table)
-
-    # Close Connection
-    conn.commit()
-    conn.close()
+    # Set-up sqlite connection, no fsyncs until the database is complete
+    conn = sqlite3.connect(outputdB, isolation_level=None)
+    errors = []
+    try:
+        conn.execute('PRAGMA synchronous = OFF')
+        if schema_template:
+            getSchemaTemplate().backup(conn)
+        conn.execute('PRAGMA journal_mode = ' + journal_mode)  # after the backup, WAL requires matching page sizes
+        conn.execute('PRAGMA cache_size = -16000')  # 16 MB
+        c = conn.cursor()
+
+        # Insert all tables in one transaction
+        c.execute('BEGIN')
+        for table, numEntries in temoaTables:
+            # Single entry tables (i.e. GlobalDiscountRate) may hold values rather than rows
+            rows = [row if isinstance(row, (tuple, list)) else (row,) for row in outputs[table]]
+            try:
+                c.executemany(insertCommands[table], rows)
+            except sqlite3.Error as e:
+                errors.append((table, str(e)))
+                print('Error inputting ' + table + ': ' + str(e))
+        c.execute('COMMIT')
+
+    finally:
+        # Roll back an unfinished transaction (i.e. a table missing from outputs) and close connection
+        if conn.in_transaction:
+            conn.rollback()
+        conn.close()
 
     # Return to working directory
     os.chdir(workDir)
 
+    return errors
+
 
 # =============================================================================
 # Get empty dictionary to hold local variables
@@ -384,70 +427,77 @@ def processPowerPlants(inputs, local, outputs):
     #    # Set index using connection for easier access
     #    inputs['Connections']               = inputs['Connections'].set_index('connection')
 
+    # Existing capacity of each powerplant, grouped once
+    existing = getExisting(inputs['PowerPlantsExisting'], 'powerplant')
+
     for techType in local['plants_to_include']:
-        tech = {}
-
-        # General
-        tech['name'] = techType
-        tech['fuel'] = inputs['PowerPlants'].loc[techType, 'fuel']
-        tech['output'] = inputs['PowerPlants'].loc[techType, 'output']
-
-        tech['baseload'] = str(inputs['PowerPlants'].loc[techType, 'baseload'])
-        tech['reserve'] = inputs['PowerPlants'].loc[techType, 'reserve']
-        tech['newBuilds'] = str(inputs['PowerPlants'].loc[techType, 'newBuilds'])
-        tech['renewable'] = inputs['PowerPlants'].loc[techType, 'renewable']
-        tech['storage'] = inputs['PowerPlants'].loc[techType, 'storage']
-        tech['sector'] = 'electric'
-        tech['CapacityCredit'] = inputs['PowerPlants'].loc[techType, 'CapacityCredit']
-        tech['StorageDuration'] = inputs['PowerPlants'].loc[techType, 'StorageDuration']
-
-        tech['c2a'] = 'Y'  # Indicator whether to include a capacity to activity input, only needed for powerplants
-
-        # Performance
-        # Efficiency takes precedence over heatRate value
-        if goodValue(inputs['PowerPlantsPerformance'].loc[techType, 'Efficiency']):
-            tech['efficiency'] = inputs['PowerPlantsPerformance'].loc[techType, 'Efficiency'] / 100.0
-        else:
-            tech['efficiency'] = 3412.0 / float(inputs['PowerPlantsPerformance'].loc[techType, 'HeatRate'])
-        tech['lifetime'] = inputs['PowerPlantsPerformance'].loc[techType, 'ExpectedLifetime']
-        tech['emission_activity'] = None
-        tech['capacity_factor'] = inputs['PowerPlantsPerformance'].loc[techType, 'CapacityFactor'] / 100.0
-
-        # Costs
-        tech['cost_invest'] = inputs['PowerPlantsCosts'].loc[techType, 'CostInvest']
-        tech['cost_fixed'] = inputs['PowerPlantsCosts'].loc[techType, 'CostFixed']
-        tech['cost_variable'] = inputs['PowerPlantsCosts'].loc[techType, 'CostVariable']
-        # Cost Increase - Constant Yearly % increase
-        tech['CostInvestIncr'] = inputs['PowerPlantsCosts'].loc[techType, 'CostInvestIncr']
-        tech['CostFixedIncr'] = inputs['PowerPlantsCosts'].loc[techType, 'CostFixedIncr']
-        tech['CostVariableIncr'] = inputs['PowerPlantsCosts'].loc[techType, 'CostVariableIncr']
-        tech['DiscountRate'] = inputs['PowerPlantsCosts'].loc[techType, 'DiscountRate']
-        tech['Ref_DiscountRate'] = inputs['PowerPlantsCosts'].loc[techType, 'Ref_DiscountRate']
-
-        # Constraints
-        tech['max_capacity'] = inputs['PowerPlantsConstraints'].loc[
-                                   techType, 'MaxCapacity'] / 1000.0  # Convert from MW to GW
-        tech['max_activity'] = inputs['PowerPlantsConstraints'].loc[techType, 'MaxActivity']
-        tech['ramp_rate'] = inputs['PowerPlantsConstraints'].loc[techType, 'RampRate']
-        tech['Retirement'] = None
-        tech['FirstBuild'] = inputs['PowerPlantsConstraints'].loc[techType, 'FirstBuild']
-        tech['LastBuild'] = inputs['PowerPlantsConstraints'].loc[techType, 'LastBuild']
-
-        # Existing
-        tech['existing_capacity_year'] = []
-        tech['existing_capacity_rating'] = []
-        for index, row in inputs['PowerPlantsExisting'].iterrows():
-            if row['powerplant'] == techType:
-                tech['existing_capacity_year'].append(row['YearInstalled'])
-                tech['existing_capacity_rating'].append(row['Capacity'] / 1000.0)  # Convert from MW to GW
-
-        # Update outputs for this technology
-        local, outputs = processTech(inputs, local, outputs, tech)
+        local, outputs = processPowerPlant(inputs, local, outputs, techType, existing)
 
     # Do something    
     return local, outputs
 
 
+# =============================================================================
+# Process a single PowerPlant
+# =============================================================================
+def processPowerPlant(inputs, local, outputs, techType, existing):
+    tech = {}
+
+    # General
+    tech['name'] = techType
+    tech['fuel'] = inputs['PowerPlants'].loc[techType, 'fuel']
+    tech['output'] = inputs['PowerPlants'].loc[techType, 'output']
+
+    tech['baseload'] = str(inputs['PowerPlants'].loc[techType, 'baseload'])
+    tech['reserve'] = inputs['PowerPlants'].loc[techType, 'reserve']
+    tech['newBuilds'] = str(inputs['PowerPlants'].loc[techType, 'newBuilds'])
+    tech['renewable'] = inputs['PowerPlants'].loc[techType, 'renewable']
+    tech['storage'] = inputs['PowerPlants'].loc[techType, 'storage']
+    tech['sector'] = 'electric'
+    tech['CapacityCredit'] = inputs['PowerPlants'].loc[techType, 'CapacityCredit']
+    tech['StorageDuration'] = inputs['PowerPlants'].loc[techType, 'StorageDuration']
+
+    tech['c2a'] = 'Y'  # Indicator whether to include a capacity to activity input, only needed for powerplants
+
+    # Performance
+    # Efficiency takes precedence over heatRate value
+    if goodValue(inputs['PowerPlantsPerformance'].loc[techType, 'Efficiency']):
+        tech['efficiency'] = inputs['PowerPlantsPerformance'].loc[techType, 'Efficiency'] / 100.0
+    else:
+        tech['efficiency'] = 3412.0 / float(inputs['PowerPlantsPerformance'].loc[techType, 'HeatRate'])
+    tech['lifetime'] = inputs['PowerPlantsPerformance'].loc[techType, 'ExpectedLifetime']
+    tech['emission_activity'] = None
+    tech['capacity_factor'] = inputs['PowerPlantsPerformance'].loc[techType, 'CapacityFactor'] / 100.0
+
+    # Costs
+    tech['cost_invest'] = inputs['PowerPlantsCosts'].loc[techType, 'CostInvest']
+    tech['cost_fixed'] = inputs['PowerPlantsCosts'].loc[techType, 'CostFixed']
+    tech['cost_variable'] = inputs['PowerPlantsCosts'].loc[techType, 'CostVariable']
+    # Cost Increase - Constant Yearly % increase
+    tech['CostInvestIncr'] = inputs['PowerPlantsCosts'].loc[techType, 'CostInvestIncr']
+    tech['CostFixedIncr'] = inputs['PowerPlantsCosts'].loc[techType, 'CostFixedIncr']
+    tech['CostVariableIncr'] = inputs['PowerPlantsCosts'].loc[techType, 'CostVariableIncr']
+    tech['DiscountRate'] = inputs['PowerPlantsCosts'].loc[techType, 'DiscountRate']
+    tech['Ref_DiscountRate'] = inputs['PowerPlantsCosts'].loc[techType, 'Ref_DiscountRate']
+
+    # Constraints
+    tech['max_capacity'] = inputs['PowerPlantsConstraints'].loc[
+                               techType, 'MaxCapacity'] / 1000.0  # Convert from MW to GW
+    tech['max_activity'] = inputs['PowerPlantsConstraints'].loc[techType, 'MaxActivity']
+    tech['ramp_rate'] = inputs['PowerPlantsConstraints'].loc[techType, 'RampRate']
+    tech['Retirement'] = None
+    tech['FirstBuild'] = inputs['PowerPlantsConstraints'].loc[techType, 'FirstBuild']
+    tech['LastBuild'] = inputs['PowerPlantsConstraints'].loc[techType, 'LastBuild']
+
+    # Existing
+    tech['existing_capacity_year'], tech['existing_capacity_rating'] = existing.get(techType, ([], []))
+
+    # Update outputs for this technology
+    local, outputs = processTech(inputs, local, outputs, tech)
+
+    return local, outputs
+
+
 # =============================================================================
 # Process Fuels
 # =============================================================================
@@ -459,64 +509,71 @@ def processFuels(inputs, local, outputs):
     # Set index using fuel for easier access
     #    inputs['Fuels']  = inputs['Fuels'].set_index('fuel')
 
+    # Existing capacity of each fuel, grouped once
+    existing = getExisting(inputs['FuelsExisting'], 'fuel')
+
     for techType in local['fuels_to_include']:
-        tech = {}
-
-        # General
-        tech['name'] = 'IMP' + techType
-        tech['fuel'] = 'ethos'
-        tech['output'] = techType
-
-        tech['baseload'] = 'N'
-        tech['reserve'] = 'N'
-        tech['newBuilds'] = 'Y'
-        tech['renewable'] = 'N'
-        tech['storage'] = 'N'
-        tech['sector'] = 'supply'
-        tech['CapacityCredit'] = None
-
-        tech['c2a'] = 'Y'  # Indicator whether to include a capacity to activity input, only needed for powerplants
-
-        # Performance
-        tech['efficiency'] = 1.0
-        tech['lifetime'] = inputs['Fuels'].loc[techType, 'Lifetime']
-        tech['emission_activity'] = inputs['Fuels'].loc[techType, 'EmissionActivity']
-        tech['capacity_factor'] = None
-
-        # Costs
-        tech['cost_invest'] = inputs['Fuels'].loc[techType, 'CostInvest']
-        tech['cost_fixed'] = None
-        tech['cost_variable'] = inputs['Fuels'].loc[techType, 'CostVariable']
-        # Cost Increase - Constant Yearly % increase
-        tech['CostInvestIncr'] = inputs['Fuels'].loc[techType, 'CostInvestIncr']
-        tech['CostFixedIncr'] = None
-        tech['CostVariableIncr'] = inputs['Fuels'].loc[techType, 'CostVariableIncr']
-        tech['DiscountRate'] = None
-        tech['Ref_DiscountRate'] = None
-
-        # Constraints
-        tech['max_capacity'] = None
-        tech['max_activity'] = inputs['Fuels'].loc[techType, 'MaxActivity']
-        tech['ramp_rate'] = None
-        tech['Retirement'] = inputs['Fuels'].loc[techType, 'Retirement']
-        tech['FirstBuild'] = inputs['Fuels'].loc[techType, 'FirstBuild']
-        tech['LastBuild'] = inputs['Fuels'].loc[techType, 'LastBuild']
-
-        # Existing
-        tech['existing_capacity_year'] = []
-        tech['existing_capacity_rating'] = []
-        for index, row in inputs['FuelsExisting'].iterrows():
-            if row['fuel'] == techType:
-                tech['existing_capacity_year'].append(row['YearInstalled'])
-                tech['existing_capacity_rating'].append(row['Capacity'] / 1000.0)  # Convert from MW to GW
-
-        # Update outputs for this technology
-        local, outputs = processTech(inputs, local, outputs, tech)
-
-        # Fuel Specific Tasks
-        # Add fuel as a commodity
-        outputs['commodities'].append((techType, "p", techType))
-        local['commodities'].append(techType)
+        local, outputs = processFuel(inputs, local, outputs, techType, existing)
+
+    return local, outputs
+
+
+# =============================================================================
+# Process a single Fuel
+# =============================================================================
+def processFuel(inputs, local, outputs, techType, existing):
+    tech = {}
+
+    # General
+    tech['name'] = 'IMP' + techType
+    tech['fuel'] = 'ethos'
+    tech['output'] = techType
+
+    tech['baseload'] = 'N'
+    tech['reserve'] = 'N'
+    tech['newBuilds'] = 'Y'
+    tech['renewable'] = 'N'
+    tech['storage'] = 'N'
+    tech['sector'] = 'supply'
+    tech['CapacityCredit'] = None
+
+    tech['c2a'] = 'Y'  # Indicator whether to include a capacity to activity input, only needed for powerplants
+
+    # Performance
+    tech['efficiency'] = 1.0
+    tech['lifetime'] = inputs['Fuels'].loc[techType, 'Lifetime']
+    tech['emission_activity'] = inputs['Fuels'].loc[techType, 'EmissionActivity']
+    tech['capacity_factor'] = None
+
+    # Costs
+    tech['cost_invest'] = inputs['Fuels'].loc[techType, 'CostInvest']
+    tech['cost_fixed'] = None
+    tech['cost_variable'] = inputs['Fuels'].loc[techType, 'CostVariable']
+    # Cost Increase - Constant Yearly % increase
+    tech['CostInvestIncr'] = inputs['Fuels'].loc[techType, 'CostInvestIncr']
+    tech['CostFixedIncr'] = None
+    tech['CostVariableIncr'] = inputs['Fuels'].loc[techType, 'CostVariableIncr']
+    tech['DiscountRate'] = None
+    tech['Ref_DiscountRate'] = None
+
+    # Constraints
+    tech['max_capacity'] = None
+    tech['max_activity'] = inputs['Fuels'].loc[techType, 'MaxActivity']
+    tech['ramp_rate'] = None
+    tech['Retirement'] = inputs['Fuels'].loc[techType, 'Retirement']
+    tech['FirstBuild'] = inputs['Fuels'].loc[techType, 'FirstBuild']
+    tech['LastBuild'] = inputs['Fuels'].loc[techType, 'LastBuild']
+
+    # Existing
+    tech['existing_capacity_year'], tech['existing_capacity_rating'] = existing.get(techType, ([], []))
+
+    # Update outputs for this technology
+    local, outputs = processTech(inputs, local, outputs, tech)
+
+    # Fuel Specific Tasks
+    # Add fuel as a commodity
+    outputs['commodities'].append((techType, "p", techType))
+    local['commodities'].append(techType)
 
     return local, outputs
 
@@ -528,69 +585,76 @@ def processConnections(inputs, local, outputs):
     # Set index using connection for easier access
     #    inputs['Connections']               = inputs['Connections'].set_index('connection')
 
+    # Existing capacity of each connection, grouped once
+    existing = getExisting(inputs['ConnectionsExisting'], 'connection')
+
     for techType in local['connections_to_include']:
-        tech = {}
-
-        # General
-        tech['name'] = techType
-        tech['fuel'] = inputs['Connections'].loc[techType, 'input']
-        tech['output'] = inputs['Connections'].loc[techType, 'output']
-
-        tech['baseload'] = 'N'
-        tech['reserve'] = 'N'
-        tech['newBuilds'] = 'Y'
-        tech['renewable'] = 'N'
-        tech['storage'] = 'N'
-        tech['sector'] = 'transport'
-        tech['CapacityCredit'] = None
-
-        tech['c2a'] = 'Y'  # Indicator whether to include a capacity to activity input, only needed for powerplants
-
-        # Performance
-        tech['efficiency'] = 1.0 - inputs['Connections'].loc[techType, 'Loss'] / 100.0
-        tech['lifetime'] = inputs['Connections'].loc[techType, 'Lifetime']
-        tech['emission_activity'] = inputs['Connections'].loc[techType, 'EmissionActivity']
-        tech['capacity_factor'] = None
-
-        # Costs
-        tech['cost_invest'] = inputs['Connections'].loc[techType, 'CostInvest']
-        tech['cost_fixed'] = None
-        tech['cost_variable'] = inputs['Connections'].loc[techType, 'CostVariable']
-        # Cost Increase - Constant Yearly % increase
-        tech['CostInvestIncr'] = inputs['Connections'].loc[techType, 'CostInvestIncr']
-        tech['CostFixedIncr'] = None
-        tech['CostVariableIncr'] = inputs['Connections'].loc[techType, 'CostVariableIncr']
-        tech['DiscountRate'] = None
-        tech['Ref_DiscountRate'] = None
-
-        # Constraints
-        tech['max_capacity'] = None
-        tech['max_activity'] = None
-        tech['ramp_rate'] = None
-        tech['Retirement'] = None
-        tech['FirstBuild'] = inputs['Connections'].loc[techType, 'FirstBuild']
-        tech['LastBuild'] = inputs['Connections'].loc[techType, 'LastBuild']
-
-        # Existing
-        tech['existing_capacity_year'] = []
-        tech['existing_capacity_rating'] = []
-        for index, row in inputs['ConnectionsExisting'].iterrows():
-            if row['connection'] == techType:
-                tech['existing_capacity_year'].append(row['YearInstalled'])
-                tech['existing_capacity_rating'].append(row['Capacity'] / 1000.0)  # Convert from MW to GW
-
-        # Update outputs for this technology
-        local, outputs = processTech(inputs, local, outputs, tech)
-
-        # Connection Specific Tasks
-        # Add fuel as a commodity
-        if not tech['fuel'] in local['commodities']:
-            outputs['commodities'].append((tech['fuel'], "p", tech['fuel']))
-            local['commodities'].append(tech['fuel'])
-
-        if not tech['output'] in local['commodities']:
-            outputs['commodities'].append((tech['output'], "p", tech['output']))
-            local['commodities'].append(tech['output'])
+        local, outputs = processConnection(inputs, local, outputs, techType, existing)
+
+    return local, outputs
+
+
+# =============================================================================
+# Process a single Connection
+# =============================================================================
+def processConnection(inputs, local, outputs, techType, existing):
+    tech = {}
+
+    # General
+    tech['name'] = techType
+    tech['fuel'] = inputs['Connections'].loc[techType, 'input']
+    tech['output'] = inputs['Connections'].loc[techType, 'output']
+
+    tech['baseload'] = 'N'
+    tech['reserve'] = 'N'
+    tech['newBuilds'] = 'Y'
+    tech['renewable'] = 'N'
+    tech['storage'] = 'N'
+    tech['sector'] = 'transport'
+    tech['CapacityCredit'] = None
+
+    tech['c2a'] = 'Y'  # Indicator whether to include a capacity to activity input, only needed for powerplants
+
+    # Performance
+    tech['efficiency'] = 1.0 - inputs['Connections'].loc[techType, 'Loss'] / 100.0
+    tech['lifetime'] = inputs['Connections'].loc[techType, 'Lifetime']
+    tech['emission_activity'] = inputs['Connections'].loc[techType, 'EmissionActivity']
+    tech['capacity_factor'] = None
+
+    # Costs
+    tech['cost_invest'] = inputs['Connections'].loc[techType, 'CostInvest']
+    tech['cost_fixed'] = None
+    tech['cost_variable'] = inputs['Connections'].loc[techType, 'CostVariable']
+    # Cost Increase - Constant Yearly % increase
+    tech['CostInvestIncr'] = inputs['Connections'].loc[techType, 'CostInvestIncr']
+    tech['CostFixedIncr'] = None
+    tech['CostVariableIncr'] = inputs['Connections'].loc[techType, 'CostVariableIncr']
+    tech['DiscountRate'] = None
+    tech['Ref_DiscountRate'] = None
+
+    # Constraints
+    tech['max_capacity'] = None
+    tech['max_activity'] = None
+    tech['ramp_rate'] = None
+    tech['Retirement'] = None
+    tech['FirstBuild'] = inputs['Connections'].loc[techType, 'FirstBuild']
+    tech['LastBuild'] = inputs['Connections'].loc[techType, 'LastBuild']
+
+    # Existing
+    tech['existing_capacity_year'], tech['existing_capacity_rating'] = existing.get(techType, ([], []))
+
+    # Update outputs for this technology
+    local, outputs = processTech(inputs, local, outputs, tech)
+
+    # Connection Specific Tasks
+    # Add fuel as a commodity
+    if not tech['fuel'] in local['commodities']:
+        outputs['commodities'].append((tech['fuel'], "p", tech['fuel']))
+        local['commodities'].append(tech['fuel'])
+
+    if not tech['output'] in local['commodities']:
+        outputs['commodities'].append((tech['output'], "p", tech['output']))
+        local['commodities'].append(tech['output'])
 
     return local, outputs
 
@@ -602,6 +666,37 @@ def goodValue(value):
     return (not value is None) and (not str(value) == 'nan')
 
 
+# =============================================================================
+# Existing capacity by technology, years and ratings (GW) in the order listed
+# =============================================================================
+def getExisting(df, column):
+    existing = {}
+    for techType, dfx in df.groupby(column, sort=False):
+        existing[techType] = (dfx['YearInstalled'].tolist(), (dfx['Capacity'] / 1000.0).tolist())
+    return existing
+
+
+# =============================================================================
+# Cost escalated at a constant yearly % increase from start_year, one value per year
+# =============================================================================
+def escalateCost(cost, incr, years, start_year):
+    if goodValue(incr):
+        # scalar pow (one per year) keeps values bit-identical to the per-tuple calculation
+        factors = np.array([(1.0 + incr / 100.0) ** float(year - start_year) for year in years], dtype=float)
+        return cost * factors
+    return np.full(len(years), cost, dtype=float)
+
+
+# =============================================================================
+# Indices of the (period, vintage) pairs where a vintage is still operating
+# =============================================================================
+def activeVintages(periods, vintages, lifetime):
+    periods = np.asarray(periods, dtype=float)[:, None]
+    vintages = np.asarray(vintages, dtype=float)[None, :]
+    # row-major order: periods outer, vintages inner
+    return np.nonzero((vintages <= periods) & ((periods - vintages) < lifetime))
+
+
 # =============================================================================
 # Process Technologies
 # =============================================================================
@@ -671,65 +766,58 @@ def processTech(inputs, local, outputs, tech):
 
         # Constant capacity factor
         if not tech['fuel'] in list(inputs['capacityFactorTOD'].fuel):
-            for representativeDay in inputs['representativeDays'].representativeDay:
-                for timeOfDay in inputs['timesOfDay'].timeOfDay:
-                    outputs['CapacityFactorTech'].append(
-                        (representativeDay, timeOfDay, tech['name'], tech['capacity_factor'], " "))
+            days = inputs['representativeDays'].representativeDay.tolist()
+            times = inputs['timesOfDay'].timeOfDay.tolist()
+            outputs['CapacityFactorTech'].extend(
+                [(representativeDay, timeOfDay, tech['name'], tech['capacity_factor'], " ")
+                 for representativeDay in days for timeOfDay in times])
         # Capacity factor that varies with timeOfday and representativeDay
         else:
-            for index, row in inputs['capacityFactorTOD'].iterrows():
-                if row['fuel'] == tech['fuel']:
-                    value = row['capacityFactor'] * tech['capacity_factor']
-                    # enforce that value is between 0 and 1
-                    if value < 0.0:
-                        value = 0.0
-                        print('Warning: Capacity factor less than 0.0, set to 0.0: ' + tech['name'] + ' '
-                              + row['representativeDay'] + ' ' + row['timeOfDay'])
-                    elif value > 1.0:
-                        value = 1.0
-                        print('Warning: Capacity factor greater than 1.0, set to 1.0: ' + tech['name'] + ' '
-                              + row['representativeDay'] + ' ' + row['timeOfDay'])
-                    outputs['CapacityFactorTech'].append((row['representativeDay'], row['timeOfDay'], tech['name'],
-                                                          value, " "))
+            df = inputs['capacityFactorTOD']
+            dfx = df[df.loc[:, 'fuel'] == tech['fuel']]
+            values = dfx['capacityFactor'].to_numpy(dtype=float) * tech['capacity_factor']
+            # enforce that value is between 0 and 1
+            for representativeDay, timeOfDay in zip(dfx['representativeDay'][values < 0.0],
+                                                     dfx['timeOfDay'][values < 0.0]):
+                print('Warning: Capacity factor less than 0.0, set to 0.0: ' + tech['name'] + ' '
+                      + representativeDay + ' ' + timeOfDay)
+            for representativeDay, timeOfDay in zip(dfx['representativeDay'][values > 1.0],
+                                                     dfx['timeOfDay'][values > 1.0]):
+                print('Warning: Capacity factor greater than 1.0, set to 1.0: ' + tech['name'] + ' '
+                      + representativeDay + ' ' + timeOfDay)
+            values = np.clip(values, 0.0, 1.0)
+            outputs['CapacityFactorTech'].extend(
+                zip(dfx['representativeDay'].tolist(), dfx['timeOfDay'].tolist(), [tech['name']] * len(values),
+                    values.tolist(), [" "] * len(values)))
+
+    # Operating (period, vintage) pairs, shared by CostFixed and CostVariable
+    periods = local['active_future_periods']
+    start_year = periods[0]
+    p_ind, v_ind = activeVintages(periods, buildYears, tech['lifetime'])
+    period_str = [str(period) for period in periods]
+    vintage_str = [str(vintage) for vintage in buildYears]
+    pairs = [(period_str[p], vintage_str[v]) for p, v in zip(p_ind, v_ind)]
 
     # CostFixed
     if goodValue(tech['cost_fixed']):
-        start_year = local['active_future_periods'][0]
-        for period in local['active_future_periods']:
-            for vintage in buildYears:
-                if (vintage <= period) and ((period - vintage) < tech['lifetime']):
-                    if goodValue(tech['CostFixedIncr']):
-                        N = float(period - start_year)
-                        costFixed = tech['cost_fixed'] * (1.0 + tech['CostFixedIncr'] / 100.0) ** N
-                    else:
-                        costFixed = tech['cost_fixed']
-                    outputs['CostFixed'].append(
-                        (str(period), tech['name'], str(vintage), costFixed, "M USD/GW", " "))
+        costFixed = escalateCost(tech['cost_fixed'], tech['CostFixedIncr'], periods, start_year)[p_ind]
+        outputs['CostFixed'].extend(
+            [(period, tech['name'], vintage, cost, "M USD/GW", " ")
+             for (period, vintage), cost in zip(pairs, costFixed.tolist())])
 
     # CostInvest
     if goodValue(tech['cost_invest']):
-        start_year = local['active_future_periods'][0]
-        for year in futureBuildYears:
-            if goodValue(tech['CostInvestIncr']):
-                N = float(year - start_year)
-                costInvest = tech['cost_invest'] * (1.0 + tech['CostInvestIncr'] / 100.0) ** N
-            else:
-                costInvest = tech['cost_invest']
-            outputs['CostInvest'].append((tech['name'], str(year), costInvest, "M USD/GW", " "))
+        costInvest = escalateCost(tech['cost_invest'], tech['CostInvestIncr'], futureBuildYears, start_year)
+        outputs['CostInvest'].extend(
+            [(tech['name'], str(year), cost, "M USD/GW", " ")
+             for year, cost in zip(futureBuildYears, costInvest.tolist())])
 
     # CostVariable
     if goodValue(tech['cost_variable']):
-        start_year = local['active_future_periods'][0]
-        for period in local['active_future_periods']:
-            for vintage in buildYears:
-                if (vintage <= period) and ((period - vintage) < tech['lifetime']):
-                    if goodValue(tech['CostVariableIncr']):
-                        N = float(period - start_year)
-                        costVar = tech['cost_variable'] * (1.0 + tech['CostVariableIncr'] / 100.0) ** N
-                    else:
-                        costVar = tech['cost_variable']
-                    outputs['CostVariable'].append(
-                        (str(period), tech['name'], str(vintage), costVar, "M USD/PJ", " "))
+        costVar = escalateCost(tech['cost_variable'], tech['CostVariableIncr'], periods, start_year)[p_ind]
+        outputs['CostVariable'].extend(
+            [(period, tech['name'], vintage, cost, "M USD/PJ", " ")
+             for (period, vintage), cost in zip(pairs, costVar.tolist())])
 
     # Discount Rate Tech
     if goodValue(tech['DiscountRate']):
@@ -0,0 +1,181 @@
+import os
+import copy
+from temoatools.temoa_model_build import getEmptyLocalDict, getEmptyTemoaDict, processScenarios, inputs2Dict, \
+    processSystem, processPowerPlant, processFuel, processConnection, getExisting, applySensitivity, \
+    applyMonteCarlo, Write2Temoa, debug
+
+
+# =============================================================================
+# Build-once, perturb-many
+#
+# compileBaseline reads the scenario workbook and model inputs once and keeps the
+# Temoa rows of the baseline split into segments, one for the system parameters
+# and one per technology. buildCase applies the perturbations of a sensitivity or
+# Monte Carlo case to a copy of the inputs, recomputes only the segments that the
+# perturbed (type, variable, tech) entries touch and writes the case database.
+# =============================================================================
+
+# Process function and table of existing capacity for each technology type
+techTypes = [('PowerPlants', 'plants_to_include', processPowerPlant, 'PowerPlantsExisting', 'powerplant'),
+             ('Fuels', 'fuels_to_include', processFuel, 'FuelsExisting', 'fuel'),
+             ('Connections', 'connections_to_include', processConnection, 'ConnectionsExisting', 'connection')]
+
+# Global variables that are applied to every powerplant (growth limits), others only change system parameters
+globalTechVars = ['MaxGrowthRate', 'MinGrowthSeed']
+
+
+# =============================================================================
+# Read inputs once and build the baseline as segments
+# =============================================================================
+def compileBaseline(modelInputs, scenarioXLSX, scenarioName, path=os.path.normcase('.')):
+    #    inputs:
+    #    1) modelInputs     - name of the universal database (i.e. from move_data_to_db)
+    #    2) scenarioXLSX    - name of the scenario workbook
+    #    3) scenarioName    - scenario to build
+    #    4) path            - project path, expects a subdirectory named data
+    #
+    #    outputs:
+    #    1) baseline        - dictionary with inputs, local, existing capacity and segments of temoa rows
+    data_path = os.path.join(path, 'data')
+    baseline = {}
+
+    # Process scenarios and read-in inputs
+    local = processScenarios(scenarioXLSX, scenarioName, getEmptyLocalDict(), data_path)
+    inputs = inputs2Dict(modelInputs, data_path)
+    baseline['local'] = copy.deepcopy(local)
+    baseline['inputs'] = copyInputs(inputs)
+
+    # Existing capacity is not perturbed, group it once
+    baseline['existing'] = {}
+    for techType, key, processFunc, existingTable, column in techTypes:
+        baseline['existing'][techType] = getExisting(inputs[existingTable], column)
+
+    # Segments of temoa rows
+    baseline['segments'] = buildSegments(inputs, local, baseline['existing'])
+
+    return baseline
+
+
+# =============================================================================
+# Temoa rows of the system parameters and each technology, in build order
+# =============================================================================
+def buildSegments(inputs, local, existing, touched=None, baseSegments=None):
+    #    touched and baseSegments are used for cases: only segments with a key in touched are recomputed,
+    #    the others are taken from baseSegments. The system segment is always recomputed (it is small).
+    segments = []
+
+    # System parameters
+    local, outputs = processSystem(inputs, local, getEmptyTemoaDict())
+    segments.append((('System', None), outputs))
+    base = dict(baseSegments) if baseSegments is not None else {}
+
+    # Technologies, each with its own copy of the lists that processTech appends to
+    for techType, key, processFunc, existingTable, column in techTypes:
+        for tech in local[key]:
+            segKey = (techType, tech)
+            if touched is None or segKey in touched:
+                techLocal = copy.copy(local)
+                techLocal['allTimePeriods'] = list(local['allTimePeriods'])
+                techLocal['commodities'] = list(local['commodities'])
+                techLocal, outputs = processFunc(inputs, techLocal, getEmptyTemoaDict(), tech, existing[techType])
+                segments.append((segKey, outputs))
+            else:
+                segments.append((segKey, base[segKey]))
+
+    return segments
+
+
+# =============================================================================
+# Combine segments into one dictionary of temoa outputs
+# =============================================================================
+def assembleOutputs(segments):
+    outputs = getEmptyTemoaDict()
+    # Existing capacity years and commodities are shared between technologies, keep the first entry only
+    seen = {'time_periods': set(), 'commodities': set()}
+    for segKey, segment in segments:
+        for table, rows in segment.items():
+            if table in seen:
+                for row in rows:
+                    if row[0] not in seen[table]:
+                        seen[table].add(row[0])
+                        outputs[table].append(row)
+            else:
+                outputs[table].extend(rows)
+    return outputs
+
+
+# =============================================================================
+# Segments touched by a list of perturbations
+# =============================================================================
+def touchedSegments(perturbations, local):
+    touched = set()
+    for perturbation in perturbations:
+        if perturbation['type'] == 'Globals':
+            # DiscountRate and ReserveMargin only change the system segment, which is always recomputed
+            if perturbation['variable'] in globalTechVars:
+                for tech in local['plants_to_include']:
+                    touched.add(('PowerPlants', tech))
+        elif perturbation['type'] in ['PowerPlants', 'Fuels', 'Connections']:
+            touched.add((perturbation['type'], perturbation['tech']))
+    return touched
+
+
+# =============================================================================
+# Copy of the inputs dictionary that can be modified without changing the baseline
+# =============================================================================
+def copyInputs(inputs):
+    return dict((table, df.copy()) for table, df in inputs.items())
+
+
+# =============================================================================
+# Temoa outputs of a single case
+# =============================================================================
+def caseOutputs(baseline, sensitivity={}, MCinputs={}, mc_type='perturbations'):
+    inputs = copyInputs(baseline['inputs'])
+    local = copy.deepcopy(baseline['local'])
+
+    # List perturbations in the same order as build applies them
+    perturbations = []
+    if not len(sensitivity) == 0:
+        perturbations.append((applySensitivity, sensitivity))
+    if not len(MCinputs) == 0:
+        for i in range(len(MCinputs)):
+            if mc_type == 'perturbations':
+                perturbations.append((applySensitivity, MCinputs.loc[i, :]))
+            elif mc_type == 'values':
+                perturbations.append((applyMonteCarlo, MCinputs.loc[i, :]))
+    if debug:
+        print(perturbations)
+
+    # Apply perturbations to inputs
+    for applyFunc, perturbation in perturbations:
+        inputs, local = applyFunc(inputs, perturbation, local)
+
+    # Recompute touched segments only
+    touched = touchedSegments([perturbation for applyFunc, perturbation in perturbations], local)
+    segments = buildSegments(inputs, local, baseline['existing'], touched=touched,
+                             baseSegments=baseline['segments'])
+
+    return inputs, assembleOutputs(segments)
+
+
+# =============================================================================
+# Build a single case database, same arguments as build without the inputs that were compiled
+# =============================================================================
+def buildCase(baseline, outFilename, sensitivity={}, MCinputs={}, mc_type='perturbations', schema_template=True):
+    #    inputs:
+    #    1) baseline        - compiled baseline from compileBaseline
+    #    2) outFilename     - name of database to write (without extension), written to databases/
+    #    3) sensitivity     - single sensitivity case (row of createSensitivityCases)
+    #    4) MCinputs        - monte carlo case (type, variable, tech and multiplier/value columns)
+    #    5) mc_type         - 'perturbations' or 'values', see build
+    #    6) schema_template - clone the empty database from an in-memory template, see Write2Temoa
+    #
+    #    outputs:
+    #    1) inputs          - modified inputs used for this case
+    inputs, outputs = caseOutputs(baseline, sensitivity=sensitivity, MCinputs=MCinputs, mc_type=mc_type)
+
+    # Copy temoa_schema_mod.db and write(commit) outputs to it
+    Write2Temoa(outputs, outFilename, schema_template=schema_template)
+
+    return inputs
@@ -1,8 +1,14 @@
 import os
+import sys
+import io
+import time
 import shutil
 import temoatools as tt
 from pathlib import Path
 
+# Temoa modules loaded in-process, keyed by the temoa_model directory they were imported from
+temoa_modules = {}
+
 
 # ============================================================================#
 # Run Temoa Model using a config File
@@ -39,7 +45,10 @@ def run(model_filename, temoa_path=os.path.normcase('C:/temoa/temoa'), saveEXCEL
     if debug:
         print(command)
     try:
-        os.system(command)
+        exit_code = os.system(command)
+        if exit_code != 0:
+            print("Temoa exited with code " + str(exit_code) + ": " + command)
+            error = True
     except:
         print(command)
         error = True
@@ -65,6 +74,150 @@ def run(model_filename, temoa_path=os.path.normcase('C:/temoa/temoa'), saveEXCEL
     return error
 
 
+# ============================================================================#
+# Import Temoa once per Python process and keep the abstract model for reuse
+# ============================================================================#
+def load_temoa(temoa_path=os.path.normcase('C:/temoa/temoa')):
+    temoa_model_dir = os.path.abspath(os.path.join(temoa_path, 'temoa_model'))
+
+    if temoa_model_dir in temoa_modules:
+        return temoa_modules[temoa_model_dir]
+
+    # Temoa uses flat imports (from temoa_rules import *), so only one copy can live in a process
+    if len(temoa_modules) > 0:
+        raise RuntimeError("A different Temoa version is already loaded in this process: "
+                           + str(list(temoa_modules.keys())[0]))
+
+    if temoa_model_dir not in sys.path:
+        sys.path.insert(0, temoa_model_dir)
+    import temoa_model
+    import temoa_run
+    import temoa_config
+
+    temoa = {'model': temoa_model.model,  # abstract model built by temoa_create_model() on import
+             'temoa_model': temoa_model,
+             'temoa_run': temoa_run,
+             'temoa_config': temoa_config}
+    temoa_modules[temoa_model_dir] = temoa
+
+    return temoa
+
+
+# ============================================================================#
+# Run Temoa Model within the current Python process
+# ============================================================================#
+def run_inprocess(model_filename, temoa_path=os.path.normcase('C:/temoa/temoa'), saveEXCEL=False, debug=False,
+                  solver=''):
+    #    inputs:
+    #    1) model_filename  - name of database in databases/ (with or without extension)
+    #    2) temoa_path      - path to Temoa directory that contains temoa_model/
+    #    3) saveEXCEL       - True or False, default is False
+    #    4) debug           - True or False, prints the Temoa log when True
+    #    5) solver          - leave as '' to use system default, other options include 'cplex', 'gurobi'
+    #
+    #    outputs:
+    #    1) result          - dictionary holding model_filename, error, status, objective, message and timings
+    # ============================================================================#
+    t0 = time.time()
+    result = {'model_filename': model_filename, 'error': False, 'status': 'not solved', 'objective': None,
+              'message': '', 'timings': {}}
+
+    # Keep track of main(working) directory
+    workDir = os.getcwd()
+
+    # Model Directory
+    model_directory = os.path.join(workDir, "databases")
+
+    # Directory to hold configuration files
+    configDir = os.path.join(workDir, "configs")
+    try:
+        os.stat(configDir)
+    except:
+        os.mkdir(configDir)
+    os.chdir(configDir)
+
+    # Log of the Temoa run, printed at the end if debug
+    log = io.StringIO()
+    stage = 'import'
+
+    try:
+        # Import Temoa (only slow the first time this is called within a process)
+        temoa = load_temoa(temoa_path)
+        temoa_run = temoa['temoa_run']
+        result['timings']['import'] = time.time() - t0
+
+        # Create configuration file and parse it
+        stage = 'config'
+        t = time.time()
+        config_file = CreateConfigFile(model_directory, model_filename, saveEXCEL=saveEXCEL, debug=debug,
+                                       solver=solver)
+        config_path_full = os.path.join(configDir, config_file)
+        if len(solver) > 0:
+            default_solver = solver
+        else:
+            available_solvers, default_solver = temoa_run.get_solvers()
+        options = temoa['temoa_config'].TemoaConfig(d_solver=default_solver)
+        options.build(config=config_path_full)
+        options.path_to_lp_files = os.path.join(options.path_to_logs, "lp_files")
+        temoa_run.TempfileManager.tempdir = options.path_to_lp_files
+        optimizer = temoa_run.SolverFactory(options.solver)
+        result['timings']['config'] = time.time() - t
+
+        # Create instance from the shared abstract model, timing each step as Temoa reports it
+        stage = 'create_instance'
+        solver_instance = temoa_run.TemoaSolverInstance(temoa['model'], optimizer, options, log)
+        t = time.time()
+        for k in solver_instance.create_temoa_instance():
+            if k.startswith('Creating Temoa model instance'):
+                result['timings']['read_data'] = time.time() - t
+                t = time.time()
+        result['timings']['create_instance'] = time.time() - t
+
+        # Solve and write results to the database
+        stage = 'solve'
+        t = time.time()
+        for k in solver_instance.solve_temoa_instance():
+            if k.startswith('Calculating reporting variables'):
+                result['timings']['solve'] = time.time() - t
+                t = time.time()
+        result['timings']['write_results'] = time.time() - t
+
+        # Package solver status and objective
+        termination = str(solver_instance.result.solver.termination_condition)
+        result['status'] = termination
+        if termination == 'optimal':
+            result['objective'] = value_of_objective(solver_instance.instance)
+        else:
+            result['error'] = True
+            result['message'] = 'Solver terminated with condition: ' + termination
+
+    except Exception as e:
+        result['error'] = True
+        result['status'] = 'error'
+        result['message'] = stage + ': ' + str(e)
+        print("Error running " + str(model_filename) + " in-process (" + result['message'] + ")")
+
+    if debug:
+        print(log.getvalue())
+        print(result)
+
+    # Return to working directory
+    os.chdir(workDir)
+
+    result['timings']['total'] = time.time() - t0
+    return result
+
+
+# ============================================================================#
+# Value of the first active objective of a solved instance
+# ============================================================================#
+def value_of_objective(instance):
+    from pyomo.environ import Objective, value
+    for obj in instance.component_data_objects(Objective, active=True):
+        return value(obj)
+    return None
+
+
 # ============================================================================#
 # Create Config File
 # ============================================================================#
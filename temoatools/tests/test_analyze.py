@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+import temoatools as tt
+
+
+class TestAnalyze(unittest.TestCase):
+
+    def test_output_table(self):
+        db_table = pd.DataFrame({'scenario': ['s1', 's1', 's1', 's2', 's1'],
+                                 't_periods': [2020, 2020, 2025, 2020, 2050],
+                                 'tech': ['EC', 'EC', 'NG', 'EC', 'EC'],
+                                 'value': [1.0, 2.0, 3.0, 4.0, 5.0]})
+        t_periods = [2020, 2025]
+        techs = ['EC', 'NG', 'WIND']
+
+        # summed, periods and technologies outside of the table are ignored
+        df = tt.analyze_costs.outputTable(db_table, 's1', 't_periods', 'value', t_periods, techs, aggregate=True)
+        expected = pd.DataFrame([[3.0, 0.0, 0.0], [0.0, 3.0, 0.0]], index=t_periods, columns=techs)
+        pd.testing.assert_frame_equal(df, expected, check_names=False)
+
+        # last entry
+        df = tt.analyze_costs.outputTable(db_table, 's1', 't_periods', 'value', t_periods, techs)
+        self.assertEqual(df.loc[2020, 'EC'], 2.0)
+
+    def test_results_database_reads_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            con = sqlite3.connect(os.path.join(tmp, 'test.sqlite'))
+            con.execute('CREATE TABLE Output_Emissions (scenario text, t_periods integer, tech text, emissions real)')
+            con.executemany('INSERT INTO Output_Emissions VALUES (?,?,?,?)',
+                            [('s1', 2020, 'EC', 1.0), ('s1', 2020, 'NG', 2.0), ('s1', 2025, 'EC', 3.0)])
+            con.commit()
+            con.close()
+
+            # summed in SQLite
+            with tt.ResultsDatabase(tmp, 'test.sqlite') as results:
+                sql = results.aggregate('Output_Emissions', ['scenario', 't_periods'], 'emissions')
+                self.assertEqual(results.reads, ['SUM Output_Emissions'])
+
+            # summed from the cached table, which is read once
+            with tt.ResultsDatabase(tmp, 'test.sqlite', cache_outputs=True) as results:
+                cached = results.aggregate('Output_Emissions', ['scenario', 't_periods'], 'emissions')
+                results.aggregate('Output_Emissions', ['t_periods'], 'emissions', where={'tech': 'EC'})
+                self.assertEqual(results.reads, ['Output_Emissions'])
+
+            pd.testing.assert_frame_equal(sql, cached)
+            self.assertEqual(sql.value.tolist(), [3.0, 3.0])
+
+    def test_costs_without_demand(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            con = sqlite3.connect(os.path.join(tmp, 'test.sqlite'))
+            tables = {
+                'time_periods': ('t_periods integer, flag text', [(2020, 'f'), (2025, 'f'), (2030, 'f')]),
+                'technologies': ('tech text, sector text', [('EC', 'electric')]),
+                'Output_Objective': ('scenario text, objective_name text, total_system_cost real',
+                                     [('s1', 'TotalCost', 1.0)]),
+                'CostInvest': ('tech text, vintage integer, cost_invest real', [('EC', 2020, 10.0)]),
+                'CostFixed': ('periods integer, tech text, vintage integer, cost_fixed real', []),
+                'CostVariable': ('periods integer, tech text, vintage integer, cost_variable real', []),
+                'GlobalDiscountRate': ('rate real', [(0.05,)]),
+                'LifetimeLoanTech': ('tech text, loan real', [('EC', 10.0)]),
+                'Output_VFlow_Out': ('scenario text, t_periods integer, tech text, output_comm text, vflow_out real',
+                                     [('s1', 2020, 'EC', 'ELC', 1.0)]),
+                'Output_V_Capacity': ('scenario text, tech text, vintage integer, capacity real',
+                                      [('s1', 'EC', 2020, 1.0)]),
+                'Output_CapacityByPeriodAndTech': ('scenario text, t_periods integer, tech text, capacity real',
+                                                   [('s1', 2020, 'EC', 1.0)]),
+            }
+            for name, (columns, rows) in tables.items():
+                con.execute('CREATE TABLE ' + name + ' (' + columns + ')')
+                if len(rows) > 0:
+                    con.executemany('INSERT INTO ' + name + ' VALUES (' + ','.join('?' * len(rows[0])) + ')', rows)
+            con.commit()
+            con.close()
+
+            # no output matches the electricity demand, costs per unit of demand are infinite
+            yearlyCosts, LCOE = tt.analyze_costs.SingleDB(tmp, 'test.sqlite')
+            self.assertEqual(yearlyCosts.loc[('test.sqlite', 's1'), 2020], float('inf'))
+            self.assertEqual(LCOE.loc[('test.sqlite', 's1'), 'LCOE'], float('inf'))
+
+    def test_combine_blocks(self):
+        blocks = [tt.combined_analysis.get_block('LCOE', 5.0),
+                  tt.combined_analysis.get_block('capacity_by_year', [1.0, 2.0], quantity_type='fuel',
+                                                 tech_or_fuel=['COAL', 'WIND'], year=[2020, 2025])]
+        output = tt.combined_analysis.combine_blocks(blocks, 'case', 3, 'test.sqlite')
+        self.assertEqual(list(output.columns), tt.combined_analysis.entries)
+        self.assertEqual(output.quantity.tolist(), ['LCOE', 'capacity_by_year', 'capacity_by_year'])
+        self.assertEqual(output.iteration.tolist(), [3, 3, 3])
+        self.assertEqual(output.value.tolist(), [5.0, 1.0, 2.0])
+        self.assertTrue(pd.isna(output.loc[0, 'year']) and pd.isna(output.loc[0, 'tech_or_fuel']))
+        self.assertEqual(output.loc[2, 'year'], 2025)
+        for entry in tt.combined_analysis.categories:
+            self.assertIsInstance(output[entry].dtype, pd.CategoricalDtype)
+
+
+if __name__ == '__main__':
+    unittest.main()
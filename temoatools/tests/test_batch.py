@@ -0,0 +1,52 @@
+import os
+import unittest
+import temoatools as tt
+
+
+def square(case_id, case):
+    return case * case
+
+
+def crash_on_three(case_id, case):
+    if case == 3:
+        os._exit(1)
+    return case
+
+
+def grow_memory(case_id, case):
+    # hold on to memory so the worker exceeds the ceiling
+    grow_memory.data = getattr(grow_memory, 'data', []) + [bytearray(20 * 1000 * 1000)]
+    return os.getpid()
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_results_in_case_order(self):
+        cases = [(i, i) for i in range(10)]
+        outputs = tt.run_batch(square, cases, ncpus=2)
+        self.assertEqual([o['result'] for o in outputs], [i * i for i in range(10)])
+        self.assertFalse(any(o['error'] for o in outputs))
+
+    def test_duplicate_case_ids(self):
+        with self.assertRaises(ValueError):
+            tt.run_batch(square, [(1, 2), (1, 3), (2, 4)], ncpus=2)
+
+    def test_crashed_worker_is_restarted(self):
+        cases = [(i, i) for i in range(6)]
+        outputs = tt.run_batch(crash_on_three, cases, ncpus=2)
+        self.assertTrue(outputs[3]['error'])
+        self.assertEqual([o['result'] for o in outputs if not o['error']], [0, 1, 2, 4, 5])
+
+    def test_memory_ceiling_recycles_workers(self):
+        memory = tt.batch.memory_mb()
+        if memory is None:
+            self.skipTest('memory use cannot be measured on this platform')
+        cases = [(i, i) for i in range(4)]
+        outputs = tt.run_batch(grow_memory, cases, ncpus=1, max_memory_mb=memory + 10.0)
+        pids = set(o['result'] for o in outputs)
+        self.assertFalse(any(o['error'] for o in outputs))
+        self.assertGreater(len(pids), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
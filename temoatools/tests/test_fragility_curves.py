@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+import temoatools as tt
+
+
+class TestFragilityCurves(unittest.TestCase):
+
+    def test_fragility(self):
+        wind_mph = np.array([0.5, 50.0, 120.0, 180.0, 400.0])
+
+        # stiff, scalar and array
+        self.assertEqual(tt.fragility(100.0, 'inf_stiff'), 0.0)
+        np.testing.assert_array_equal(tt.fragility(wind_mph, 'cecbl_destr'), np.zeros(5))
+
+        # interpolated in m/s, 0.0 below the curve and 1.0 above it
+        p = tt.fragility(wind_mph, 'trans_UK_base')
+        self.assertEqual(p[0], 0.0)
+        self.assertEqual(p[-1], 1.0)
+        self.assertAlmostEqual(tt.fragility(41.16350883 / 0.44704, 'trans_UK_base'), 0.003913894)
+
+        # closed form curves
+        self.assertAlmostEqual(tt.fragility(150.0, 'sub_HAZUS_severe_k1'), norm.cdf((np.log(150.0) - 5.060) / 0.15))
+        self.assertAlmostEqual(tt.fragility(100.0, 'dist_TX'), 0.0001 * np.exp(4.21))
+        self.assertEqual(tt.fragility(300.0, 'trans_TX'), 1.0)
+
+        # invalid curves have no failures
+        np.testing.assert_array_equal(tt.fragility(wind_mph, 'not_a_curve'), np.zeros(5))
+
+    def test_evaluate_many(self):
+        curves = tt.fragility_curves.library.names()
+        wind_mph = np.linspace(1.0, 250.0, 60).reshape(3, 20)
+
+        p_failure = tt.fragility_many(wind_mph, curves)
+        self.assertEqual(p_failure.shape, (len(curves), 3, 20))
+        for i, curve in enumerate(curves):
+            for j in range(3):
+                np.testing.assert_array_equal(p_failure[i, j], tt.fragility(wind_mph[j], curve))
+
+        with self.assertRaises(ValueError):
+            tt.fragility_many(wind_mph, ['trans_UK_base', 'not_a_curve'])
+
+        # zero wind speed (years without hurricanes) raises no warnings, lognormal curves have no failures
+        with np.errstate(all='raise'):
+            p_failure = tt.fragility_many(np.array([0.0, 100.0]), curves)
+            self.assertEqual(tt.fragility(0.0, 'sub_HAZUS_severe_k1'), 0.0)
+        kinds = [tt.fragility_curves.curve_data[curve]['kind'] for curve in curves]
+        lognormal = [i for i, kind in enumerate(kinds) if kind == 'lognormal']
+        np.testing.assert_array_equal(p_failure[lognormal, 0], np.zeros(len(lognormal)))
+
+    def test_register_csv(self):
+        df = pd.DataFrame({'wind_mph': [0.0, 100.0, 150.0, 200.0],
+                           'pole': [0.0, 0.2, 0.6, 1.0],
+                           'tower': [0.0, 0.1, None, 0.5]})
+        library = tt.FragilityLibrary()
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'curves.csv')
+            df.to_csv(filename, index=False)
+            self.assertEqual(library.register_csv(filename), ['pole', 'tower'])
+
+        p_failure = library.evaluate_many(['pole', 'tower', 'inf_stiff'], [50.0, 125.0, 250.0])
+        np.testing.assert_allclose(p_failure, [[0.1, 0.4, 1.0], [0.05, 0.2, 1.0], [0.0, 0.0, 0.0]])
+
+        # custom curves are not added to the library of tt.fragility
+        self.assertNotIn('pole', tt.fragility_curves.library)
+
+        with self.assertRaises(ValueError):
+            library.register('bad', 'linear', x=[0.0], y=[0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import temoatools as tt
+
+
+class TestHurricaneEnsemble(unittest.TestCase):
+
+    def test_hurricane_branches(self):
+        # years without hurricanes are one branch
+        windspeeds = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 100.0, 120.0, 140.0, 160.0]
+        branches = tt.hurricane_branches(windspeeds, 5)
+        self.assertEqual(list(branches.index), ['H1', 'H2', 'H3'])
+        np.testing.assert_allclose(branches.windspeed, [0.0, 110.0, 150.0])
+        np.testing.assert_allclose(branches.probability, [0.6, 0.2, 0.2])
+
+        # random branches are repeatable
+        branches = tt.hurricane_branches(windspeeds, 3, method='sample', seed=1)
+        pd.testing.assert_frame_equal(branches, tt.hurricane_branches(windspeeds, 3, method='sample', seed=1))
+        self.assertAlmostEqual(branches.probability.sum(), 1.0)
+
+    def test_cap_reduction_rates(self):
+        branches = pd.DataFrame({'windspeed': [0.0, 150.0, 400.0], 'probability': [0.5, 0.3, 0.2]},
+                                index=['H1', 'H2', 'H3'])
+        rates = tt.cap_reduction_rates(branches, {'LOCAL': 'inf_stiff', 'TRANS': 'trans'},
+                                       {'inf_stiff': 'inf_stiff', 'trans': 'trans_UK_base'}, cutoff=0.05)
+        np.testing.assert_allclose(rates.loc['LOCAL'], [1.0, 1.0, 1.0])
+        self.assertEqual(rates.loc['TRANS', 'H2'], round(1.0 - tt.fragility(150.0, 'trans_UK_base'), 3))
+        self.assertEqual(rates.loc['TRANS', 'H3'], 0.05)
+
+    def test_write_scenario_tree(self):
+        branches = pd.DataFrame({'windspeed': [0.0, 150.0], 'probability': [0.75, 0.25]}, index=['H1', 'H2'])
+        rates = pd.DataFrame({'H1': [1.0, 0.9], 'H2': [0.5, 0.8]}, index=['TRANS', 'SOLAR'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dat_file = os.path.join(tmp, 'T.dat')
+            with open(dat_file, 'w') as f:
+                f.write('set time_exist := \n2000\n;\n\nset time_future := \n2016\n2021\n2026\n2031\n;\n\n'
+                        'set tech_resource := \nIMPGAS\n;\n\nset tech_production := \nTRANS\nSOLAR\n;\n')
+            dirname = os.path.join(tmp, 'T_0')
+            self.assertEqual(tt.write_scenario_tree(dirname, dat_file, branches, rates), 4)
+
+            files = sorted(os.listdir(dirname))
+            self.assertEqual(files, ['R.dat', 'ReferenceModel.dat', 'Rs0.dat', 'Rs0s0.dat', 'Rs0s1.dat', 'Rs1.dat',
+                                     'Rs1s0.dat', 'Rs1s1.dat', 'ScenarioStructure.dat'])
+
+            # H2 in 2016 then H1 in 2021: capacity built by 2016 struck by both, built in 2021 by H1 only
+            values = pd.read_csv(os.path.join(dirname, 'Rs1s0.dat'), skiprows=3, sep='\t', skipfooter=1,
+                                 engine='python', names=['p', 't', 'v', 'val'])
+            values = values.set_index(['t', 'v']).val
+            self.assertEqual(values['TRANS', 2000], 0.5)
+            self.assertAlmostEqual(values['SOLAR', 2016], 0.72)
+            self.assertAlmostEqual(values['SOLAR', 2021], 0.9)
+            self.assertEqual(values['SOLAR', 2026], 1.0)
+
+            with open(os.path.join(dirname, 'ScenarioStructure.dat')) as f:
+                structure = f.read()
+            self.assertIn('set  Children[Rs1]  :=\n  Rs1s0\n  Rs1s1\n\t;', structure)
+            self.assertIn('Rs1s0  0.75', structure)
+            self.assertIn('S1s0  Rs1s0', structure)
+            self.assertIn('V_Capacity[*,2021]', structure)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import temoatools as tt
+
+
+class TestModelBuild(unittest.TestCase):
+
+    def test_active_vintages(self):
+        periods = [2020, 2025, 2030]
+        vintages = [2015, 2020, 2030]
+        p_ind, v_ind = tt.temoa_model_build.activeVintages(periods, vintages, 10)
+        result = [(periods[p], vintages[v]) for p, v in zip(p_ind, v_ind)]
+        expected = []
+        for period in periods:
+            for vintage in vintages:
+                if vintage <= period and period - vintage < 10:
+                    expected.append((period, vintage))
+        self.assertEqual(result, expected)
+
+    def test_escalate_cost(self):
+        result = tt.temoa_model_build.escalateCost(2.0, 5.0, [2020, 2025], 2020)
+        expected = [2.0, 2.0 * 1.05 ** 5.0]
+        self.assertEqual(result.tolist(), expected)
+        result = tt.temoa_model_build.escalateCost(2.0, np.nan, [2020, 2025], 2020)
+        self.assertEqual(result.tolist(), [2.0, 2.0])
+
+    def test_get_existing(self):
+        df = pd.DataFrame({'powerplant': ['A', 'B', 'A'], 'YearInstalled': [2000, 2005, 2010],
+                           'Capacity': [100.0, 200.0, 300.0]})
+        existing = tt.temoa_model_build.getExisting(df, 'powerplant')
+        self.assertEqual(existing['A'], ([2000, 2010], [0.1, 0.3]))
+        self.assertEqual(existing['B'], ([2005], [0.2]))
+
+    def test_assemble_outputs_keeps_first_shared_entry(self):
+        system = tt.temoa_model_build.getEmptyTemoaDict()
+        system['time_periods'] = [('2020', 'f')]
+        system['commodities'] = [('ethos', 'p', 'dummy variable')]
+        tech1 = tt.temoa_model_build.getEmptyTemoaDict()
+        tech1['time_periods'] = [('2010', 'e')]
+        tech1['commodities'] = [('ethos', 'p', 'ethos'), ('COAL', 'p', 'COAL')]
+        tech1['Efficiency'] = [('ethos', 'IMPCOAL', '2020', 'COAL', 1.0, ' ')]
+        tech2 = tt.temoa_model_build.getEmptyTemoaDict()
+        tech2['time_periods'] = [('2010', 'e')]
+        outputs = tt.temoa_model_delta.assembleOutputs([(('System', None), system), (('Fuels', 'COAL'), tech1),
+                                                        (('PowerPlants', 'EC'), tech2)])
+        self.assertEqual(outputs['time_periods'], [('2020', 'f'), ('2010', 'e')])
+        self.assertEqual(outputs['commodities'], [('ethos', 'p', 'dummy variable'), ('COAL', 'p', 'COAL')])
+        self.assertEqual(len(outputs['Efficiency']), 1)
+
+    def test_touched_segments(self):
+        local = {'plants_to_include': ['EC', 'NG']}
+        perturbations = [{'type': 'Baseline', 'variable': 'Baseline', 'tech': 'Baseline'},
+                         {'type': 'Fuels', 'variable': 'CostVariable', 'tech': 'COAL'},
+                         {'type': 'Globals', 'variable': 'DiscountRate', 'tech': 'global'}]
+        touched = tt.temoa_model_delta.touchedSegments(perturbations, local)
+        self.assertEqual(touched, {('Fuels', 'COAL')})
+        perturbations = [{'type': 'Globals', 'variable': 'MaxGrowthRate', 'tech': 'global'}]
+        touched = tt.temoa_model_delta.touchedSegments(perturbations, local)
+        self.assertEqual(touched, {('PowerPlants', 'EC'), ('PowerPlants', 'NG')})
+
+    def test_write2temoa_reports_errors(self):
+        outputs = tt.temoa_model_build.getEmptyTemoaDict()
+        outputs['GlobalDiscountRate'] = ['0.05']
+        outputs['tech_baseload'] = [('EC',)]
+        outputs['time_periods'] = [('2020', 'f'), ('2020', 'f')]  # duplicate primary key
+        workDir = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                for schema_template in [False, True]:
+                    errors = tt.temoa_model_build.Write2Temoa(outputs, 'test', schema_template=schema_template)
+                    self.assertEqual([table for table, message in errors], ['time_periods'])
+                    conn = sqlite3.connect(os.path.join('databases', 'test.sqlite'))
+                    self.assertEqual(conn.execute('SELECT * FROM tech_baseload').fetchall(), [('EC',)])
+                    self.assertEqual(len(conn.execute('SELECT * FROM GlobalDiscountRate').fetchall()), 1)
+                    conn.close()
+            finally:
+                os.chdir(workDir)
+
+    def test_write2temoa_rolls_back(self):
+        outputs = tt.temoa_model_build.getEmptyTemoaDict()
+        outputs['tech_baseload'] = [('EC',)]
+        del outputs['time_periods']
+        workDir = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                with self.assertRaises(KeyError):
+                    tt.temoa_model_build.Write2Temoa(outputs, 'test')
+                conn = sqlite3.connect(os.path.join('databases', 'test.sqlite'))
+                self.assertEqual(conn.execute('SELECT * FROM tech_baseload').fetchall(), [])
+                conn.close()
+            finally:
+                os.chdir(workDir)
+
+
+if __name__ == '__main__':
+    unittest.main()
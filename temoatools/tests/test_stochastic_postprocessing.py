@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import temoatools as tt
+
+
+class TestStochasticPostprocessing(unittest.TestCase):
+
+    def test_stoch_expand(self):
+        df = pd.DataFrame({'database': ['db1', 'db10'], 'scenario': ['D_1.S0', 'D_1.S1'], 'note': ['db1', 'a, db1']})
+        with tempfile.TemporaryDirectory() as tmp:
+            df.to_csv(os.path.join(tmp, 'test.csv'))
+            tt.stoch_expand(tmp, 'test', {'db1': 'db2'})
+            df2 = pd.read_csv(os.path.join(tmp, 'test_exp.csv'), index_col=0)
+
+        # only the database column of the copied rows changes
+        self.assertEqual(df2.database.tolist(), ['db1', 'db10', 'db2', 'db10'])
+        self.assertEqual(df2.note.tolist(), ['db1', 'a, db1', 'db1', 'a, db1'])
+        self.assertEqual(df2.index.tolist(), [0, 1, 0, 1])
+
+    def test_stoch_resample(self):
+        node_prob = {'0': [0.75, 0.25]}
+        df = pd.DataFrame({'database': ['db0'] * 5,
+                           'scenario': ['D_0.S0s0', 'D_0.S0s0', 'D_0.S0s1', 'D_0.S1s0', 'solve'],
+                           'value': [1.0, 2.0, 3.0, 4.0, 5.0]})
+        with tempfile.TemporaryDirectory() as tmp:
+            df.to_csv(os.path.join(tmp, 'test.csv'))
+            tt.stoch_resample(tmp, 'test', node_prob)
+            df2 = pd.read_csv(os.path.join(tmp, 'test_resampled.csv'), index_col=0)
+
+        # 5625 repeats of S0s0 (2 rows each), 1875 of S0s1 and S1s0, solve is removed
+        self.assertEqual(len(df2), 5625 * 2 + 1875 * 2)
+        self.assertEqual(df2.scenario.value_counts()['D_0.S0s0'], 5625 * 2)
+        # each repeat has its own entry number, counted across scenarios
+        self.assertEqual(df2.entry.tolist()[:4], [1, 1, 2, 2])
+        self.assertEqual(df2.entry.max(), 5625 + 1875 * 2)
+        self.assertEqual(df2.loc[df2.scenario == 'D_0.S1s0', 'prob'].iloc[0], 0.1875)
+
+    def test_stoch_resample_modes(self):
+        node_prob = {'0': [0.75, 0.25], '1': [0.5, 0.5]}
+        df = pd.DataFrame({'database': ['db0', 'db0', 'db1', 'db1'],
+                           'scenario': ['D_0.S0', 'D_0.S1', 'D_1.S0', 'D_1.S1'],
+                           'value': [1.0, 2.0, 3.0, 4.0]})
+        with tempfile.TemporaryDirectory() as tmp:
+            df.to_csv(os.path.join(tmp, 'test.csv'))
+            weighted = tt.stoch_resample(tmp, 'test', node_prob, mode='weighted')
+            sample = tt.stoch_resample(tmp, 'test', node_prob, mode='sample', n_population=1000, seed=1)
+            sample2 = tt.stoch_resample(tmp, 'test', node_prob, mode='sample', n_population=1000, seed=1)
+
+        # weighted, each row once
+        self.assertEqual(weighted.weight.tolist(), [0.75, 0.25, 0.5, 0.5])
+        self.assertEqual(weighted.entry.tolist(), [1, 2, 3, 4])
+
+        # sample, n_population per database and reproducible
+        self.assertEqual(sample.database.value_counts().tolist(), [1000, 1000])
+        pd.testing.assert_frame_equal(sample, sample2)
+        share = (sample.scenario == 'D_0.S0').sum() / 1000.0
+        self.assertAlmostEqual(share, 0.75, delta=0.05)
+
+    def test_weighted_statistics(self):
+        values = [3.0, 1.0, 2.0, 1.0]
+        weights = [0.1, 0.2, 0.4, 0.3]
+        self.assertAlmostEqual(tt.weighted_mean(values, weights), 0.3 + 0.2 + 0.8 + 0.3)
+        x, cdf = tt.weighted_cdf(values, weights)
+        self.assertEqual(x.tolist(), [1.0, 2.0, 3.0])
+        np.testing.assert_allclose(cdf, [0.5, 0.9, 1.0])
+        self.assertEqual(tt.weighted_quantile(values, weights, [0.0, 0.5, 0.6, 1.0]).tolist(), [1.0, 1.0, 2.0, 3.0])
+        # equal weights match numpy's inverted cdf quantiles
+        values = np.arange(10.0)
+        q = [0.1, 0.25, 0.5, 0.95]
+        np.testing.assert_array_equal(tt.weighted_quantile(values, np.ones(10), q),
+                                      np.quantile(values, q, method='inverted_cdf'))
+
+
+if __name__ == '__main__':
+    unittest.main()